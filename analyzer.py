@@ -6,20 +6,52 @@ Author: Your Name
 Version: 1.0
 """
 
-import re
+import hashlib
+import json
+import os
 import string
 from collections import Counter
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Iterable, Optional
 
 # Import our pattern definitions
 try:
     from patterns import PatternLibrary
+    from profiling import Profiler, profiler_from_env
+    from rules import RuleRegistry, get_registry
+    from scanner import RuleBudget
+    from topk import HeavyHitters, capacity_from_env
 except ImportError:
     print("Error: patterns.py not found. Make sure all files are in the same directory.")
     import sys
     sys.exit(1)
 
 
+# Translation tables shared by every tokenizer (built once, not per call)
+PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
+PUNCTUATION_DELETE = str.maketrans('', '', string.punctuation)
+
+# Text is tokenized in blocks of about this many characters
+TOKEN_BLOCK_SIZE = 1024 * 1024
+
+
+def iter_text_blocks(text: str, block_size: int = TOKEN_BLOCK_SIZE) -> Iterable[str]:
+    """Yield slices of text that always end on a space or newline (or at the end)"""
+    position = 0
+    length = len(text)
+
+    while position < length:
+        end = position + block_size
+        if end >= length:
+            yield text[position:]
+            return
+
+        # Cut at the next whitespace so no token is split between blocks
+        cuts = [cut for cut in (text.find(' ', end), text.find('\n', end)) if cut != -1]
+        end = min(cuts) if cuts else length
+        yield text[position:end]
+        position = end
+
+
 class SentimentAnalyzer:
     """Simple sentiment analysis using word-based approach"""
 
@@ -53,15 +85,29 @@ class SentimentAnalyzer:
             'cryptocurrency', 'illegal', 'drugs', 'weapon', 'bomb', 'attack'
         }
 
-    def analyze_sentiment(self, text: str) -> str:
-        """Analyze sentiment of text and return Positive/Negative/Neutral"""
-        # Convert to lowercase and remove punctuation
-        text_clean = text.lower().translate(str.maketrans('', '', string.punctuation))
-        words = text_clean.split()
-
-        positive_count = sum(1 for word in words if word in self.positive_words)
-        negative_count = sum(1 for word in words if word in self.negative_words)
-
+    def count_words(self, text: str) -> Tuple[int, int, int, int]:
+        """Count (positive, negative, risky, total) words in text"""
+        positive_count = negative_count = risky_word_count = total_words = 0
+
+        for block in iter_text_blocks(text):
+            # Convert to lowercase and remove punctuation
+            counts = self.count_tokens(Counter(block.lower().translate(PUNCTUATION_DELETE).split()))
+            positive_count += counts[0]
+            negative_count += counts[1]
+            risky_word_count += counts[2]
+            total_words += counts[3]
+
+        return positive_count, negative_count, risky_word_count, total_words
+
+    def count_tokens(self, token_counts: Counter) -> Tuple[int, int, int, int]:
+        """(positive, negative, risky, total) from a Counter of punctuation-free tokens"""
+        positive_count = sum(token_counts[word] for word in self.positive_words)
+        negative_count = sum(token_counts[word] for word in self.negative_words)
+        risky_word_count = sum(token_counts[word] for word in self.risky_words)
+        return positive_count, negative_count, risky_word_count, sum(token_counts.values())
+
+    def sentiment_from_counts(self, positive_count: int, negative_count: int) -> str:
+        """Turn positive/negative word counts into Positive/Negative/Neutral"""
         # Determine sentiment based on word counts
         if positive_count > negative_count:
             return "Positive"
@@ -70,14 +116,8 @@ class SentimentAnalyzer:
         else:
             return "Neutral"
 
-    def calculate_risk_from_words(self, text: str) -> int:
-        """Calculate risk score based on risky words found"""
-        text_clean = text.lower().translate(str.maketrans('', '', string.punctuation))
-        words = text_clean.split()
-
-        risky_word_count = sum(1 for word in words if word in self.risky_words)
-        total_words = len(words)
-
+    def risk_from_counts(self, risky_word_count: int, total_words: int) -> int:
+        """Turn risky/total word counts into a word-based risk score"""
         if total_words == 0:
             return 0
 
@@ -87,99 +127,127 @@ class SentimentAnalyzer:
         # Cap at 50% since we'll add pattern-based risk too
         return min(int(risk_percentage * 2), 50)
 
+    def analyze_sentiment(self, text: str) -> str:
+        """Analyze sentiment of text and return Positive/Negative/Neutral"""
+        positive_count, negative_count, _, _ = self.count_words(text)
+        return self.sentiment_from_counts(positive_count, negative_count)
+
+    def calculate_risk_from_words(self, text: str) -> int:
+        """Calculate risk score based on risky words found"""
+        _, _, risky_word_count, total_words = self.count_words(text)
+        return self.risk_from_counts(risky_word_count, total_words)
+
 
 class SuspiciousPatternAnalyzer:
     """Main analyzer class that detects patterns and calculates risk"""
 
-    def __init__(self):
-        self.patterns = PatternLibrary()
+    def __init__(self, registry: Optional[RuleRegistry] = None, profiler: Optional[Profiler] = None,
+                 top_k: Optional[int] = None):
+        self.patterns = PatternLibrary(registry)
+        self.registry = self.patterns.registry
         self.sentiment_analyzer = SentimentAnalyzer()
+        self._scanner = None
 
-    def find_patterns(self, text: str) -> Dict[str, List[str]]:
-        """Find all suspicious patterns in the text"""
-        found_patterns = {
-            'emails': [],
-            'phone_numbers': [],
-            'credit_cards': [],
-            'ssn_numbers': [],
-            'urls': [],
-            'ip_addresses': [],
-            'bitcoin_addresses': [],
-            'file_paths': []
-        }
-
-        try:
-            # Find email addresses
-            email_matches = re.findall(self.patterns.EMAIL_PATTERN, text, re.IGNORECASE)
-            found_patterns['emails'] = list(set(email_matches))  # Remove duplicates
-
-            # Find phone numbers
-            phone_matches = re.findall(self.patterns.PHONE_PATTERN, text)
-            found_patterns['phone_numbers'] = list(set(phone_matches))
-
-            # Find credit card numbers
-            cc_matches = re.findall(self.patterns.CREDIT_CARD_PATTERN, text)
-            found_patterns['credit_cards'] = list(set(cc_matches))
+        # Profiling is opt-in: with no profiler, analyze() does no extra timing
+        self.profiler = profiler or profiler_from_env()
 
-            # Find SSN numbers
-            ssn_matches = re.findall(self.patterns.SSN_PATTERN, text)
-            found_patterns['ssn_numbers'] = list(set(ssn_matches))
+        # Word frequency is exact unless a summary capacity is set (see topk.py)
+        self.top_k = top_k or capacity_from_env()
 
-            # Find URLs
-            url_matches = re.findall(self.patterns.URL_PATTERN, text, re.IGNORECASE)
-            found_patterns['urls'] = list(set(url_matches))
+        # Pattern categories reported by the analyzer (in display order) and
+        # their risk weights both come from the enabled rule packs
+        self.CATEGORIES = self.registry.categories()
+        self.RISK_WEIGHTS = self.registry.weights()
 
-            # Find IP addresses
-            ip_matches = re.findall(self.patterns.IP_PATTERN, text)
-            found_patterns['ip_addresses'] = list(set(ip_matches))
+    @property
+    def scanner(self):
+        """Compiled text scanner, built on first use to keep CLI startup fast"""
+        if self._scanner is None:
+            self._scanner = self.patterns.get_scanner(self.CATEGORIES)
+        return self._scanner
 
-            # Find Bitcoin addresses
-            bitcoin_matches = re.findall(self.patterns.BITCOIN_PATTERN, text)
-            found_patterns['bitcoin_addresses'] = list(set(bitcoin_matches))
+    def find_patterns(self, text: str, budget: Optional[RuleBudget] = None) -> Dict[str, List[str]]:
+        """Find all suspicious patterns in the text (rules that run out of budget are noted in `budget`)"""
+        found_patterns = {category: [] for category in self.CATEGORIES}
 
-            # Find file paths
-            path_matches = re.findall(self.patterns.FILE_PATH_PATTERN, text)
-            found_patterns['file_paths'] = list(set(path_matches))
+        try:
+            # Single prefilter pass; each hit is routed to its category (duplicates removed)
+            found_patterns = self.scanner.scan(text, budget)
 
         except Exception as e:
             print(f"Error during pattern matching: {str(e)}")
+            if self.profiler is not None:
+                self.profiler.add_error('find_patterns', e)
 
         return found_patterns
 
+    def locate_patterns(self, text: str):
+        """Find every hit with its offsets and line number (a findings.FindingTable)"""
+        # Imported here because findings.py is only needed for positional results
+        from findings import collect_findings
+        return collect_findings(text, self.scanner)
+
+    # Common stop words to ignore in word frequency
+    STOP_WORDS = {
+        'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+        'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
+        'after', 'above', 'below', 'between', 'among', 'this', 'that', 'these',
+        'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her',
+        'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their', 'am', 'is',
+        'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+        'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
+        'must', 'can', 'shall', 'a', 'an'
+    }
+
+    def new_word_counts(self):
+        """Empty word counter: an exact Counter, or a bounded HeavyHitters summary when top_k is set"""
+        return HeavyHitters(self.top_k) if self.top_k else Counter()
+
+    def count_word_frequency(self, text: str) -> Counter:
+        """Count every non-stop word longer than 2 characters"""
+        word_counts = self.new_word_counts()
+        for block in iter_text_blocks(text):
+            word_counts.update(self._frequency_tokens(block.lower()))
+        return word_counts
+
+    def _frequency_tokens(self, lowered: str) -> Counter:
+        """Counter of the words in an already lowercased block, minus short and stop words"""
+        # Punctuation becomes a word break here (the sentiment tokens delete it instead)
+        counts = Counter(lowered.translate(PUNCTUATION_TO_SPACE).split())
+
+        # Filtering the distinct words is far cheaper than filtering every token
+        stop_words = self.STOP_WORDS
+        for word in [word for word in counts if len(word) <= 2 or word in stop_words]:
+            del counts[word]
+        return counts
+
+    def word_statistics(self, text: str) -> Tuple[Counter, int, int, int, int]:
+        """Word frequency plus (positive, negative, risky, total) counts in one pass
+
+        Each block is lowercased once and feeds both tokenizations, so no
+        full-size copy of the text or list of its words is ever built.
+        """
+        sentiment_analyzer = self.sentiment_analyzer
+        word_counts = self.new_word_counts()
+        positive_count = negative_count = risky_word_count = total_words = 0
+
+        for block in iter_text_blocks(text):
+            lowered = block.lower()
+            word_counts.update(self._frequency_tokens(lowered))
+
+            counts = sentiment_analyzer.count_tokens(Counter(lowered.translate(PUNCTUATION_DELETE).split()))
+            positive_count += counts[0]
+            negative_count += counts[1]
+            risky_word_count += counts[2]
+            total_words += counts[3]
+
+        return word_counts, positive_count, negative_count, risky_word_count, total_words
+
     def analyze_word_frequency(self, text: str, top_n: int = 20) -> List[Tuple[str, int]]:
         """Analyze word frequency in the text"""
         try:
-            # Clean the text - remove punctuation and convert to lowercase
-            text_clean = text.lower()
-
-            # Remove punctuation but keep spaces
-            translator = str.maketrans(string.punctuation, ' ' * len(string.punctuation))
-            text_clean = text_clean.translate(translator)
-
-            # Split into words and filter out empty strings and short words
-            words = [word for word in text_clean.split() if len(word) > 2]
-
-            # Common stop words to ignore
-            stop_words = {
-                'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-                'by', 'from', 'up', 'about', 'into', 'through', 'during', 'before',
-                'after', 'above', 'below', 'between', 'among', 'through', 'during',
-                'before', 'after', 'above', 'below', 'between', 'this', 'that', 'these',
-                'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her',
-                'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their', 'am', 'is',
-                'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
-                'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might',
-                'must', 'can', 'shall', 'a', 'an'
-            }
-
-            # Filter out stop words
-            filtered_words = [word for word in words if word not in stop_words]
-
-            # Count word frequency
-            word_counts = Counter(filtered_words)
-
             # Return top N most common words
-            return word_counts.most_common(top_n)
+            return self.count_word_frequency(text).most_common(top_n)
 
         except Exception as e:
             print(f"Error during word frequency analysis: {str(e)}")
@@ -188,18 +256,7 @@ class SuspiciousPatternAnalyzer:
     def calculate_pattern_risk(self, patterns: Dict[str, List[str]]) -> int:
         """Calculate risk score based on patterns found"""
         risk_score = 0
-
-        # Risk weights for different pattern types
-        risk_weights = {
-            'emails': 5,           # Low risk - emails are common
-            'phone_numbers': 8,    # Medium risk
-            'urls': 6,             # Low-medium risk
-            'ip_addresses': 12,    # Higher risk
-            'credit_cards': 25,    # High risk - financial data
-            'ssn_numbers': 30,     # Very high risk - personal ID
-            'bitcoin_addresses': 15, # High risk - crypto related
-            'file_paths': 10       # Medium-high risk - system paths
-        }
+        risk_weights = self.RISK_WEIGHTS
 
         try:
             for pattern_type, matches in patterns.items():
@@ -218,35 +275,54 @@ class SuspiciousPatternAnalyzer:
             print(f"Error calculating pattern risk: {str(e)}")
             return 0
 
+    def combine_risk(self, patterns: Dict[str, List[str]], word_risk: int) -> int:
+        """Combine pattern risk and word risk into the final 0-100 score"""
+        # Get pattern-based risk
+        pattern_risk = self.calculate_pattern_risk(patterns)
+
+        # Combine risks (pattern risk has more weight)
+        total_risk = int(pattern_risk * 0.7 + word_risk * 0.3)
+
+        # Add bonus risk for multiple pattern types
+        pattern_types_found = sum(1 for matches in patterns.values() if matches)
+        if pattern_types_found >= 3:
+            total_risk += 15  # Bonus risk for multiple suspicious patterns
+        elif pattern_types_found >= 2:
+            total_risk += 8
+
+        # Ensure risk is between 0 and 100
+        return max(0, min(total_risk, 100))
+
+    def score_batch(self, counts, risky_words, total_words):
+        """combine_risk() for many documents at once (rows of per-category match counts)"""
+        # Imported here because scoring.py is only needed for bulk re-scoring
+        from scoring import BatchScorer
+        return BatchScorer(self.CATEGORIES, self.RISK_WEIGHTS).score(counts, risky_words, total_words)
+
     def calculate_total_risk(self, patterns: Dict[str, List[str]], text: str) -> int:
         """Calculate total risk score combining patterns and content analysis"""
         try:
-            # Get pattern-based risk
-            pattern_risk = self.calculate_pattern_risk(patterns)
-
             # Get word-based risk
             word_risk = self.sentiment_analyzer.calculate_risk_from_words(text)
 
-            # Combine risks (pattern risk has more weight)
-            total_risk = int(pattern_risk * 0.7 + word_risk * 0.3)
-
-            # Add bonus risk for multiple pattern types
-            pattern_types_found = sum(1 for matches in patterns.values() if matches)
-            if pattern_types_found >= 3:
-                total_risk += 15  # Bonus risk for multiple suspicious patterns
-            elif pattern_types_found >= 2:
-                total_risk += 8
-
-            # Ensure risk is between 0 and 100
-            return max(0, min(total_risk, 100))
+            return self.combine_risk(patterns, word_risk)
 
         except Exception as e:
             print(f"Error calculating total risk: {str(e)}")
             return 0
 
     def analyze(self, text: str) -> Dict[str, Any]:
-        """Main analysis function that returns all results"""
+        """Main analysis function that returns all results
+
+        Passing a path object (e.g. pathlib.Path) instead of a string scans
+        that file through mmap - see analyze_mapped().
+        """
+        profile = None
         try:
+            # File paths are scanned straight from disk, without decoding
+            if isinstance(text, os.PathLike):
+                return self.analyze_mapped(text)
+
             # Validate input
             if not text or not text.strip():
                 return {
@@ -256,28 +332,54 @@ class SuspiciousPatternAnalyzer:
                     'risk_score': 0
                 }
 
-            # Find suspicious patterns
-            patterns = self.find_patterns(text)
+            if self.profiler is not None:
+                profile = self.profiler.start(len(text))
 
-            # Analyze word frequency
-            frequency = self.analyze_word_frequency(text)
+            # Find suspicious patterns; each rule gets a time budget for this text
+            budget = RuleBudget()
+            patterns = self.find_patterns(text, budget)
+            if profile is not None:
+                profile.mark('find_patterns')
 
-            # Analyze sentiment
-            sentiment = self.sentiment_analyzer.analyze_sentiment(text)
+            # Tokenize once for word frequency, sentiment and word risk
+            word_counts, positive_count, negative_count, risky_count, total_words = self.word_statistics(text)
+            if profile is not None:
+                profile.mark('word_statistics')
+            frequency = word_counts.most_common(20)
+            sentiment = self.sentiment_analyzer.sentiment_from_counts(positive_count, negative_count)
 
             # Calculate risk score
-            risk_score = self.calculate_total_risk(patterns, text)
+            word_risk = self.sentiment_analyzer.risk_from_counts(risky_count, total_words)
+            risk_score = self.combine_risk(patterns, word_risk)
 
             # Return comprehensive analysis results
-            return {
+            result = {
                 'patterns': patterns,
                 'frequency': frequency,
                 'sentiment': sentiment,
                 'risk_score': risk_score
             }
 
+            # Approximate word counts may be this much below the true counts
+            if self.top_k:
+                result['frequency_error'] = word_counts.error
+
+            # Rules that hit a pathological input were switched off part-way
+            if budget.exceeded:
+                result['rules_over_budget'] = list(budget.exceeded)
+
+            if profile is not None:
+                profile.mark('risk')
+                profile.add_rules(budget)
+                profile.set_matches(patterns)
+                result['profile'] = self.profiler.record(profile)
+            return result
+
         except Exception as e:
             print(f"Error during analysis: {str(e)}")
+            if profile is not None:
+                profile.add_error('analyze', e)
+                self.profiler.record(profile)
             # Return safe default values in case of error
             return {
                 'patterns': {},
@@ -286,6 +388,68 @@ class SuspiciousPatternAnalyzer:
                 'risk_score': 0
             }
 
+    def analyze_file(self, path: str, chunk_size: int = 4 * 1024 * 1024) -> Dict[str, Any]:
+        """Analyze a file of any size by streaming it in fixed-size chunks (archives as one document)"""
+        try:
+            # Imported here because streaming.py and archives.py build on this module
+            from archives import archive_kind, scan_archive
+            if archive_kind(path):
+                return scan_archive(path, self)
+
+            from streaming import scan_file
+            return scan_file(path, self, chunk_size)
+
+        except Exception as e:
+            print(f"Error during file analysis: {str(e)}")
+            return {
+                'patterns': {},
+                'frequency': [],
+                'sentiment': 'Neutral',
+                'risk_score': 0
+            }
+
+    def analyze_mapped(self, path: str, include_offsets: bool = True) -> Dict[str, Any]:
+        """Analyze a local file through mmap; adds byte 'offsets' of every hit"""
+        try:
+            # Imported here because mmap_scanner.py builds on this module
+            from mmap_scanner import scan_mapped_file
+            return scan_mapped_file(path, self, include_offsets)
+
+        except Exception as e:
+            print(f"Error during mapped file analysis: {str(e)}")
+            return {
+                'patterns': {},
+                'frequency': [],
+                'sentiment': 'Neutral',
+                'risk_score': 0
+            }
+
+    def fingerprint(self) -> str:
+        """Hash of everything that can change a result: patterns, risk weights and word lists"""
+        sentiment_analyzer = self.sentiment_analyzer
+        state = {
+            'patterns': self.patterns.fingerprint(self.CATEGORIES),
+            'risk_weights': self.RISK_WEIGHTS,
+            'stop_words': sorted(self.STOP_WORDS),
+            'positive_words': sorted(sentiment_analyzer.positive_words),
+            'negative_words': sorted(sentiment_analyzer.negative_words),
+            'risky_words': sorted(sentiment_analyzer.risky_words)
+        }
+        # Only approximate mode changes the state, so exact-mode caches stay valid
+        if self.top_k:
+            state['top_k'] = self.top_k
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get_risk_level(self, risk_score: int) -> str:
+        """Map a 0-100 risk score to its risk level name"""
+        if risk_score >= 80:
+            return "VERY HIGH"
+        elif risk_score >= 60:
+            return "HIGH"
+        elif risk_score >= 40:
+            return "MEDIUM"
+        return "LOW"
+
     def get_analysis_summary(self, analysis_result: Dict[str, Any]) -> str:
         """Generate a human-readable summary of the analysis"""
         try:
@@ -317,6 +481,35 @@ class SuspiciousPatternAnalyzer:
             return f"Error generating summary: {str(e)}"
 
 
+def analyzer_config(analyzer: SuspiciousPatternAnalyzer) -> Dict[str, Any]:
+    """Plain-data settings from which analyzer_from_config() rebuilds an equivalent analyzer
+
+    Used to hand a caller's analyzer to worker processes (rule packs,
+    categories, risk weights and top-k; not subclass behaviour).
+    """
+    registry = analyzer.registry
+    return {
+        'packs': list(registry.packs),
+        'paths': list(registry.paths[:-1]),  # the built-in rules directory is always added back
+        'keep_invalid': registry.keep_invalid,
+        'top_k': analyzer.top_k,
+        'categories': list(analyzer.CATEGORIES),
+        'weights': dict(analyzer.RISK_WEIGHTS)
+    }
+
+
+def analyzer_from_config(config: Optional[Dict[str, Any]] = None) -> SuspiciousPatternAnalyzer:
+    """Build the analyzer described by analyzer_config() output (the default one for None)"""
+    if config is None:
+        return SuspiciousPatternAnalyzer()
+
+    registry = get_registry(config['packs'], config['paths'], config['keep_invalid'])
+    analyzer = SuspiciousPatternAnalyzer(registry, top_k=config['top_k'])
+    analyzer.CATEGORIES = config['categories']
+    analyzer.RISK_WEIGHTS = config['weights']
+    return analyzer
+
+
 # Test function for development
 def test_analyzer():
     """Test function to check if analyzer works correctly"""
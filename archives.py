@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Archive Scanner - Streams gzip, bz2, xz, zip and tar contents without extracting
+Author: Your Name
+Version: 1.0
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import tarfile
+import threading
+import zipfile
+import zlib
+from typing import Dict, List, Tuple, Any, Callable, Iterable, Iterator, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from mmap_scanner import MappedFileScanner, decode_value
+    from streaming import AnalysisAccumulator
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# Only files with one of these suffixes are sniffed for archive magic bytes
+ARCHIVE_SUFFIXES = ('.gz', '.tgz', '.bz2', '.tbz', '.tbz2', '.xz', '.txz', '.zip', '.tar')
+
+# Magic bytes of the single-stream compressors and their readers
+COMPRESSORS = [
+    (b'\x1f\x8b', 'gzip', gzip.open),
+    (b'BZh', 'bz2', bz2.open),
+    (b'\xfd7zXZ\x00', 'xz', lzma.open),
+]
+ZIP_MAGIC = (b'PK\x03\x04', b'PK\x05\x06')
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b'ustar'
+
+# Decompressed data is read in pieces of this size
+READ_SIZE = 1024 * 1024
+
+# Pieces decompressed ahead of the scanner (bounds the memory in flight)
+PREFETCH_DEPTH = 8
+
+# Nested zip archives need random access, so they are read into memory up to this size
+NESTED_ZIP_LIMIT = 64 * 1024 * 1024
+
+# Separates an archive from a member in source names: logs.tar.gz!app/server.log
+MEMBER_SEPARATOR = '!'
+
+# Callback signature: on_finding(source, category, value, start byte, end byte)
+FindingCallback = Callable[[str, str, Any, int, int], None]
+
+
+def sniff(header: bytes, name: str = '') -> Optional[str]:
+    """Archive kind of data starting with header ('gzip', 'bz2', 'xz', 'zip', 'tar') or None"""
+    for magic, kind, _ in COMPRESSORS:
+        if header.startswith(magic):
+            return kind
+    if header.startswith(ZIP_MAGIC):
+        return 'zip'
+    if header[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC or name.lower().endswith('.tar'):
+        return 'tar'
+    return None
+
+
+def archive_kind(path: str) -> Optional[str]:
+    """Archive kind of a file, judged by its magic bytes (only files with an archive suffix are opened)"""
+    if not path.lower().endswith(ARCHIVE_SUFFIXES):
+        return None
+    try:
+        with open(path, 'rb') as file:
+            return sniff(file.read(512), path)
+    except OSError:
+        return None
+
+
+def _read_chunks(stream, read_size: int = READ_SIZE) -> Iterator[bytes]:
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _seekable(stream) -> bool:
+    # Members of a streamed tar claim seekable() but fail inside it
+    try:
+        return stream.seekable()
+    except (AttributeError, OSError):
+        return False
+
+
+def iter_stream_members(source: str, stream, depth: int = 0) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """Yield (source, chunk) for the data inside a stream, and (source, None) after each member
+
+    Compression layers are transparent (they keep the source name), while
+    tar and zip members add "!member" to it. Archives nested inside
+    archives are opened the same way, so a tar of .gz logs or a zip inside
+    a tarball is read without touching the disk.
+    """
+    header = stream.peek(512)[:512] if hasattr(stream, 'peek') else b''
+    kind = sniff(header, source.rsplit(MEMBER_SEPARATOR, 1)[-1]) if depth < 8 else None
+
+    if kind in ('gzip', 'bz2', 'xz'):
+        reader = next(reader for _, name, reader in COMPRESSORS if name == kind)
+        with reader(stream) as decompressed:
+            yield from iter_stream_members(source, decompressed, depth + 1)
+        return
+
+    if kind == 'tar':
+        # Stream mode reads the members in order, with no seeking
+        with tarfile.open(fileobj=stream, mode='r|') as archive:
+            for member in archive:
+                if member.isfile():
+                    inner = archive.extractfile(member)
+                    name = member.name[2:] if member.name.startswith('./') else member.name
+                    yield from iter_stream_members(source + MEMBER_SEPARATOR + name, inner, depth + 1)
+        return
+
+    if kind == 'zip':
+        if not _seekable(stream):
+            data = stream.read(NESTED_ZIP_LIMIT + 1)
+            if len(data) > NESTED_ZIP_LIMIT:
+                raise ValueError(f"{source}: nested zip larger than {NESTED_ZIP_LIMIT} bytes")
+            stream = io.BytesIO(data)
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as inner:
+                        yield from iter_stream_members(source + MEMBER_SEPARATOR + info.filename, inner, depth + 1)
+        return
+
+    for chunk in _read_chunks(stream):
+        yield source, chunk
+    yield source, None
+
+
+def iter_archive(path: str) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """Yield (source, chunk) for every member of an archive file, (source, None) closing each one"""
+    with open(path, 'rb') as file:
+        yield from iter_stream_members(path, file)
+
+
+def prefetch(items: Iterable[Any], depth: int = PREFETCH_DEPTH) -> Iterator[Any]:
+    """Iterate `items` in a background thread, keeping up to `depth` of them ready
+
+    zlib, bz2 and lzma release the GIL while they decompress, so the next
+    pieces are inflated while the caller runs the regexes over the current
+    one. An exception in the producer is raised in the caller; stopping
+    early (closing the generator) stops the producer too.
+    """
+    ready = queue.Queue(depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except BaseException as e:
+            put((False, e))
+
+    thread = threading.Thread(target=produce, name="shadowtrace-decompress", daemon=True)
+    thread.start()
+    try:
+        while True:
+            more, item = ready.get()
+            if not more:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+class ArchiveScanner:
+    """Scans every member of compressed files and archives as it is decompressed
+
+    Each member is fed to MappedFileScanner.scan_stream(), so its result is
+    the same as scanning the extracted file, with byte offsets into the
+    member. Decompression runs one step ahead in a separate thread (see
+    prefetch()). Members are reported as "archive!member"; a plain .gz,
+    .bz2 or .xz file keeps its own name.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+                 scanner: Optional[MappedFileScanner] = None):
+        self.scanner = scanner or MappedFileScanner(analyzer)
+        self.analyzer = self.scanner.analyzer
+
+    def iter_accumulators(self, path: str, on_match: Optional[Callable[[str, str, Any, int, int], None]] = None
+                          ) -> Iterator[Tuple[str, AnalysisAccumulator]]:
+        """Yield (source, raw accumulator) per member; on_match gets (source, category, raw value, start, end)"""
+        def member_chunks():
+            # Drains the shared prefetch iterator up to the end of the current member
+            while True:
+                source, chunk = next(items)
+                if chunk is None:
+                    return
+                yield chunk
+
+        items = prefetch(iter_archive(path))
+        for source, chunk in items:
+            # One member at a time: hand its chunks (this one first) to the stream scanner
+            def stream(first=chunk):
+                if first is None:
+                    return
+                yield first
+                yield from member_chunks()
+
+            callback = None
+            if on_match is not None:
+                def callback(category, value, start, end, source=source):
+                    on_match(source, category, value, start, end)
+            yield source, self.scanner.scan_stream(stream(), callback)
+
+    def iter_results(self, path: str, on_finding: Optional[FindingCallback] = None
+                     ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (source, result) per member; on_finding gets decoded values"""
+        on_match = None
+        if on_finding is not None:
+            def on_match(source, category, value, start, end):
+                on_finding(source, category, decode_value(value), start, end)
+
+        try:
+            for source, accumulator in self.iter_accumulators(path, on_match):
+                yield source, self.scanner.decode(accumulator).result(self.analyzer)
+        except (OSError, EOFError, ValueError, tarfile.TarError, zipfile.BadZipFile, lzma.LZMAError, zlib.error) as e:
+            yield path, {'error': f"unreadable archive: {e}"}
+
+    def scan(self, path: str) -> Dict[str, Any]:
+        """One combined result for everything inside an archive, plus the member count"""
+        total = AnalysisAccumulator(self.analyzer.CATEGORIES, self.analyzer.new_word_counts())
+        members = 0
+        for _, accumulator in self.iter_accumulators(path):
+            total.merge(accumulator)
+            members += 1
+        result = self.scanner.decode(total).result(self.analyzer)
+        result['members'] = members
+        return result
+
+
+def scan_archive(path: str, analyzer: Optional[SuspiciousPatternAnalyzer] = None) -> Dict[str, Any]:
+    """Analyze all members of an archive as one document"""
+    return ArchiveScanner(analyzer).scan(path)
+
+
+def benchmark_archive(size_mb: int = 32):
+    """Scan a gzip file with and without decompressing in a separate thread"""
+    import tempfile
+    import time
+
+    try:
+        from scanner import generate_sample_log
+    except ImportError:
+        print("Error: scanner.py not found. Make sure all files are in the same directory.")
+        return
+
+    scanner = ArchiveScanner()
+    with tempfile.TemporaryDirectory() as directory:
+        plain = os.path.join(directory, 'sample.log')
+        packed = plain + '.gz'
+        data = generate_sample_log(size_mb * 1024 * 1024).encode('utf-8')
+        with open(plain, 'wb') as file:
+            file.write(data)
+        with gzip.open(packed, 'wb', compresslevel=6) as file:
+            file.write(data)
+        del data
+
+        start = time.perf_counter()
+        expected = scanner.scanner.scan(plain, include_offsets=False)
+        plain_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with gzip.open(packed, 'rb') as file:
+            inline = scanner.scanner.decode(scanner.scanner.scan_stream(_read_chunks(file))).result(scanner.analyzer)
+        inline_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        (source, threaded), = list(scanner.iter_results(packed))
+        threaded_time = time.perf_counter() - start
+
+    print(f"{size_mb} MB log, gzipped")
+    print(f"Plain file (mmap)           : {plain_time:.2f}s")
+    print(f"gzip, decompress inline     : {inline_time:.2f}s")
+    print(f"gzip, decompress in a thread: {threaded_time:.2f}s")
+    print(f"Same result as the plain file: {inline == expected and threaded == expected}")
+
+
+# Test function for development
+def test_archives():
+    """Pack a sample into gz, bz2, xz, zip, tar.gz and a zip inside a tar, and compare with the plain text"""
+    import tempfile
+
+    analyzer = SuspiciousPatternAnalyzer()
+    scanner = ArchiveScanner(analyzer)
+    test_text = """Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+My credit card number is 4532-0151-1283-0366. Please transfer money to my
+Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+You can visit https://example.com for more info.
+""" * 50
+    data = test_text.encode('utf-8')
+    expected = analyzer.analyze(test_text)
+    expected_two = analyzer.analyze('mail jane@example.org')
+
+    with tempfile.TemporaryDirectory() as directory:
+        def path(name):
+            return os.path.join(directory, name)
+
+        with gzip.open(path('app.log.gz'), 'wb') as file:
+            file.write(data)
+        with bz2.open(path('app.log.bz2'), 'wb') as file:
+            file.write(data)
+        with lzma.open(path('app.log.xz'), 'wb') as file:
+            file.write(data)
+        with zipfile.ZipFile(path('logs.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('one.log', data)
+            archive.writestr('two.log', b'mail jane@example.org')
+        with tarfile.open(path('logs.tar.gz'), 'w:gz') as archive:
+            for name in ('app.log.gz', 'logs.zip'):
+                archive.add(path(name), arcname='nested/' + name)
+
+        print("Archive Scanner Test Results:")
+        print("=============================")
+        for name in ('app.log.gz', 'app.log.bz2', 'app.log.xz', 'logs.zip', 'logs.tar.gz'):
+            findings = []
+            for source, result in scanner.iter_results(path(name), lambda *finding: findings.append(finding)):
+                wanted = expected_two if source.endswith('two.log') else expected
+                same = all(result[key] == wanted[key] for key in wanted)
+                print(f"  {os.path.relpath(source, directory)}: kind {archive_kind(path(name))}, "
+                      f"risk {result.get('risk_score')}%, same as plain text: {same}")
+            first = findings[0]
+            print(f"    {len(findings)} findings, first: {os.path.relpath(first[0], directory)}:{first[3]} "
+                  f"{first[1]} {first[2]!r}")
+
+        with open(path('broken.gz'), 'wb') as file:
+            file.write(gzip.compress(data)[:200])
+        print(f"  broken.gz: {list(scanner.iter_results(path('broken.gz')))[-1][1]}")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        benchmark_archive(int(sys.argv[1]))
+    else:
+        test_archives()
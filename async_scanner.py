@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Async Scanner - Non-blocking analysis API for asyncio services
+Author: Your Name
+Version: 1.0
+"""
+
+import asyncio
+import codecs
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer, analyzer_config, analyzer_from_config
+    from rules import get_registry
+    from streaming import ChunkedScanner
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# Stream bytes are gathered into blocks of this size before each scan step
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+# Documents allowed in flight (queued or running) per worker before callers wait
+PENDING_PER_WORKER = 4
+
+# Per-process analyzer, built once by the pool initializer
+_worker_analyzer = None
+
+
+def _init_worker(config: Optional[Dict[str, Any]] = None):
+    """Build the analyzer (rule packs, weights, top-k) and compile its patterns once per worker process"""
+    global _worker_analyzer
+    _worker_analyzer = analyzer_from_config(config)
+    _worker_analyzer.scanner
+
+
+def _analyze_in_worker(text: str) -> Dict[str, Any]:
+    """Worker task: analyze one document"""
+    analyzer = _worker_analyzer or SuspiciousPatternAnalyzer()
+    return analyzer.analyze(text)
+
+
+class AsyncAnalyzer:
+    """asyncio front end for SuspiciousPatternAnalyzer
+
+    Regex work never runs on the event loop. Whole documents go to a
+    bounded executor: processes by default, because the scan is CPU-bound
+    and holds the GIL. Threads are an option for tiny documents, where
+    pickling would cost more than the scan.
+
+    Worker processes rebuild the analyzer from analyzer_config(): the same
+    rule packs, categories, risk weights and top-k setting. An analyzer
+    subclass cannot be rebuilt that way, so it always runs on threads.
+
+    A semaphore caps the number of documents in flight. Once it is full,
+    analyze() waits before submitting, so a burst of requests slows the
+    producers down instead of growing an unbounded queue.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None, workers: Optional[int] = None,
+                 max_pending: Optional[int] = None, use_processes: bool = True):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * PENDING_PER_WORKER
+        self.use_processes = use_processes and type(self.analyzer) is SuspiciousPatternAnalyzer
+
+        if self.use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(analyzer_config(self.analyzer),))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        # Streams keep their scanner state in this process, so they always use threads
+        self.stream_executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.semaphore = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        """The in-flight limit (created lazily so it binds to the running loop)"""
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_pending)
+        return self.semaphore
+
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        """Analyze one document without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        async with self._slots():
+            if self.use_processes:
+                return await loop.run_in_executor(self.executor, _analyze_in_worker, text)
+            return await loop.run_in_executor(self.executor, self.analyzer.analyze, text)
+
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze several documents concurrently; results come back in input order"""
+        return await asyncio.gather(*(self.analyze(text) for text in texts))
+
+    async def analyze_stream(self, stream, block_size: int = STREAM_BLOCK_SIZE) -> Dict[str, Any]:
+        """Analyze an async byte stream (async iterator of bytes, or anything with `await read(n)`)
+
+        The next bytes are only requested after the previous block was
+        scanned, so a slow scan throttles the stream instead of buffering it.
+        """
+        loop = asyncio.get_running_loop()
+        scanner = ChunkedScanner(self.analyzer)
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        pending = []
+        pending_bytes = 0
+
+        async with self._slots():
+            async for data in _iter_stream(stream, block_size):
+                pending.append(data)
+                pending_bytes += len(data)
+                if pending_bytes < block_size:
+                    continue
+
+                text = decoder.decode(b''.join(pending))
+                pending, pending_bytes = [], 0
+                await loop.run_in_executor(self.stream_executor, scanner.feed, text)
+
+            text = decoder.decode(b''.join(pending), final=True)
+            await loop.run_in_executor(self.stream_executor, scanner.feed, text)
+            return await loop.run_in_executor(self.stream_executor, scanner.finish)
+
+    def close(self):
+        """Shut down the worker pools"""
+        self.executor.shutdown(wait=True)
+        self.stream_executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.close)
+
+
+async def _iter_stream(stream, block_size: int):
+    """Yield byte chunks from an async iterator or an object with an async read()"""
+    if hasattr(stream, 'read'):
+        while True:
+            data = await stream.read(block_size)
+            if not data:
+                break
+            yield data
+    else:
+        async for data in stream:
+            if data:
+                yield data
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+async def _measure(async_analyzer: AsyncAnalyzer, documents: List[str], concurrency: int) -> Dict[str, Any]:
+    """Run documents through the analyzer with `concurrency` clients; collect latencies and loop lag"""
+    latencies = []
+    lags = []
+    queue = asyncio.Queue()
+    for document in documents:
+        queue.put_nowait(document)
+
+    async def client():
+        while not queue.empty():
+            document = queue.get_nowait()
+            start = time.perf_counter()
+            await async_analyzer.analyze(document)
+            latencies.append(time.perf_counter() - start)
+
+    async def heartbeat():
+        # A blocked event loop shows up as a late wake-up
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - start - 0.01)
+
+    ticker = asyncio.ensure_future(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+
+    return {
+        'documents': len(documents),
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 3),
+        'docs_per_second': round(len(documents) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'max_loop_lag_ms': round(max(lags, default=0.0) * 1000, 2)
+    }
+
+
+def benchmark_async(documents: int = 400, document_size: int = 64 * 1024, concurrency: int = 32,
+                    workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """p50/p99 latency and event-loop lag under concurrent load, for processes and threads"""
+    from scanner import generate_sample_log
+
+    corpus = generate_sample_log(document_size * 16)
+    texts = [corpus[(n % 16) * document_size:(n % 16 + 1) * document_size] for n in range(documents)]
+    reports = []
+
+    async def run(use_processes: bool):
+        async with AsyncAnalyzer(workers=workers, use_processes=use_processes) as async_analyzer:
+            # Warm up the pool so start-up cost is not counted as latency
+            await async_analyzer.analyze_many(texts[:async_analyzer.workers])
+            report = await _measure(async_analyzer, texts, concurrency)
+        report['executor'] = 'processes' if use_processes else 'threads'
+        report['workers'] = async_analyzer.workers
+        return report
+
+    for use_processes in (True, False):
+        reports.append(asyncio.run(run(use_processes)))
+
+    for report in reports:
+        print(f"{report['executor']:>9}: {report['docs_per_second']} docs/s, "
+              f"p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, "
+              f"max loop lag {report['max_loop_lag_ms']} ms")
+    return reports
+
+
+# Test function for development
+def test_async_scanner():
+    """Check async results against analyze() and run a small load benchmark"""
+    analyzer = SuspiciousPatternAnalyzer()
+    test_text = """
+    Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+    My credit card number is 4532-1234-5678-9012. Please transfer money to my
+    Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+    You can visit https://example.com for more info.
+    """ * 50
+    expected = analyzer.analyze(test_text)
+
+    async def byte_stream():
+        data = test_text.encode('utf-8')
+        for index in range(0, len(data), 1000):
+            await asyncio.sleep(0)
+            yield data[index:index + 1000]
+
+    async def run():
+        async with AsyncAnalyzer(analyzer, workers=2) as async_analyzer:
+            results = await async_analyzer.analyze_many([test_text] * 8)
+            streamed = await async_analyzer.analyze_stream(byte_stream(), block_size=4096)
+        return results, streamed
+
+    # Worker processes must use the caller's rule set and weights, not the defaults
+    custom = SuspiciousPatternAnalyzer(get_registry(['core'], keep_invalid=True))
+    custom.RISK_WEIGHTS['emails'] = 90
+    custom_expected = custom.analyze(test_text)
+
+    async def run_custom():
+        async with AsyncAnalyzer(custom, workers=2) as async_analyzer:
+            return await async_analyzer.analyze(test_text)
+
+    results, streamed = asyncio.run(run())
+    custom_result = asyncio.run(run_custom())
+
+    print("Async Scanner Test Results:")
+    print("===========================")
+    print(f"Concurrent results identical: {all(result == expected for result in results)}")
+    print(f"Stream result identical: {streamed == expected}")
+    print(f"Custom analyzer in processes identical: {custom_result == custom_expected}")
+    benchmark_async(documents=200, concurrency=16)
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_async_scanner()
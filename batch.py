@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Batch Scanner - Multiprocess sweeps over whole directory trees
+Author: Your Name
+Version: 1.0
+"""
+
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple, Any, Callable, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer, analyzer_config, analyzer_from_config
+    from archives import ArchiveScanner, archive_kind
+    from filetypes import DEFAULT_POLICY, FileTypeStats, action_for, scan_strings, sniff_file
+    from mmap_scanner import MappedFileScanner, decode_value
+    from streaming import AnalysisAccumulator
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# Files bigger than SPLIT_SIZE are cut into byte ranges of about RANGE_SIZE
+SPLIT_SIZE = 64 * 1024 * 1024
+RANGE_SIZE = 32 * 1024 * 1024
+
+# Bytes searched past each range edge so boundary-spanning matches are seen whole
+RANGE_OVERLAP = 64 * 1024
+
+# Small files are bundled into tasks of roughly this many bytes (or files)
+BUNDLE_SIZE = 8 * 1024 * 1024
+BUNDLE_FILES = 64
+
+# One unit of work: (path, start byte, end byte)
+Piece = Tuple[str, int, int]
+
+# Start byte marking a piece as a whole archive, scanned member by member
+ARCHIVE_START = -1
+
+# Start byte marking a piece as a whole binary, of which only the printable strings are scanned
+STRINGS_START = -2
+
+# One hit sent back from a worker: (category, decoded value, start byte, end byte)
+Hit = Tuple[str, Any, int, int]
+
+# Callback signature: on_finding(path, category, value, start byte, end byte)
+FindingCallback = Callable[[str, str, Any, int, int], None]
+
+# Per-process scanner, built once by the pool initializer
+_worker_scanner = None
+
+
+def _init_worker(config: Optional[Dict[str, Any]] = None):
+    """Build the (compiled) scanner for the caller's analyzer settings once per worker process"""
+    global _worker_scanner
+    _worker_scanner = MappedFileScanner(analyzer_from_config(config))
+
+
+def _scan_pieces(pieces: List[Piece], overlap: int, findings: bool = False
+                 ) -> List[Tuple[str, int, Optional[AnalysisAccumulator], Optional[str], Optional[List[Hit]]]]:
+    """Worker task: scan a list of file pieces and return raw accumulators (and every hit, if asked)"""
+    scanner = _worker_scanner or MappedFileScanner()
+    results = []
+
+    for path, start, end in pieces:
+        if start == ARCHIVE_START:
+            results.extend(_scan_archive(scanner, path, findings))
+            continue
+
+        hits = [] if findings else None
+        on_match = None
+        if findings:
+            def on_match(category, value, match_start, match_end, hits=hits):
+                hits.append((category, decode_value(value), match_start, match_end))
+        try:
+            if start == STRINGS_START:
+                accumulator = scan_strings(scanner, path, on_match)
+            else:
+                with open(path, 'rb') as file:
+                    if end == 0:
+                        accumulator = AnalysisAccumulator(scanner.analyzer.CATEGORIES,
+                                                          scanner.analyzer.new_word_counts())
+                    else:
+                        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                            accumulator = scanner.scan_range(data, start, min(end, len(data)), overlap,
+                                                             on_match=on_match)
+            results.append((path, start, accumulator, None, hits))
+        except Exception as e:
+            results.append((path, start, None, str(e), None))
+
+    return results
+
+
+def _scan_archive(scanner: MappedFileScanner, path: str, findings: bool
+                  ) -> List[Tuple[str, int, Optional[AnalysisAccumulator], Optional[str], Optional[List[Hit]]]]:
+    """Scan every member of an archive; each member comes back as a one-piece file named archive!member"""
+    hits = {}
+    on_match = None
+    if findings:
+        def on_match(source, category, value, match_start, match_end):
+            hits.setdefault(source, []).append((category, decode_value(value), match_start, match_end))
+
+    results = []
+    try:
+        for source, accumulator in ArchiveScanner(scanner=scanner).iter_accumulators(path, on_match):
+            results.append((source, 0, accumulator, None, hits.pop(source, []) if findings else None))
+    except Exception as e:
+        results.append((path, 0, None, f"unreadable archive: {e}", None))
+    return results
+
+
+def walk_files(root: str) -> Iterable[Tuple[str, int]]:
+    """Yield (path, size) for every regular file under root (or root itself)"""
+    if os.path.isfile(root):
+        yield root, os.path.getsize(root)
+        return
+
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                if os.path.isfile(path) and not os.path.islink(path):
+                    yield path, os.path.getsize(path)
+            except OSError:
+                continue
+
+
+def split_file(path: str, size: int, range_size: int = RANGE_SIZE) -> List[Piece]:
+    """Cut a big file into byte ranges that each end on a newline"""
+    if size <= range_size:
+        return [(path, 0, size)]
+
+    pieces = []
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                end = data.find(b'\n', start + range_size)
+                end = size if end == -1 else end + 1
+                pieces.append((path, start, end))
+                start = end
+
+    return pieces
+
+
+class CorpusScanner:
+    """Sweeps a directory tree with a pool of analyzer processes
+
+    Files are turned into tasks up front: huge files become several byte
+    ranges, tiny files are bundled together. Tasks are submitted largest
+    first and idle workers simply pull the next one from the pool's queue,
+    so one giant file never leaves the other cores waiting. Compressed
+    files and archives are one task each, and every member is reported as
+    a file of its own ("archive!member").
+
+    Every other file is sniffed first (see filetypes.py): the policy decides
+    whether binaries and compressed data are skipped, reduced to their
+    printable strings or scanned like text, and self.file_types counts the
+    files and bytes that went each way.
+
+    Worker processes rebuild the given analyzer from analyzer_config(), so
+    its rule packs, categories, risk weights and top-k setting all apply.
+    """
+
+    def __init__(self, workers: Optional[int] = None, split_size: int = SPLIT_SIZE,
+                 range_size: int = RANGE_SIZE, overlap: int = RANGE_OVERLAP, cache=None,
+                 policy: str = DEFAULT_POLICY, analyzer: Optional[SuspiciousPatternAnalyzer] = None):
+        # Workers rebuild the analyzer from analyzer_config(), which cannot carry subclass behaviour
+        if analyzer is not None and type(analyzer) is not SuspiciousPatternAnalyzer:
+            raise ValueError("CorpusScanner needs a plain SuspiciousPatternAnalyzer (workers rebuild it "
+                             "from its rule packs and settings)")
+        self.workers = workers or os.cpu_count() or 1
+        self.split_size = split_size
+        self.range_size = range_size
+        self.overlap = overlap
+        self.cache = cache
+        self.policy = policy
+        self.scanner = MappedFileScanner(analyzer)
+
+        # Filled by plan(): cache hits and the content hashes of cache misses
+        self.cached_entries = {}
+        self.content_hashes = {}
+
+        # Files and bytes per file type and action, counted by plan()
+        self.file_types = FileTypeStats()
+
+        # Corpus summary of the last finished scan
+        self.summary = None
+
+    def plan(self, root: str, use_cache: bool = True) -> Tuple[List[List[Piece]], Dict[str, int]]:
+        """Build the task list and the number of pieces expected per file"""
+        tasks = []
+        piece_counts = {}
+        bundle = []
+        bundle_bytes = 0
+
+        self.cached_entries = {}
+        self.content_hashes = {}
+        self.file_types = FileTypeStats()
+
+        for path, size in walk_files(root):
+            # Archives are one task each; their members become results of their own
+            if archive_kind(path):
+                self.file_types.add('archive', 'unpack', size)
+                tasks.append([(path, ARCHIVE_START, size)])
+                continue
+
+            # Binaries and compressed data are skipped or reduced to strings, depending on the policy
+            try:
+                kind, _ = sniff_file(path)
+            except OSError:
+                kind = 'text'    # scanned anyway, so the read error is reported
+            action = action_for(kind, self.policy)
+            self.file_types.add(kind, action, size)
+            if action == 'skip':
+                continue
+            if action == 'strings':
+                piece_counts[path] = 1
+                tasks.append([(path, STRINGS_START, size)])
+                continue
+
+            # Unchanged files are answered from the result cache
+            if self.cache is not None and use_cache:
+                try:
+                    entry, content_hash = self.cache.lookup_file(path)
+                except OSError:
+                    entry, content_hash = None, None
+                # Corpus merging needs the word totals stored alongside the result
+                if entry is not None and entry.get('totals') is not None:
+                    self.cached_entries[path] = entry
+                    continue
+                self.content_hashes[path] = content_hash
+
+            if size > self.split_size:
+                try:
+                    pieces = split_file(path, size, self.range_size)
+                except OSError:
+                    pieces = [(path, 0, size)]
+                piece_counts[path] = len(pieces)
+                tasks.extend([piece] for piece in pieces)
+                continue
+
+            piece_counts[path] = 1
+            bundle.append((path, 0, size))
+            bundle_bytes += size
+            if bundle_bytes >= BUNDLE_SIZE or len(bundle) >= BUNDLE_FILES:
+                tasks.append(bundle)
+                bundle = []
+                bundle_bytes = 0
+
+        if bundle:
+            tasks.append(bundle)
+
+        # Biggest tasks first keeps the tail of the sweep short
+        tasks.sort(key=lambda task: sum(end - start for _, start, end in task), reverse=True)
+        return tasks, piece_counts
+
+    def scan(self, root: str) -> Dict[str, Any]:
+        """Scan every file under root; returns per-file results and a corpus summary"""
+        file_results = {}
+        errors = {}
+        for path, result, error in self.iter_scan(root):
+            if error is not None:
+                errors[path] = error
+            else:
+                file_results[path] = result
+
+        return {
+            'files': file_results,
+            'errors': errors,
+            'summary': self.summary
+        }
+
+    def iter_scan(self, root: str, on_finding: Optional[FindingCallback] = None
+                  ) -> Iterable[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+        """Yield (path, result, error) for every file under root as soon as it is finished
+
+        Only risk scores are kept for the corpus summary, which is stored in
+        self.summary once the generator is exhausted. With on_finding every
+        hit is passed to it (byte offsets into the file) as worker results
+        arrive; the cache is not used then, because it stores no hits.
+        """
+        start_time = time.perf_counter()
+        findings = on_finding is not None
+        tasks, piece_counts = self.plan(root, use_cache=not findings)
+
+        pending = {}         # path -> {range start: accumulator}
+        failed = set()
+        scores = {}
+        corpus = AnalysisAccumulator(self.scanner.analyzer.CATEGORIES, self.scanner.analyzer.new_word_counts())
+        self.summary = None
+
+        for path, entry in self.cached_entries.items():
+            scores[path] = entry['result']['risk_score']
+            corpus.merge_result(entry['result'], entry['totals'])
+            yield path, entry['result'], None
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(analyzer_config(self.scanner.analyzer),)) as pool:
+            futures = [pool.submit(_scan_pieces, task, self.overlap, findings) for task in tasks]
+
+            for future in as_completed(futures):
+                for path, start, accumulator, error, hits in future.result():
+                    if error is not None:
+                        if path not in failed:
+                            failed.add(path)
+                            pending.pop(path, None)
+                            yield path, None, error
+                        continue
+                    if path in failed:
+                        continue
+
+                    for category, value, match_start, match_end in hits or ():
+                        on_finding(path, category, value, match_start, match_end)
+
+                    parts = pending.setdefault(path, {})
+                    parts[start] = accumulator
+                    if len(parts) < piece_counts.get(path, 1):
+                        continue
+
+                    # All ranges are in - merge them in file order
+                    del pending[path]
+                    merged = AnalysisAccumulator(self.scanner.analyzer.CATEGORIES,
+                                                 self.scanner.analyzer.new_word_counts())
+                    for range_start in sorted(parts):
+                        merged.merge(parts[range_start])
+
+                    self.scanner.decode(merged)
+                    result = merged.result(self.scanner.analyzer)
+                    scores[path] = result['risk_score']
+                    corpus.merge(merged)
+
+                    if self.cache is not None and self.content_hashes.get(path):
+                        self.cache.put(self.content_hashes[path], result, merged.word_totals())
+                    yield path, result, None
+
+        # Files that lost a range to an error have no complete result
+        for path in pending:
+            yield path, None, "incomplete scan"
+
+        elapsed = time.perf_counter() - start_time
+        self.summary = self.summarize(scores, corpus, elapsed)
+
+    def summarize(self, file_scores: Dict[str, int], corpus: AnalysisAccumulator,
+                  elapsed: float) -> Dict[str, Any]:
+        """Build the corpus-level risk summary from the risk score of every file"""
+        analyzer = self.scanner.analyzer
+        scores = list(file_scores.values())
+
+        risk_levels = {'VERY HIGH': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        for score in scores:
+            risk_levels[analyzer.get_risk_level(score)] += 1
+
+        ranked = sorted(file_scores.items(), key=lambda item: item[1], reverse=True)
+        corpus_result = corpus.result(analyzer)
+        megabytes = corpus.chars_scanned / (1024 * 1024)
+
+        return {
+            'files_scanned': len(file_scores),
+            'bytes_scanned': corpus.chars_scanned,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_mb_s': round(megabytes / elapsed, 2) if elapsed > 0 else 0.0,
+            'workers': self.workers,
+            'cached_files': len(self.cached_entries),
+            'file_types': self.file_types.to_dict(),
+            'risk_levels': risk_levels,
+            'max_risk_score': max(scores) if scores else 0,
+            'average_risk_score': round(sum(scores) / len(scores), 1) if scores else 0.0,
+            'top_risky_files': ranked[:10],
+            'corpus_risk_score': corpus_result['risk_score'],
+            'corpus_sentiment': corpus_result['sentiment'],
+            'pattern_counts': {category: len(matches) for category, matches in corpus_result['patterns'].items()},
+            'top_words': corpus_result['frequency'][:10]
+        }
+
+
+def scan_directory(root: str, workers: Optional[int] = None,
+                   analyzer: Optional[SuspiciousPatternAnalyzer] = None) -> Dict[str, Any]:
+    """Scan a whole directory tree with a process pool"""
+    return CorpusScanner(workers, analyzer=analyzer).scan(root)
+
+
+# Test function for development
+def test_batch():
+    """Sweep a temporary tree and compare against single-file analysis"""
+    import shutil
+    import tempfile
+    from rules import get_registry
+
+    analyzer = SuspiciousPatternAnalyzer()
+    root = tempfile.mkdtemp(prefix='shadowtrace_')
+
+    try:
+        line = "user john{n}@example.com paid with 4532-1234-5678-9012 from 10.0.0.{n}\n"
+        for n in range(20):
+            with open(os.path.join(root, f"log_{n}.txt"), 'w') as file:
+                file.write(line.format(n=n) * (n + 1))
+
+        # A "huge" file split into many small ranges
+        big_path = os.path.join(root, "big.log")
+        with open(big_path, 'w') as file:
+            for n in range(5000):
+                file.write(line.format(n=n % 250))
+
+        # A binary with a string inside; skipped by default
+        with open(os.path.join(root, "tool.bin"), 'wb') as file:
+            file.write(b'\x7fELF\x02\x01' + b'\x00' * 64 + b'admin@example.com\x00' + b'\x90' * 64)
+
+        scanner = CorpusScanner(workers=2, split_size=4096, range_size=4096, overlap=256)
+        results = scanner.scan(root)
+
+        same = all(
+            result == analyzer.analyze_mapped(path, include_offsets=False)
+            for path, result in results['files'].items()
+        )
+
+        print("Batch Scanner Test Results:")
+        print("===========================")
+        print(f"Files scanned: {results['summary']['files_scanned']}")
+        print(f"Matches single-file analysis: {same}")
+        print(f"Corpus risk score: {results['summary']['corpus_risk_score']}%")
+        print(f"Pattern counts: {results['summary']['pattern_counts']}")
+        print(f"File types: {scanner.file_types.describe()}")
+
+        # Workers must use the caller's rule set and weights, not the defaults
+        custom = SuspiciousPatternAnalyzer(get_registry(['core'], keep_invalid=True))
+        custom.RISK_WEIGHTS['emails'] = 90
+        custom_results = CorpusScanner(workers=2, split_size=4096, range_size=4096, overlap=256,
+                                       analyzer=custom).scan(root)
+        same = all(
+            result == custom.analyze_mapped(path, include_offsets=False)
+            for path, result in custom_results['files'].items()
+        )
+        print(f"Custom analyzer matches single-file analysis: {same}")
+
+    finally:
+        shutil.rmtree(root)
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_batch()
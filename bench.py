@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Benchmark Suite - Seeded synthetic corpora and per-stage timings as JSON
+Author: Your Name
+Version: 1.0
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Any, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    sys.exit(1)
+
+# resource is Unix-only - without it peak RSS is reported as null
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Bumped whenever the report layout changes, so old reports are not misread
+REPORT_FORMAT = 1
+
+# Probability that a corpus line carries one entity of each category
+DEFAULT_DENSITY = {
+    'emails': 0.02,
+    'phone_numbers': 0.01,
+    'credit_cards': 0.005,
+    'ssn_numbers': 0.005,
+    'urls': 0.02,
+    'ip_addresses': 0.02,
+    'bitcoin_addresses': 0.002,
+    'file_paths': 0.01,
+    'mac_addresses': 0.005,
+    'api_keys': 0.002,
+    'aws_keys': 0.002,
+    'passwords': 0.002,
+}
+
+# Filler vocabulary, with some sentiment and risk words so those stages have work to do
+FILLER_WORDS = ("request served user login failed connection closed from host in ms cache miss "
+                "retry worker started stopped queue job done error warning good great thanks "
+                "problem slow broken secret private confidential account transfer").split()
+
+SIZE_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+DEFAULT_SIZES = "1KB,1MB,16MB"
+
+
+def parse_size(text: str) -> int:
+    """'64KB' / '1GB' / '4096' -> bytes"""
+    text = text.strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    """Bytes -> the largest whole unit, e.g. 1048576 -> '1MB'"""
+    for unit in ('GB', 'MB', 'KB'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def parse_density(text: str) -> Dict[str, float]:
+    """'0.05' scales every category, 'emails=0.1,aws_keys=0' sets single ones"""
+    density = dict(DEFAULT_DENSITY)
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        if '=' not in item:
+            density = {category: float(item) for category in density}
+            continue
+        category, value = item.split('=', 1)
+        if category not in density:
+            raise ValueError(f"unknown category '{category}' (choose from {', '.join(density)})")
+        density[category] = float(value)
+    return density
+
+
+def _card_number(rng: random.Random) -> str:
+    """16-digit number that passes the Luhn check"""
+    digits = [4] + [rng.randint(0, 9) for _ in range(14)]
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        if index % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    digits.append((10 - total % 10) % 10)
+    text = ''.join(map(str, digits))
+    return '-'.join(text[i:i + 4] for i in range(0, 16, 4))
+
+
+def _ssn(rng: random.Random) -> str:
+    """SSN that passes the issuance rules (no 000/666/9xx area, 00 group, 0000 serial)"""
+    area = rng.choice((rng.randint(1, 665), rng.randint(667, 899)))
+    return f"{area:03d}-{rng.randint(1, 99):02d}-{rng.randint(1, 9999):04d}"
+
+
+def _token(rng: random.Random, length: int, alphabet: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz0123456789") -> str:
+    """Random string of `length` characters from `alphabet`"""
+    return ''.join(rng.choices(alphabet, k=length))
+
+
+# One generator per category: (rng, line number) -> text containing one entity
+ENTITY_GENERATORS = {
+    'emails': lambda rng, n: f"contact {_token(rng, 6).lower()}.{n}@example.com",
+    'phone_numbers': lambda rng, n: f"call ({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}",
+    'credit_cards': lambda rng, n: f"card {_card_number(rng)}",
+    'ssn_numbers': lambda rng, n: f"ssn {_ssn(rng)}",
+    'urls': lambda rng, n: f"GET https://example.com/api/v1/items/{n}?page={rng.randint(1, 9)}",
+    'ip_addresses': lambda rng, n: f"client 10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+    'bitcoin_addresses': lambda rng, n: f"wallet 1{_token(rng, 33, '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz')}",
+    'file_paths': lambda rng, n: f"open /var/log/app/worker-{n}.log",
+    'mac_addresses': lambda rng, n: "nic " + ':'.join(f"{rng.randint(0, 255):02x}" for _ in range(6)),
+    'api_keys': lambda rng, n: f"api_key={_token(rng, 32)}",
+    'aws_keys': lambda rng, n: f"key AKIA{_token(rng, 16, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567')}",
+    'passwords': lambda rng, n: f"password={_token(rng, 12)}",
+}
+
+
+def iter_corpus(size_bytes: int, seed: int = 0, density: Optional[Dict[str, float]] = None,
+                planted: Optional[Dict[str, int]] = None) -> Iterable[str]:
+    """Yield newline-terminated log lines until about size_bytes (ASCII, so chars == bytes)
+
+    The same seed and density always give the same text. Pass a dict as
+    `planted` to get the number of entities inserted per category.
+    """
+    rng = random.Random(seed)
+    density = DEFAULT_DENSITY if density is None else density
+    entities = [(category, rate, ENTITY_GENERATORS[category]) for category, rate in density.items() if rate > 0]
+    size = 0
+    n = 0
+
+    while size < size_bytes:
+        line = "2024-03-%02d 12:%02d:%02d INFO %s" % (
+            n % 28 + 1, n % 60, (n * 7) % 60, ' '.join(rng.choices(FILLER_WORDS, k=10)))
+        for category, rate, generate in entities:
+            if rng.random() < rate:
+                line += ' ' + generate(rng, n)
+                if planted is not None:
+                    planted[category] = planted.get(category, 0) + 1
+        line += '\n'
+        yield line
+        size += len(line)
+        n += 1
+
+
+def generate_corpus(size_bytes: int, seed: int = 0, density: Optional[Dict[str, float]] = None,
+                    planted: Optional[Dict[str, int]] = None) -> str:
+    """The whole iter_corpus() text as one string"""
+    return ''.join(iter_corpus(size_bytes, seed, density, planted))
+
+
+def write_corpus(path: str, size_bytes: int, seed: int = 0, density: Optional[Dict[str, float]] = None) -> Dict[str, int]:
+    """Write a corpus to a file without holding it in memory; returns the planted counts"""
+    planted = {}
+    with open(path, 'w', encoding='ascii') as file:
+        file.writelines(iter_corpus(size_bytes, seed, density, planted))
+    return planted
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS mark so the next stage is measured on its own (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None when it can't be read"""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB everywhere else
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def time_stage(function, size_bytes: int, repeat: int = 1) -> Dict[str, Any]:
+    """Best-of-repeat wall time, throughput and peak RSS of one call"""
+    best = None
+    for _ in range(max(repeat, 1)):
+        reset_peak_rss()
+        start = time.perf_counter()
+        value = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    megabytes = size_bytes / (1024 * 1024)
+    return {
+        'seconds': round(best, 6),
+        'mb_per_s': round(megabytes / best, 2) if best > 0 else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }, value
+
+
+def benchmark_size(analyzer: SuspiciousPatternAnalyzer, size_bytes: int, seed: int = 0,
+                   density: Optional[Dict[str, float]] = None, repeat: int = 1) -> Dict[str, Any]:
+    """Generate one corpus and time every analysis stage on it separately"""
+    stages = {}
+    planted = {}
+
+    stages['generate'], text = time_stage(lambda: generate_corpus(size_bytes, seed, density, planted), size_bytes)
+    stages['find_patterns'], patterns = time_stage(lambda: analyzer.find_patterns(text), size_bytes, repeat)
+    stages['word_frequency'], _ = time_stage(lambda: analyzer.analyze_word_frequency(text), size_bytes, repeat)
+    stages['sentiment'], sentiment = time_stage(
+        lambda: analyzer.sentiment_analyzer.analyze_sentiment(text), size_bytes, repeat)
+    stages['risk'], risk_score = time_stage(lambda: analyzer.calculate_total_risk(patterns, text), size_bytes, repeat)
+    stages['analyze'], _ = time_stage(lambda: analyzer.analyze(text), size_bytes, repeat)
+
+    return {
+        'size': format_size(size_bytes),
+        'size_bytes': len(text),
+        'stages': stages,
+        'planted': planted,
+        'found': {category: len(matches) for category, matches in patterns.items()},
+        'sentiment': sentiment,
+        'risk_score': risk_score,
+    }
+
+
+def run_suite(sizes: List[int], seed: int = 0, density: Optional[Dict[str, float]] = None,
+              repeat: int = 1) -> Dict[str, Any]:
+    """Benchmark every size and return the JSON-ready report"""
+    analyzer = SuspiciousPatternAnalyzer()
+    density = DEFAULT_DENSITY if density is None else density
+
+    # Compile the rules outside the timings
+    analyzer.find_patterns("warm up test@example.com")
+
+    report = {
+        'format': REPORT_FORMAT,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rules': analyzer.fingerprint(),
+        'seed': seed,
+        'repeat': repeat,
+        'density': density,
+        'peak_rss_per_stage': reset_peak_rss(),
+        'results': [],
+    }
+    for size in sizes:
+        report['results'].append(benchmark_size(analyzer, size, seed, density, repeat))
+    return report
+
+
+def compare_reports(old: Dict[str, Any], new: Dict[str, Any], tolerance: float = 0.10) -> List[str]:
+    """Stages that got more than `tolerance` slower (by MB/s) between two reports
+
+    Only reports of the same corpus (seed and density) are comparable; the
+    corpus generator itself is not checked.
+    """
+    if old.get('format') != new.get('format'):
+        return [f"report format {old.get('format')} cannot be compared with {new.get('format')}"]
+    if (old.get('seed'), old.get('density')) != (new.get('seed'), new.get('density')):
+        return ["reports use different corpora (seed or density differ)"]
+
+    old_results = {result['size']: result for result in old.get('results', [])}
+    regressions = []
+
+    for result in new.get('results', []):
+        previous = old_results.get(result['size'])
+        if previous is None:
+            continue
+        for stage, numbers in result['stages'].items():
+            if stage == 'generate':
+                continue
+            before = previous['stages'].get(stage, {}).get('mb_per_s')
+            after = numbers.get('mb_per_s')
+            if before and after and after < before * (1 - tolerance):
+                regressions.append(f"{result['size']} {stage}: {before} -> {after} MB/s "
+                                   f"({(after / before - 1) * 100:+.1f}%)")
+        if previous.get('found') != result.get('found'):
+            regressions.append(f"{result['size']}: pattern counts changed {previous.get('found')} -> {result.get('found')}")
+    return regressions
+
+
+def print_summary(report: Dict[str, Any]):
+    """Human-readable table of a report, on stderr so stdout stays pure JSON"""
+    for result in report['results']:
+        print(f"{result['size']:>6}:", file=sys.stderr)
+        for stage, numbers in result['stages'].items():
+            rss = numbers['peak_rss_mb']
+            print(f"  {stage:<15}{numbers['seconds']:>10.3f}s {numbers['mb_per_s'] or 0:>9.1f} MB/s"
+                  f"  peak {'n/a' if rss is None else f'{rss} MB'}", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options of the benchmark suite"""
+    parser = argparse.ArgumentParser(
+        prog="bench.py",
+        description="Time each ShadowTrace stage on seeded synthetic corpora and report JSON.")
+    parser.add_argument("sizes", nargs="?", default=DEFAULT_SIZES,
+                        help=f"comma-separated corpus sizes, 1KB to 1GB (default: {DEFAULT_SIZES})")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: 0)")
+    parser.add_argument("--density", default="", metavar="SPEC",
+                        help="entity density: '0.05' for all categories or 'emails=0.1,aws_keys=0'")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per stage, best time is kept")
+    parser.add_argument("-o", "--output", metavar="FILE", help="write the JSON report to FILE")
+    parser.add_argument("--compare", metavar="OLD", help="report regressions against an earlier JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown for --compare (default: 0.10 = 10%%)")
+    parser.add_argument("--write-corpus", metavar="FILE", help="only write the first size's corpus to FILE")
+    return parser
+
+
+def main() -> int:
+    """Run the suite from the command line; exit status 1 means --compare found regressions"""
+    args = build_parser().parse_args()
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+        density = parse_density(args.density)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.write_corpus:
+        planted = write_corpus(args.write_corpus, sizes[0], args.seed, density)
+        print(json.dumps({'path': args.write_corpus, 'size_bytes': sizes[0], 'planted': planted}))
+        return 0
+
+    report = run_suite(sizes, args.seed, density, args.repeat)
+    print_summary(report)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        try:
+            with open(args.compare, encoding='utf-8') as file:
+                old = json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Error reading {args.compare}: {e}", file=sys.stderr)
+            return 2
+        regressions = compare_reports(old, report, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+# Test function for development
+def test_bench():
+    """Check the corpus is reproducible and planted entities are found, then run a small suite"""
+    planted = {}
+    first = generate_corpus(256 * 1024, seed=3, planted=planted)
+    print(f"Reproducible corpus: {first == generate_corpus(256 * 1024, seed=3)}")
+    print(f"Planted: {planted}")
+
+    found = SuspiciousPatternAnalyzer().find_patterns(first)
+    missing = [category for category in planted if not found.get(category)]
+    print(f"Every planted category found: {not missing} {missing or ''}")
+
+    report = run_suite([1024, 1024 * 1024], seed=3)
+    print_summary(report)
+    print(f"Self-compare regressions: {compare_reports(report, report)}")
+
+
+# Run the suite if this file is executed directly (no arguments: quick self-check)
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    test_bench()
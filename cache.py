@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Result Cache - Persistent content-hash cache of analysis results
+Author: Your Name
+Version: 1.0
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Any, Optional, Tuple
+
+
+# Default size limit for cached result data
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Files are hashed in blocks of this size
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Pending LRU/insert writes are committed after this many operations
+COMMIT_EVERY = 500
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents, read in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def restore_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Undo JSON's tuple-to-list conversion so cached results equal fresh ones"""
+    result['patterns'] = {
+        category: [tuple(match) if isinstance(match, list) else match for match in matches]
+        for category, matches in result.get('patterns', {}).items()
+    }
+    result['frequency'] = [tuple(item) for item in result.get('frequency', [])]
+    return result
+
+
+class ResultCache:
+    """On-disk cache of analyze() results keyed by content hash
+
+    Every entry is stored under "<content sha256>:<fingerprint>", where the
+    fingerprint hashes the pattern library, risk weights and word lists. Any
+    change to those produces new keys, and entries with an old fingerprint
+    are dropped when the cache is opened.
+
+    A second table remembers (mtime, size) -> content hash per path, so an
+    untouched file is looked up without reading it at all. Total stored
+    size is bounded; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: str, fingerprint: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+
+        # Statistics for reports and metrics
+        self.hits = 0
+        self.misses = 0
+        self.fast_hits = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, fingerprint TEXT, result TEXT,"
+            " size INTEGER, last_access REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, content_hash TEXT)"
+        )
+
+        # Results computed with other patterns or weights can never be hit again
+        self.connection.execute("DELETE FROM results WHERE fingerprint != ?", (fingerprint,))
+        self.connection.commit()
+
+        row = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        self.total_bytes = row[0]
+        self.pending_writes = 0
+
+    def _key(self, content_hash: str) -> str:
+        return f"{content_hash}:{self.fingerprint}"
+
+    def _touch(self):
+        """Count a write and commit in batches"""
+        self.pending_writes += 1
+        if self.pending_writes >= COMMIT_EVERY:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry {'result': ..., 'totals': ...} for a content hash, or None"""
+        key = self._key(content_hash)
+        row = self.connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._touch()
+
+        entry = json.loads(row[0])
+        entry['result'] = restore_result(entry['result'])
+        return entry
+
+    def put(self, content_hash: str, result: Dict[str, Any], totals: Optional[Dict[str, Any]] = None):
+        """Store a result (plus optional word totals) and evict old entries if the cache grew too big"""
+        key = self._key(content_hash)
+        # Timings describe one run, not the content - they are not cached
+        result = {name: value for name, value in result.items() if name != 'profile'}
+        data = json.dumps({'result': result, 'totals': totals})
+
+        old = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self.total_bytes -= old[0]
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results (key, fingerprint, result, size, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, self.fingerprint, data, len(data), time.time())
+        )
+        self.total_bytes += len(data)
+        self._touch()
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        cursor = self.connection.execute("SELECT key, size FROM results ORDER BY last_access")
+        doomed = []
+        for key, size in cursor:
+            if self.total_bytes <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self.total_bytes -= size
+
+        self.connection.executemany("DELETE FROM results WHERE key = ?", doomed)
+        self.connection.commit()
+        self.pending_writes = 0
+
+    def lookup_file(self, path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Find the cached entry for a file
+
+        Returns (entry, content_hash). The hash is only computed when the
+        file's mtime/size no longer match what was seen last time; pass it
+        back to store_file() after a miss to avoid hashing twice.
+        """
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, content_hash FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            entry = self.get(row[2])
+            if entry is not None:
+                self.fast_hits += 1
+            return entry, row[2]
+
+        content_hash = hash_file(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, content_hash) VALUES (?, ?, ?, ?)",
+            (path, stat.st_mtime_ns, stat.st_size, content_hash)
+        )
+        self._touch()
+        return self.get(content_hash), content_hash
+
+    def store_file(self, path: str, result: Dict[str, Any], totals: Optional[Dict[str, Any]] = None,
+                   content_hash: Optional[str] = None):
+        """Cache the result for a file (hashing it if the hash is not known yet)"""
+        if content_hash is None:
+            content_hash = self.lookup_file(path)[1]
+        self.put(content_hash, result, totals)
+
+    def hit_ratio(self) -> float:
+        """Fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_cache(directory: str, analyzer, mode: str = "mmap", max_bytes: int = DEFAULT_MAX_BYTES) -> ResultCache:
+    """Open the cache in a directory for this analyzer's configuration
+
+    The scan mode is part of the fingerprint because the bytes (mmap) and
+    text paths can differ slightly on non-ASCII input.
+    """
+    fingerprint = hashlib.sha256(f"{analyzer.fingerprint()}:{mode}".encode('utf-8')).hexdigest()
+    return ResultCache(os.path.join(directory, "shadowtrace_cache.sqlite3"), fingerprint, max_bytes)
+
+
+# Test function for development
+def test_cache():
+    """Round-trip a result through the cache and show the hit statistics"""
+    import shutil
+    import tempfile
+
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    analyzer = SuspiciousPatternAnalyzer()
+    directory = tempfile.mkdtemp(prefix='shadowtrace_cache_')
+
+    try:
+        sample = os.path.join(directory, "sample.txt")
+        with open(sample, 'w') as file:
+            file.write("Call me at (555) 123-4567 or mail john@example.com\n")
+
+        with open_cache(directory, analyzer) as cache:
+            entry, content_hash = cache.lookup_file(sample)
+            print(f"First lookup hit: {entry is not None}")
+
+            fresh = analyzer.analyze_mapped(sample, include_offsets=False)
+            cache.store_file(sample, fresh, content_hash=content_hash)
+
+            entry, _ = cache.lookup_file(sample)
+            print(f"Second lookup hit: {entry is not None} (fast path hits: {cache.fast_hits})")
+            print(f"Cached result identical: {entry['result'] == fresh}")
+
+        # Changing a risk weight changes the fingerprint and invalidates the entry
+        analyzer.RISK_WEIGHTS = dict(analyzer.RISK_WEIGHTS, emails=6)
+        with open_cache(directory, analyzer) as cache:
+            entry, _ = cache.lookup_file(sample)
+            print(f"Hit after weight change: {entry is not None}")
+
+    finally:
+        shutil.rmtree(directory)
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_cache()
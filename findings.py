@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Findings - Compact, position-aware records of every pattern hit
+Author: Your Name
+Version: 1.0
+"""
+
+from array import array
+from typing import Dict, List, Any, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from scanner import PatternScanner, clip_value, match_value
+except ImportError:
+    print("Error: scanner.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+class Finding:
+    """One pattern hit: category, offsets into the source and 1-based line number
+
+    Only four small fields are stored; the matched text is sliced out of the
+    source on demand with text().
+    """
+
+    __slots__ = ('category', 'start', 'end', 'line')
+
+    def __init__(self, category: str, start: int, end: int, line: int):
+        self.category = category
+        self.start = start
+        self.end = end
+        self.line = line
+
+    def text(self, source) -> str:
+        """The matched text (decoded if the source is bytes or an mmap)"""
+        value = source[self.start:self.end]
+        if isinstance(value, bytes):
+            return value.decode('utf-8', errors='ignore')
+        return value
+
+    def __repr__(self):
+        return f"Finding({self.category!r}, start={self.start}, end={self.end}, line={self.line})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Finding):
+            return NotImplemented
+        return (self.category, self.start, self.end, self.line) == (other.category, other.start, other.end, other.line)
+
+
+class FindingTable:
+    """Every hit of a scan, stored as array columns and sorted by offset
+
+    A hit costs four machine integers (category id, start, end, line) instead
+    of a Python string plus a set entry, and duplicates are kept, so hit
+    counts and positions survive. Finding objects and strings are only built
+    when asked for.
+    """
+
+    def __init__(self, scanner: PatternScanner):
+        self.scanner = scanner
+        self.categories = [spec.name for spec in scanner.specs]
+        self.category_ids = array('H')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('q')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Finding:
+        return Finding(self.categories[self.category_ids[index]], self.starts[index],
+                       self.ends[index], self.lines[index])
+
+    def __iter__(self) -> Iterable[Finding]:
+        categories = self.categories
+        for category_id, start, end, line in zip(self.category_ids, self.starts, self.ends, self.lines):
+            yield Finding(categories[category_id], start, end, line)
+
+    def category(self, name: str) -> Iterable[Finding]:
+        """Findings of one category, in file order"""
+        category_id = self.categories.index(name)
+        for index, current in enumerate(self.category_ids):
+            if current == category_id:
+                yield self[index]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of hits per category, duplicates included"""
+        totals = [0] * len(self.categories)
+        for category_id in self.category_ids:
+            totals[category_id] += 1
+        return {name: total for name, total in zip(self.categories, totals)}
+
+    def patterns(self, source) -> Dict[str, List[Any]]:
+        """Unique values per category - the same dict find_patterns() returns for source
+
+        Each hit is re-matched at its offset so multi-group patterns give
+        back the same tuples as re.findall.
+        """
+        compiled = [pattern for _, pattern in self.scanner.compiled]
+        found = {name: {} for name in self.categories}
+
+        for category_id, start in zip(self.category_ids, self.starts):
+            pattern = compiled[category_id]
+            match = pattern.match(source, start)
+            value = clip_value(match_value(match, pattern.groups), self.scanner.max_match_length)
+            if isinstance(value, bytes):
+                value = value.decode('utf-8', errors='ignore')
+            elif isinstance(value, tuple) and value and isinstance(value[0], bytes):
+                value = tuple(part.decode('utf-8', errors='ignore') for part in value)
+            found[self.categories[category_id]][value] = None
+
+        return {name: list(values) for name, values in found.items()}
+
+    def nbytes(self) -> int:
+        """Memory used by the columns"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.category_ids, self.starts, self.ends, self.lines))
+
+
+def _count_newlines(data, start: int, end: int) -> int:
+    """Newlines in data[start:end] for str, bytes and mmap sources"""
+    if isinstance(data, str):
+        return data.count('\n', start, end)
+    if isinstance(data, (bytes, bytearray)):
+        return data.count(b'\n', start, end)
+    return data[start:end].count(b'\n')
+
+
+def collect_findings(data, scanner: PatternScanner, pos: int = 0,
+                     endpos: Optional[int] = None) -> FindingTable:
+    """Scan data (str, bytes or mmap) once and return every hit with its position
+
+    Use a bytes scanner (get_scanner(..., binary=True)) for bytes and mmap
+    input; offsets are then byte offsets.
+    """
+    table = FindingTable(scanner)
+    category_index = {name: index for index, name in enumerate(table.categories)}
+
+    hits = [
+        (start, end, category_index[category])
+        for category, _, start, end in scanner.iter_matches(data, pos, endpos)
+    ]
+    hits.sort()
+
+    # Line numbers by counting newlines between consecutive hits - one pass overall
+    line = 1 + _count_newlines(data, 0, pos) if pos else 1
+    previous = pos
+    for start, end, category_id in hits:
+        line += _count_newlines(data, previous, start)
+        previous = start
+        table.category_ids.append(category_id)
+        table.starts.append(start)
+        table.ends.append(end)
+        table.lines.append(line)
+
+    return table
+
+
+# Test function for development
+def test_findings():
+    """Locate hits in a sample and compare with find_patterns()"""
+    import sys
+
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    analyzer = SuspiciousPatternAnalyzer()
+    test_text = """Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+My credit card number is 4532-1234-5678-9012. Please transfer money to my
+Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+You can visit https://example.com for more info. Mail john.doe@example.com again.
+"""
+
+    table = analyzer.locate_patterns(test_text)
+
+    print("Findings Test Results:")
+    print("======================")
+    for finding in table:
+        print(f"  line {finding.line}: {finding.category} {finding.text(test_text)!r} [{finding.start}:{finding.end}]")
+    print(f"Hit counts: {table.counts()}")
+    print(f"Same as find_patterns: {table.patterns(test_text) == analyzer.find_patterns(test_text)}")
+
+    # Memory: array columns versus one str per hit in a list
+    big_text = test_text * 20000
+    big_table = analyzer.locate_patterns(big_text)
+    strings = [finding.text(big_text) for finding in big_table]
+    string_bytes = sys.getsizeof(strings) + sum(sys.getsizeof(value) for value in strings)
+    print(f"{len(big_table)} hits: {big_table.nbytes() / 1024:.0f} KB as columns "
+          f"vs {string_bytes / 1024:.0f} KB as strings")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_findings()
@@ -6,13 +6,18 @@ Author: Your Name
 Version: 1.0
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime
+from pathlib import Path
 
 # Import our custom modules
 try:
     from analyzer import SuspiciousPatternAnalyzer
+    from filetypes import DEFAULT_POLICY, POLICIES
+    from profiling import PROFILE_ENV, profiler_from_env
+    from reports import REPORT_FORMATS, format_text_line, open_report
     from utils import Colors, clear_screen, print_banner, get_user_input
 except ImportError as e:
     print(f"Error: Missing required modules. Make sure all files are in the same directory.")
@@ -20,6 +25,10 @@ except ImportError as e:
     sys.exit(1)
 
 
+# Files bigger than this are streamed in chunks instead of read into memory
+STREAMING_THRESHOLD = 50 * 1024 * 1024
+
+
 class ShadowTrace:
     """Main class that controls the entire ShadowTrace application"""
 
@@ -104,6 +113,33 @@ class ShadowTrace:
                 print(f"{self.colors.RED}Error: File '{filename}' not found!{self.colors.RESET}")
                 return None
 
+            # Compressed files and archives are decompressed while they are scanned
+            from archives import archive_kind
+            if archive_kind(filename):
+                print(f"{self.colors.GREEN}✅ Archive detected - scanning its contents without extracting{self.colors.RESET}")
+                return Path(filename)
+
+            # Binaries are reduced to their printable strings, compressed or encrypted data is refused
+            from filetypes import BINARY, COMPRESSED, iter_strings, sniff_file
+            kind, label = sniff_file(filename)
+            if kind == COMPRESSED:
+                print(f"{self.colors.RED}Error: '{filename}' looks like compressed or encrypted data ({label}) - "
+                      f"nothing readable to scan!{self.colors.RESET}")
+                return None
+            if kind == BINARY:
+                with open(filename, 'rb') as file:
+                    strings = b''.join(iter_strings(iter(lambda: file.read(1024 * 1024), b'')))
+                content = '\n'.join(strings.decode('ascii').split())
+                print(f"{self.colors.YELLOW}⚠️  Binary file detected ({label}) - "
+                      f"scanning its printable strings ({len(content)} characters){self.colors.RESET}")
+                return content or None
+
+            # Huge files are analyzed in streaming mode - hand back the path only
+            file_size = os.path.getsize(filename)
+            if file_size > STREAMING_THRESHOLD:
+                print(f"{self.colors.GREEN}✅ Large file detected ({file_size} bytes) - using streaming mode{self.colors.RESET}")
+                return Path(filename)
+
             # Try to read the file
             with open(filename, 'r', encoding='utf-8', errors='ignore') as file:
                 content = file.read().strip()
@@ -174,69 +210,87 @@ class ShadowTrace:
             risk_emoji = "✅"
 
         print(f"\n{risk_color}{risk_emoji} Risk Score: {risk_score}% ({risk_level}){self.colors.RESET}")
+
+        # Rules skipped by the backtracking guard may have missed matches
+        if analysis_result.get('rules_over_budget'):
+            print(f"{self.colors.YELLOW}⏱️  Rules over time budget (results incomplete): "
+                  f"{', '.join(analysis_result['rules_over_budget'])}{self.colors.RESET}")
         print(f"{self.colors.BLUE}{'='*50}{self.colors.RESET}")
 
     def save_report(self, text_data, analysis_result):
-        """Save the analysis report to a file"""
+        """Save the analysis report to a file (readable text, JSON Lines, CSV or SARIF)"""
         choice = get_user_input(f"\n{self.colors.CYAN}Save this report as a file? (y/n): {self.colors.RESET}").lower()
 
         if choice not in ['y', 'yes']:
             return
 
+        report_format = get_user_input(
+            f"{self.colors.CYAN}Format - txt, jsonl, csv or sarif (default txt): {self.colors.RESET}").lower() or "txt"
+        if report_format not in ("txt", "jsonl", "csv", "sarif"):
+            print(f"{self.colors.YELLOW}Unknown format '{report_format}', saving as txt{self.colors.RESET}")
+            report_format = "txt"
+
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"shadow_report_{timestamp}.txt"
+        filename = f"shadow_report_{timestamp}.{report_format}"
 
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                # Write header
-                file.write("=" * 60 + "\n")
-                file.write("ShadowTrace - Digital Footprint Analysis Report\n")
-                file.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                file.write("=" * 60 + "\n\n")
-
-                # Write original text (first 500 chars)
-                file.write("ANALYZED TEXT:\n")
-                file.write("-" * 20 + "\n")
-                if len(text_data) > 500:
-                    file.write(text_data[:500] + "...(truncated)\n\n")
-                else:
-                    file.write(text_data + "\n\n")
-
-                # Write patterns
-                file.write("SUSPICIOUS PATTERNS FOUND:\n")
-                file.write("-" * 30 + "\n")
-                patterns = analysis_result['patterns']
-                found_any = False
-                for pattern_type, items in patterns.items():
-                    if items:
-                        file.write(f"{pattern_type.title()}:\n")
-                        for item in items:
-                            file.write(f"  - {item}\n")
-                        file.write("\n")
-                        found_any = True
-
-                if not found_any:
-                    file.write("No suspicious patterns detected.\n\n")
-
-                # Write frequency analysis
-                file.write("WORD FREQUENCY ANALYSIS:\n")
-                file.write("-" * 25 + "\n")
-                for word, count in analysis_result['frequency'][:15]:
-                    file.write(f"{word}: {count}\n")
-
-                # Write sentiment and risk
-                file.write(f"\nSENTIMENT: {analysis_result['sentiment']}\n")
-                file.write(f"RISK SCORE: {analysis_result['risk_score']}%\n")
-
-                file.write("\n" + "=" * 60 + "\n")
-                file.write("Report generated by ShadowTrace v1.0\n")
+            if report_format != "txt":
+                source = str(text_data) if isinstance(text_data, Path) else "<input>"
+                writer = open_report(report_format, filename, self.analyzer)
+                writer.write_document(source, analysis_result)
+                writer.close()
+            else:
+                if isinstance(text_data, Path):
+                    with open(text_data, 'r', encoding='utf-8', errors='ignore') as source:
+                        text_data = source.read(501)
+                with open(filename, 'w', encoding='utf-8') as file:
+                    file.writelines(self.report_lines(text_data, analysis_result))
 
             print(f"{self.colors.GREEN}✅ Report saved as '{filename}'{self.colors.RESET}")
 
         except Exception as e:
             print(f"{self.colors.RED}Error saving report: {str(e)}{self.colors.RESET}")
 
+    def report_lines(self, text_data, analysis_result):
+        """Lines of the readable text report"""
+        lines = [
+            "=" * 60 + "\n",
+            "ShadowTrace - Digital Footprint Analysis Report\n",
+            f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            "=" * 60 + "\n\n",
+        ]
+
+        # Original text (first 500 chars)
+        lines += ["ANALYZED TEXT:\n", "-" * 20 + "\n"]
+        if len(text_data) > 500:
+            lines.append(text_data[:500] + "...(truncated)\n\n")
+        else:
+            lines.append(text_data + "\n\n")
+
+        # Patterns
+        lines += ["SUSPICIOUS PATTERNS FOUND:\n", "-" * 30 + "\n"]
+        found_any = False
+        for pattern_type, items in analysis_result['patterns'].items():
+            if items:
+                lines.append(f"{pattern_type.title()}:\n")
+                lines.extend(f"  - {item}\n" for item in items)
+                lines.append("\n")
+                found_any = True
+
+        if not found_any:
+            lines.append("No suspicious patterns detected.\n\n")
+
+        # Frequency analysis
+        lines += ["WORD FREQUENCY ANALYSIS:\n", "-" * 25 + "\n"]
+        lines.extend(f"{word}: {count}\n" for word, count in analysis_result['frequency'][:15])
+
+        # Sentiment and risk
+        lines.append(f"\nSENTIMENT: {analysis_result['sentiment']}\n")
+        lines.append(f"RISK SCORE: {analysis_result['risk_score']}%\n")
+        lines += ["\n" + "=" * 60 + "\n", "Report generated by ShadowTrace v1.0\n"]
+        return lines
+
     def run(self):
         """Main application loop"""
         self.display_welcome()
@@ -251,7 +305,10 @@ class ShadowTrace:
 
                 # Analyze the data
                 print(f"{self.colors.YELLOW}Processing your data...{self.colors.RESET}")
-                analysis_result = self.analyzer.analyze(text_data)
+                if isinstance(text_data, Path):
+                    analysis_result = self.analyzer.analyze_file(str(text_data))
+                else:
+                    analysis_result = self.analyzer.analyze(text_data)
 
                 # Display results
                 self.display_results(analysis_result)
@@ -279,8 +336,421 @@ class ShadowTrace:
                 print(f"{self.colors.YELLOW}Please try again or contact support.{self.colors.RESET}")
 
 
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options for non-interactive (batch/pipe) use"""
+    parser = argparse.ArgumentParser(
+        prog="shadowtrace",
+        description="Scan text for suspicious patterns. Run without arguments for the interactive menu."
+    )
+    parser.add_argument("paths", nargs="*",
+                        help="files or directories to scan; '-' reads standard input")
+    parser.add_argument("-f", "--format", choices=REPORT_FORMATS, default="text",
+                        help="output format (default: text); records are written as each input finishes")
+    parser.add_argument("--findings", action="store_true",
+                        help="one record per hit (category, value, offsets, line) instead of one per input")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="write the report to FILE instead of standard output")
+    parser.add_argument("-t", "--threshold", type=int, metavar="SCORE",
+                        help="exit with status 1 if any input scores at or above SCORE")
+    parser.add_argument("-w", "--workers", type=int, metavar="N",
+                        help="worker processes for directory sweeps (default: all cores)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="reuse results for unchanged files from a cache in DIR")
+    parser.add_argument("-F", "--follow", action="store_true",
+                        help="keep watching the given log files and report new hits as they are appended")
+    parser.add_argument("--state", metavar="FILE",
+                        help="with --follow, remember read offsets in FILE so restarts resume where they stopped")
+    parser.add_argument("--binary", choices=POLICIES, default=DEFAULT_POLICY,
+                        help="what to do with binary and compressed files: skip them (default), scan only "
+                             "their printable strings, or scan them like text")
+    parser.add_argument("--packs", metavar="NAMES",
+                        help="comma-separated rule packs to enable (default: core,secrets)")
+    parser.add_argument("--rules", metavar="DIR",
+                        help="extra directory to load rule packs (*.json, *.yaml) from")
+    parser.add_argument("--keep-invalid", action="store_true",
+                        help="also report hits that fail their rule's validator (Luhn, IPv4 range, SSN rules)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every stage and rule; adds 'profile' to JSON results and prints a report to stderr")
+    parser.add_argument("--approx-words", type=int, nargs="?", const=10000, metavar="CAPACITY",
+                        help="bounded-memory approximate word frequency keeping at most CAPACITY words "
+                             "(default 10000); results gain 'frequency_error'")
+    parser.add_argument("--redact", metavar="OUT",
+                        help="write a copy of the input with every finding masked to OUT ('-' for standard "
+                             "output); with several inputs or a directory OUT is a directory")
+    parser.add_argument("--redact-style", metavar="SPEC",
+                        help="per-category redaction styles, e.g. 'credit_cards=last4,emails=hash,*=mask' "
+                             "(styles: mask, last4, hash, label, keep)")
+    parser.add_argument("--index", metavar="DB",
+                        help="record every finding in an entity index (SQLite file DB); rescans update it in place")
+    parser.add_argument("--lookup", metavar="VALUE",
+                        help="with --index, list the files containing VALUE (email, key, IP...) instead of scanning")
+    parser.add_argument("--top-entities", type=int, metavar="N",
+                        help="with --index, list the N entities found in the most files instead of scanning")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="write Prometheus metrics to FILE (node-exporter textfile collector, e.g. shadowtrace.prom)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while scanning "
+                             "(the --serve daemon always has /metrics)")
+    parser.add_argument("--serve", action="store_true",
+                        help="run a local scan daemon (POST text to http://127.0.0.1:PORT/scan)")
+    parser.add_argument("--port", type=int, default=8765, metavar="PORT",
+                        help="port for --serve (default: 8765)")
+    parser.add_argument("-i", "--interactive", action="store_true",
+                        help="start the interactive menu")
+    return parser
+
+
+def scan_file_cached(path, analyzer, cache):
+    """Analyze one file, answering from the result cache when it is unchanged"""
+    entry, content_hash = cache.lookup_file(path)
+    if entry is not None:
+        return entry['result']
+
+    # Imported lazily - cached runs also store the word totals for corpus merges
+    from mmap_scanner import MappedFileScanner
+    accumulator = MappedFileScanner(analyzer).scan_accumulator(path)
+    result = accumulator.result(analyzer)
+    cache.store_file(path, result, accumulator.word_totals(), content_hash)
+    return result
+
+
+def file_action(path, policy):
+    """(action, description) the binary policy picks for a single file (see filetypes.py)"""
+    from filetypes import action_for, sniff_file
+    try:
+        kind, label = sniff_file(path)
+    except OSError:
+        return 'scan', 'unreadable'
+    return action_for(kind, policy), f"{kind} file ({label})"
+
+
+def finding_sink(writer=None, index=None):
+    """on_finding(source, category, value, start, end) feeding a findings writer and/or an entity index"""
+    if index is None:
+        return writer.write_finding if writer is not None else None
+    if writer is None:
+        return index.add
+
+    def on_finding(source, category, value, start=None, end=None):
+        writer.write_finding(source, category, value, start, end)
+        index.add(source, category, value, start, end)
+    return on_finding
+
+
+def scan_inputs(paths, analyzer, workers=None, cache=None, writer=None, policy=DEFAULT_POLICY, index=None):
+    """Yield (source, result) for every CLI input - stdin, files and directories
+
+    With a findings writer every hit is written to it as it is found
+    (character offsets and lines for stdin, byte offsets for files), and
+    with an entity index every hit of a file is added to it (the caller
+    finishes each document); the cache is skipped then, since it stores
+    no hits. Compressed files and
+    archives report each member as "archive!member". Binaries follow the
+    policy: skipped ({'skipped': reason}), reduced to their printable
+    strings or scanned like text.
+    """
+    from archives import archive_kind
+    on_finding = finding_sink(writer, index)
+
+    for path in paths:
+        if path == "-":
+            text = sys.stdin.read()
+            if writer is not None:
+                writer.write_text_findings("<stdin>", text)
+            yield "<stdin>", analyzer.analyze(text)
+            continue
+        if os.path.isdir(path):
+            # Only pull in multiprocessing when a directory sweep is requested
+            from batch import CorpusScanner
+            sweep = CorpusScanner(workers, cache=cache, policy=policy, analyzer=analyzer)
+            for file_path, result, error in sweep.iter_scan(path, on_finding):
+                yield file_path, result if error is None else {'error': error}
+            if sweep.file_types.files('skip') or sweep.file_types.files('strings'):
+                print(f"shadowtrace: {path}: {sweep.file_types.describe()}", file=sys.stderr)
+            continue
+        if not os.path.isfile(path):
+            yield path, {'error': "file not found"}
+            continue
+
+        if archive_kind(path):
+            from archives import ArchiveScanner
+            yield from ArchiveScanner(analyzer).iter_results(path, on_finding)
+            continue
+
+        action, description = file_action(path, policy)
+        if action == 'skip':
+            yield path, {'skipped': description}
+        elif action == 'strings':
+            from filetypes import scan_strings
+            from mmap_scanner import MappedFileScanner, decode_value
+
+            scanner = MappedFileScanner(analyzer)
+            on_match = None
+            if on_finding is not None:
+                def on_match(category, value, start, end, path=path):
+                    on_finding(path, category, decode_value(value), start, end)
+            yield path, scanner.decode(scan_strings(scanner, path, on_match)).result(analyzer)
+        elif on_finding is not None:
+            from mmap_scanner import MappedFileScanner, decode_value
+
+            def on_match(category, value, start, end, path=path):
+                on_finding(path, category, decode_value(value), start, end)
+            yield path, MappedFileScanner(analyzer).scan(path, include_offsets=False, on_match=on_match)
+        elif cache is not None:
+            yield path, scan_file_cached(path, analyzer, cache)
+        else:
+            yield path, analyzer.analyze_mapped(path, include_offsets=False)
+
+
+def run_follow(args: argparse.Namespace) -> int:
+    """Tail log files until Ctrl+C, printing each new hit as it is written"""
+    if not args.paths or "-" in args.paths:
+        print("shadowtrace: --follow needs one or more file paths", file=sys.stderr)
+        return 2
+
+    from tail import LogTailer
+
+    # Every new value is one finding record, flushed at once for whoever reads the stream
+    writer = open_report(args.format, args.output, SuspiciousPatternAnalyzer(), findings=True)
+
+    def on_finding(path, category, value, is_new):
+        if is_new:
+            writer.write_finding(path, category, value)
+            writer.flush()
+
+    tailer = LogTailer(args.paths, args.state, on_finding=on_finding)
+    try:
+        tailer.follow()
+    finally:
+        writer.close()
+
+    threshold_hit = False
+    for path, result in tailer.results().items():
+        print(format_text_line(path, result), file=sys.stderr)
+        if args.threshold is not None and result['risk_score'] >= args.threshold:
+            threshold_hit = True
+    return 1 if threshold_hit else 0
+
+
+def redaction_targets(paths, out):
+    """Yield (input, output) pairs for --redact; directories are mirrored under out"""
+    if len(paths) == 1 and not os.path.isdir(paths[0]):
+        yield paths[0], out
+        return
+
+    from batch import walk_files
+    for path in paths:
+        if path == "-" or not os.path.isdir(path):
+            yield path, os.path.join(out, os.path.basename(path) if path != "-" else "stdin")
+            continue
+        for file_path, _ in walk_files(path):
+            yield file_path, os.path.join(out, os.path.relpath(file_path, path))
+
+
+def run_redact(args: argparse.Namespace) -> int:
+    """Write masked copies of the inputs; a summary per input goes to stderr"""
+    from redact import Redactor, parse_styles
+
+    try:
+        styles = parse_styles(args.redact_style)
+    except ValueError as e:
+        print(f"shadowtrace: --redact-style: {e}", file=sys.stderr)
+        return 2
+
+    paths = args.paths or ["-"]
+    if args.redact == "-" and (len(paths) > 1 or os.path.isdir(paths[0])):
+        print("shadowtrace: --redact - needs a single input", file=sys.stderr)
+        return 2
+
+    redactor = Redactor(SuspiciousPatternAnalyzer(), styles)
+    had_error = False
+    for source, target in redaction_targets(paths, args.redact):
+        try:
+            if target != "-" and os.path.dirname(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+            stats = redactor.redact_file(source, target)
+        except OSError as e:
+            had_error = True
+            print(f"shadowtrace: {source}: {e}", file=sys.stderr)
+            continue
+
+        found = ", ".join(f"{name}={count}" for name, count in stats['categories'].items() if count)
+        line = (f"{'<stdin>' if source == '-' else source} -> {'<stdout>' if target == '-' else target}: "
+                f"{stats['redacted']} redacted ({found or 'nothing found'})")
+        if stats['rules_over_budget']:
+            line += f" | NOT fully redacted, over budget: {', '.join(stats['rules_over_budget'])}"
+            had_error = True
+        print(line, file=sys.stderr)
+
+    return 2 if had_error else 0
+
+
+def run_index_query(args: argparse.Namespace) -> int:
+    """Answer --lookup / --top-entities from an entity index without scanning anything"""
+    if not args.index or not os.path.exists(args.index):
+        print("shadowtrace: --lookup and --top-entities need an existing --index DB", file=sys.stderr)
+        return 2
+
+    import json
+    from entities import EntityIndex
+
+    with EntityIndex(args.index) as index:
+        if args.lookup:
+            records = index.lookup(args.lookup)
+            lines = [f"{entry['path']}: {entry['count']}x {entry['category']} {entry['value']}"
+                     f"{' at ' + ', '.join(str(start) for start, _ in entry['offsets']) if entry['offsets'] else ''}"
+                     for entry in records]
+        else:
+            records = index.top(limit=args.top_entities)
+            lines = [f"{entry['category']}: {entry['value']} in {entry['documents']} files "
+                     f"({entry['occurrences']} times)" for entry in records]
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(records, output, indent=2)
+            output.write("\n")
+        elif args.format == "jsonl":
+            output.writelines(json.dumps(record) + "\n" for record in records)
+        else:
+            output.writelines(line + "\n" for line in lines)
+    finally:
+        if args.output:
+            output.close()
+
+    # Like grep: 1 when nothing was found
+    return 0 if records else 1
+
+
+def run_cli(args: argparse.Namespace) -> int:
+    """Run without prompts; returns the process exit status
+
+    0 = done, 1 = threshold reached (or nothing found by --lookup), 2 = at least one input could not be read.
+    """
+    if args.serve:
+        from server import serve
+        serve(port=args.port, metrics_file=args.metrics_file)
+        return 0
+
+    metrics = None
+    if args.metrics_file or args.metrics_port:
+        # Metrics are fed by the profiler that main() switched on
+        from metrics import ScanMetrics, serve_metrics
+        metrics = ScanMetrics()
+        profiler_from_env().add_hook(metrics.observe_profile)
+        if args.metrics_port:
+            serve_metrics(metrics, args.metrics_port)
+
+    try:
+        if args.lookup or args.top_entities:
+            return run_index_query(args)
+        if args.redact:
+            return run_redact(args)
+        if args.follow:
+            return run_follow(args)
+        return scan_paths(args, metrics)
+    finally:
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+
+def scan_paths(args: argparse.Namespace, metrics=None) -> int:
+    """Scan the CLI inputs once and write the report (see run_cli for exit codes)"""
+    paths = args.paths or ["-"]
+
+    analyzer = SuspiciousPatternAnalyzer()
+    writer = open_report(args.format, args.output, analyzer, args.findings)
+    if metrics is not None:
+        metrics.add_categories(analyzer.CATEGORIES)
+
+    cache = None
+    if args.cache:
+        from cache import open_cache
+        cache = open_cache(args.cache, analyzer)
+        if metrics is not None:
+            metrics.watch_cache(cache)
+
+    index = None
+    if args.index:
+        from entities import EntityIndex
+        index = EntityIndex(args.index)
+
+    threshold_hit = False
+    had_error = False
+    seen = []
+
+    try:
+        for source, result in scan_inputs(paths, analyzer, args.workers, cache,
+                                          writer if args.findings else None, args.binary, index):
+            seen.append(source)
+            if index is not None and source != "<stdin>":
+                # A failed scan leaves the document's previous entries in place
+                if 'error' in result or 'skipped' in result:
+                    index.discard(source)
+                else:
+                    index.finish(source)
+
+            if 'skipped' in result:
+                print(f"shadowtrace: {source}: skipped {result['skipped']} (use --binary strings or scan)",
+                      file=sys.stderr)
+                continue
+            if 'error' in result:
+                had_error = True
+                print(f"shadowtrace: {source}: {result['error']}", file=sys.stderr)
+                continue
+
+            if args.threshold is not None and result['risk_score'] >= args.threshold:
+                threshold_hit = True
+
+            # Profiles switched on only to feed the metrics stay out of the report
+            if not args.profile:
+                result.pop('profile', None)
+
+            if not args.findings:
+                writer.write_document(source, result)
+
+        # Files that disappeared (or are skipped now) leave the index of a swept directory
+        if index is not None:
+            for path in paths:
+                if os.path.isdir(path):
+                    index.prune(path, seen)
+
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.close()
+        if index is not None:
+            index.close()
+
+    if had_error:
+        return 2
+    return 1 if threshold_hit else 0
+
+
 def main():
     """Entry point of the application"""
+    args = build_parser().parse_args()
+
+    # Rule selection goes through the environment so worker processes see it too
+    if args.packs:
+        os.environ["SHADOWTRACE_PACKS"] = args.packs
+    if args.rules:
+        os.environ["SHADOWTRACE_RULES_PATH"] = args.rules
+    if args.keep_invalid:
+        os.environ["SHADOWTRACE_KEEP_INVALID"] = "1"
+    if args.approx_words:
+        os.environ["SHADOWTRACE_TOP_K"] = str(args.approx_words)
+    # Metrics outside the daemon are fed by the profiler (the daemon counts its batches itself)
+    if args.profile or ((args.metrics_file or args.metrics_port) and not args.serve):
+        os.environ[PROFILE_ENV] = "1"
+
+    # Arguments or piped input switch to the prompt-free command line mode
+    if not args.interactive and (len(sys.argv) > 1 or not sys.stdin.isatty()):
+        status = run_cli(args)
+        if args.profile:
+            print(profiler_from_env().report(), file=sys.stderr)
+        sys.exit(status)
+
     try:
         # Create and run the ShadowTrace application
         app = ShadowTrace()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Metrics - Prometheus counters and histograms for long-running scan workers
+Author: Your Name
+Version: 1.0
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from itertools import compress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every metric name starts with this
+PREFIX = "shadowtrace"
+
+# Histogram buckets (seconds) for per-rule and per-batch latency
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Histogram buckets for documents per server batch
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+# How often the textfile is rewritten in long-running modes (seconds)
+TEXTFILE_INTERVAL = 15.0
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """{name="value",...} or an empty string"""
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _number(value: float) -> str:
+    """Integers without a trailing .0, +Inf spelled the Prometheus way"""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one label combination"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class ScanMetrics:
+    """Counters, gauges and histograms of a scan worker, rendered for Prometheus
+
+    Updates and rendering may happen on different threads (the server's
+    batcher vs its HTTP handlers), so everything goes through one lock. The
+    work per document is a handful of dict updates - far below the cost of
+    scanning it.
+    """
+
+    def __init__(self, latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.lock = threading.Lock()
+        self.latency_buckets = latency_buckets
+        self.started = time.time()
+
+        self.documents = 0
+        self.bytes = 0
+        self.scan_seconds = 0.0
+        self.hits = {}
+        self.stage_seconds = {}
+        self.errors = {}
+        self.over_budget = {}
+        self.rule_latency = {}
+        self.batch_latency = Histogram(latency_buckets)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+        # name -> (help, type, callable returning the current value)
+        self.callbacks = {}
+
+    def add_categories(self, categories: Iterable[str]):
+        """List categories in hits_total from the start, even before their first hit"""
+        with self.lock:
+            for category in categories:
+                self.hits.setdefault(category, 0)
+
+    def add_gauge(self, name: str, help_text: str, function: Callable[[], float], kind: str = 'gauge'):
+        """Expose a value that is read when the metrics are rendered (queue depth, cache hits, ...)"""
+        with self.lock:
+            self.callbacks[name] = (help_text, kind, function)
+
+    def watch_cache(self, cache):
+        """Expose a ResultCache's hit and miss counters and its hit ratio"""
+        self.add_gauge('cache_hits_total', "Result cache lookups answered from the cache.",
+                       lambda: cache.hits, 'counter')
+        self.add_gauge('cache_misses_total', "Result cache lookups that had to scan.",
+                       lambda: cache.misses, 'counter')
+        self.add_gauge('cache_hit_ratio', "Share of result cache lookups that were hits.",
+                       lambda: cache.hits / (cache.hits + cache.misses) if cache.hits + cache.misses else 0.0)
+
+    def observe_document(self, size: int, patterns: Dict[str, List[Any]], over_budget: Iterable[str] = ()):
+        """Count one scanned document, its size and its unique hits per category"""
+        self.observe_counts(size, {category: len(matches) for category, matches in patterns.items()}, over_budget)
+
+    def observe_counts(self, size: int, counts: Dict[str, int], over_budget: Iterable[str] = ()):
+        """observe_document() for hit counts instead of match lists"""
+        with self.lock:
+            self.documents += 1
+            self.bytes += size
+            hits = self.hits
+            for category, count in counts.items():
+                hits[category] = hits.get(category, 0) + count
+            for name in over_budget:
+                self.over_budget[name] = self.over_budget.get(name, 0) + 1
+
+    def observe_results(self, sizes: Iterable[int], results: Iterable[Dict[str, Any]]):
+        """observe_document() for a whole batch of analyze() results, under one lock"""
+        with self.lock:
+            hits = self.hits
+            for size, result in zip(sizes, results):
+                self.documents += 1
+                self.bytes += size
+                patterns = result.get('patterns', {})
+                # compress() skips the (usually many) empty categories in C
+                for category in compress(patterns, patterns.values()):
+                    hits[category] = hits.get(category, 0) + len(patterns[category])
+                if 'rules_over_budget' in result:
+                    for name in result['rules_over_budget']:
+                        self.over_budget[name] = self.over_budget.get(name, 0) + 1
+
+    def observe_rules(self, spent: Dict[str, float]):
+        """Add one latency observation per rule (seconds spent in its regex for one document or batch)"""
+        with self.lock:
+            for name, seconds in spent.items():
+                histogram = self.rule_latency.get(name)
+                if histogram is None:
+                    histogram = self.rule_latency[name] = Histogram(self.latency_buckets)
+                histogram.observe(seconds)
+
+    def observe_batch(self, documents: int, seconds: float):
+        """Record one server batch: its size and how long it took"""
+        with self.lock:
+            self.scan_seconds += seconds
+            self.batch_latency.observe(seconds)
+            self.batch_sizes.observe(documents)
+
+    def observe_error(self, stage: str):
+        """Count an error caught while scanning"""
+        with self.lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def observe_profile(self, profile: Dict[str, Any]):
+        """Profiler hook: fold in one document's profile dict (see profiling.py)"""
+        self.observe_counts(profile['bytes'], {name: rule['matches'] for name, rule in profile['rules'].items()},
+                            profile.get('rules_over_budget', ()))
+        self.observe_rules({name: rule['seconds'] for name, rule in profile['rules'].items() if rule['seconds']})
+        with self.lock:
+            self.scan_seconds += profile['seconds']
+            for stage, seconds in profile['stages'].items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            for error in profile['errors']:
+                stage = error.split(':', 1)[0]
+                self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name: str, help_text: str, kind: str):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def sample(name: str, value: float, labels: str = ''):
+            lines.append(f"{PREFIX}_{name}{labels} {_number(value)}")
+
+        def histogram(name: str, label_names: Tuple[str, ...], label_values: Tuple[str, ...], data: Histogram):
+            cumulative = 0
+            for bound, count in zip(data.buckets + (float('inf'),), data.counts):
+                cumulative += count
+                sample(f"{name}_bucket", cumulative, _labels(label_names, label_values, f'le="{_number(bound)}"'))
+            sample(f"{name}_sum", data.total, _labels(label_names, label_values))
+            sample(f"{name}_count", data.count, _labels(label_names, label_values))
+
+        with self.lock:
+            family('documents_scanned_total', "Documents scanned.", 'counter')
+            sample('documents_scanned_total', self.documents)
+            family('bytes_scanned_total', "Bytes (characters for text input) scanned.", 'counter')
+            sample('bytes_scanned_total', self.bytes)
+            family('scan_seconds_total', "Seconds spent scanning.", 'counter')
+            sample('scan_seconds_total', self.scan_seconds)
+            family('scan_bytes_per_second', "Average scan throughput since start.", 'gauge')
+            sample('scan_bytes_per_second', self.bytes / self.scan_seconds if self.scan_seconds else 0.0)
+
+            family('hits_total', "Unique pattern hits per document, summed by category.", 'counter')
+            for category, count in sorted(self.hits.items()):
+                sample('hits_total', count, _labels(('category',), (category,)))
+
+            if self.stage_seconds:
+                family('stage_seconds_total', "Seconds spent per analysis stage.", 'counter')
+                for stage, seconds in sorted(self.stage_seconds.items()):
+                    sample('stage_seconds_total', seconds, _labels(('stage',), (stage,)))
+
+            family('rule_seconds', "Regex time per rule per document (or server batch).", 'histogram')
+            for name, data in sorted(self.rule_latency.items()):
+                histogram('rule_seconds', ('rule',), (name,), data)
+
+            if self.batch_latency.count:
+                family('batch_seconds', "Server batch scan latency.", 'histogram')
+                histogram('batch_seconds', (), (), self.batch_latency)
+                family('batch_documents', "Documents per server batch.", 'histogram')
+                histogram('batch_documents', (), (), self.batch_sizes)
+
+            family('rules_over_budget_total', "Documents in which a rule ran out of time budget.", 'counter')
+            for name, count in sorted(self.over_budget.items()):
+                sample('rules_over_budget_total', count, _labels(('rule',), (name,)))
+
+            family('errors_total', "Errors caught while scanning, by stage.", 'counter')
+            for stage, count in sorted(self.errors.items()):
+                sample('errors_total', count, _labels(('stage',), (stage,)))
+
+            callbacks = list(self.callbacks.items())
+
+        for name, (help_text, kind, function) in callbacks:
+            try:
+                value = function()
+            except Exception as e:
+                print(f"Error reading metric {name}: {str(e)}")
+                continue
+            family(name, help_text, kind)
+            sample(name, value)
+
+        family('start_time_seconds', "Unix time the metrics were created.", 'gauge')
+        sample('start_time_seconds', round(self.started, 3))
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write the metrics for node-exporter's textfile collector (atomically, via rename)"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(self.render())
+        os.replace(temporary, path)
+
+
+def start_textfile_writer(metrics: ScanMetrics, path: str, interval: float = TEXTFILE_INTERVAL) -> threading.Thread:
+    """Rewrite the textfile every `interval` seconds in a daemon thread"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                metrics.write_textfile(path)
+            except OSError as e:
+                print(f"Error writing metrics file: {str(e)}")
+
+    thread = threading.Thread(target=run, name="shadowtrace-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """GET /metrics on a separate port (for modes without the scan daemon)"""
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(metrics: ScanMetrics, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread; returns the server (call shutdown() to stop)"""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, name="shadowtrace-metrics", daemon=True).start()
+    return server
+
+
+# Test function for development
+def test_metrics():
+    """Feed profiled analyses into the metrics and print the exposition"""
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+        from profiling import Profiler
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    metrics = ScanMetrics()
+    analyzer = SuspiciousPatternAnalyzer(profiler=Profiler(hooks=[metrics.observe_profile]))
+    texts = [
+        "Hey! Mail john.doe@example.com or call (555) 123-4567.",
+        "Card 4532-1234-5678-9012, wallet 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa",
+        "Visit https://example.com/login from 192.168.1.20 - great support!"
+    ]
+    for text in texts:
+        analyzer.analyze(text)
+    metrics.add_gauge('queue_depth', "Documents waiting to be scanned.", lambda: 0)
+
+    print("Metrics Test Results:")
+    print("=====================")
+    print(metrics.render())
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_metrics()
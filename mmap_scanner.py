@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Memory-Mapped Scanner - Zero-copy scanning of local files as raw bytes
+Author: Your Name
+Version: 1.0
+"""
+
+import mmap
+import os
+import string
+from collections import Counter
+from typing import Dict, List, Tuple, Any, Callable, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from scanner import RuleBudget
+    from streaming import AnalysisAccumulator
+    from topk import HeavyHitters
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# Word statistics are computed over slices of this many bytes
+WORD_SLICE_SIZE = 8 * 1024 * 1024
+
+# Byte-level versions of the analyzer's punctuation handling
+PUNCTUATION_BYTES = string.punctuation.encode('ascii')
+PUNCTUATION_TO_SPACE = bytes.maketrans(PUNCTUATION_BYTES, b' ' * len(PUNCTUATION_BYTES))
+
+# Streams (e.g. decompressed archive members) are scanned in blocks of about
+# this many bytes, with this much context kept on either side of each block
+STREAM_BLOCK_SIZE = 4 * 1024 * 1024
+STREAM_OVERLAP = 64 * 1024
+
+# Callback signature: on_match(category, value, start byte, end byte); values are still bytes
+MatchCallback = Callable[[str, Any, int, int], None]
+
+
+def decode_value(value: Any) -> Any:
+    """Turn a bytes match (or tuple of group matches) back into text"""
+    if isinstance(value, tuple):
+        return tuple(part.decode('utf-8', errors='ignore') for part in value)
+    return value.decode('utf-8', errors='ignore')
+
+
+class MappedFileScanner:
+    """Scans a file through mmap with bytes-compiled patterns
+
+    The regexes run directly over the mapped pages, so the file is never
+    decoded to str or copied as a whole. Only matched values (and the most
+    common words) are decoded. Offsets are byte positions into the file.
+
+    Note that bytes patterns treat \\w, \\s and \\b as ASCII-only, so results
+    can differ from the text path for non-ASCII content.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.scanner = self.analyzer.patterns.get_scanner(self.analyzer.CATEGORIES, binary=True)
+
+        # Encoded copies of the word lists so tokens never need decoding
+        sentiment_analyzer = self.analyzer.sentiment_analyzer
+        self.positive_words = {word.encode('ascii') for word in sentiment_analyzer.positive_words}
+        self.negative_words = {word.encode('ascii') for word in sentiment_analyzer.negative_words}
+        self.risky_words = {word.encode('ascii') for word in sentiment_analyzer.risky_words}
+        self.stop_words = {word.encode('ascii') for word in self.analyzer.STOP_WORDS}
+
+    def scan(self, path: str, include_offsets: bool = True, on_match: Optional[MatchCallback] = None) -> Dict[str, Any]:
+        """Analyze a file; the result also carries byte offsets of every hit"""
+        offsets = {category: [] for category in self.analyzer.CATEGORIES} if include_offsets else None
+
+        result = self.scan_accumulator(path, offsets, on_match).result(self.analyzer)
+        if include_offsets:
+            result['offsets'] = offsets
+        return result
+
+    def scan_accumulator(self, path: str, offsets: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                         on_match: Optional[MatchCallback] = None) -> AnalysisAccumulator:
+        """Scan a whole file and return its decoded accumulator (for merging or caching)"""
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+
+            # mmap cannot map an empty file
+            if not size:
+                return AnalysisAccumulator(self.analyzer.CATEGORIES, self.analyzer.new_word_counts())
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                accumulator = self.scan_range(data, 0, size, offsets=offsets, on_match=on_match)
+
+        return self.decode(accumulator)
+
+    def scan_range(self, data, start: int, end: int, overlap: int = 0,
+                   offsets: Optional[Dict[str, List[Tuple[int, int]]]] = None,
+                   on_match: Optional[MatchCallback] = None) -> AnalysisAccumulator:
+        """Scan the hits that start in data[start:end] and count its words
+
+        Up to `overlap` bytes on either side are searched as well, so matches
+        crossing the range edges are still seen whole; the range they start
+        in owns them. Words are counted for exactly data[start:end], so ranges
+        should be cut on whitespace. Values in the returned accumulator are
+        still bytes - pass it to decode() once all ranges are merged.
+        on_match, if given, is called for every hit as it is found (for
+        writing per-finding reports without keeping the hits).
+        """
+        accumulator = AnalysisAccumulator(self.analyzer.CATEGORIES, self.analyzer.new_word_counts())
+        accumulator.chars_scanned = end - start
+        budget = RuleBudget()
+
+        profile = None
+        if self.analyzer.profiler is not None:
+            profile = accumulator.profile = self.analyzer.profiler.start(end - start)
+
+        search_start = max(start - overlap, 0)
+        search_end = min(end + overlap, len(data))
+        for category, value, match_start, match_end in self.scanner.iter_matches(data, search_start, search_end,
+                                                                                 budget=budget):
+            if start <= match_start < end:
+                accumulator.add_matches(category, (value,))
+                if offsets is not None:
+                    offsets[category].append((match_start, match_end))
+                if on_match is not None:
+                    on_match(category, value, match_start, match_end)
+        accumulator.add_over_budget(budget.exceeded)
+        if profile is not None:
+            profile.mark('find_patterns')
+            profile.add_rules(budget)
+
+        self._count_words(data, start, end, accumulator)
+        if profile is not None:
+            profile.mark('word_statistics')
+        return accumulator
+
+    def scan_stream(self, chunks: Iterable[bytes], on_match: Optional[MatchCallback] = None,
+                    block_size: int = STREAM_BLOCK_SIZE, overlap: int = STREAM_OVERLAP) -> AnalysisAccumulator:
+        """Scan a stream of byte chunks that cannot be mapped (e.g. a decompressing reader)
+
+        Blocks of about block_size are cut on whitespace and scanned with
+        scan_range(), keeping `overlap` bytes of context on both sides, so
+        the result equals scanning the whole stream at once while memory
+        stays at one block. Offsets passed to on_match count from the start
+        of the stream. Values are still bytes - pass the result to decode().
+        """
+        total = AnalysisAccumulator(self.analyzer.CATEGORIES, self.analyzer.new_word_counts())
+        buffer = b''
+        base = 0         # stream offset of buffer[0]
+        position = 0     # buffer offset where the unscanned bytes start
+
+        def shifted(offset):
+            if on_match is None:
+                return None
+            return lambda category, value, start, end: on_match(category, value, start + offset, end + offset)
+
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) - position < block_size + overlap:
+                continue
+
+            # Cut after a newline (or a space) so no word or match is split
+            limit = len(buffer) - overlap
+            cut = buffer.rfind(b'\n', position, limit) + 1
+            if cut <= position:
+                cut = buffer.rfind(b' ', position, limit) + 1
+            if cut <= position:
+                cut = limit
+
+            total.merge(self.scan_range(buffer, position, cut, overlap, on_match=shifted(base)))
+            drop = max(cut - overlap, 0)
+            buffer = buffer[drop:]
+            base += drop
+            position = cut - drop
+
+        if len(buffer) > position:
+            total.merge(self.scan_range(buffer, position, len(buffer), overlap, on_match=shifted(base)))
+        return total
+
+    def decode(self, accumulator: AnalysisAccumulator) -> AnalysisAccumulator:
+        """Decode the unique matches and words of a bytes accumulator in place"""
+        profile = accumulator.profile
+        if profile is not None:
+            profile.skip()
+
+        accumulator.patterns = {
+            category: {decode_value(value): None for value in matches}
+            for category, matches in accumulator.patterns.items()
+        }
+
+        if isinstance(accumulator.word_counts, HeavyHitters):
+            accumulator.word_counts = accumulator.word_counts.map_words(lambda word: word.decode('utf-8', errors='ignore'))
+        else:
+            word_counts = Counter()
+            for word, count in accumulator.word_counts.items():
+                word_counts[word.decode('utf-8', errors='ignore')] += count
+            accumulator.word_counts = word_counts
+
+        if profile is not None:
+            profile.mark('decode')
+        return accumulator
+
+    def _count_words(self, data, start: int, stop: int, accumulator: AnalysisAccumulator):
+        """Count words slice by slice, always cutting the data on whitespace"""
+        position = start
+
+        while position < stop:
+            end = min(position + WORD_SLICE_SIZE, stop)
+            if end < stop:
+                cut = max(data.rfind(b' ', position, end), data.rfind(b'\n', position, end))
+                if cut > position:
+                    end = cut
+
+            piece = data[position:end].lower()
+            if not accumulator.has_content and piece.strip():
+                accumulator.has_content = True
+
+            accumulator.add_words(self._word_frequency(piece), *self._sentiment_counts(piece))
+            position = end
+
+    def _word_frequency(self, piece: bytes) -> Counter:
+        """Byte version of SuspiciousPatternAnalyzer.count_word_frequency"""
+        counts = Counter(piece.translate(PUNCTUATION_TO_SPACE).split())
+
+        # Filter the distinct words rather than every token
+        stop_words = self.stop_words
+        for word in [word for word in counts if len(word) <= 2 or word in stop_words]:
+            del counts[word]
+        return counts
+
+    def _sentiment_counts(self, piece: bytes) -> Tuple[int, int, int, int]:
+        """Byte version of SentimentAnalyzer.count_words"""
+        counts = Counter(piece.translate(None, PUNCTUATION_BYTES).split())
+        positive_count = sum(counts[word] for word in self.positive_words)
+        negative_count = sum(counts[word] for word in self.negative_words)
+        risky_count = sum(counts[word] for word in self.risky_words)
+        return positive_count, negative_count, risky_count, sum(counts.values())
+
+
+def scan_mapped_file(path: str, analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+                     include_offsets: bool = True) -> Dict[str, Any]:
+    """Analyze a local file through mmap without decoding it"""
+    return MappedFileScanner(analyzer).scan(path, include_offsets)
+
+
+# Test function for development
+def test_mmap_scanner():
+    """Compare the mmap scanner with the text analyzer on a small sample file"""
+    import tempfile
+
+    analyzer = SuspiciousPatternAnalyzer()
+    test_text = """
+    Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+    My credit card number is 4532-1234-5678-9012. Please transfer money to my
+    Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+    You can visit https://example.com for more info.
+    """
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as file:
+        file.write(test_text)
+        path = file.name
+
+    try:
+        expected = analyzer.analyze(test_text)
+        result = scan_mapped_file(path, analyzer)
+    finally:
+        os.remove(path)
+
+    print("mmap Scanner Test Results:")
+    print("==========================")
+    print(f"Same result as text path: {all(result[key] == expected[key] for key in expected)}")
+    for category, spans in result['offsets'].items():
+        if spans:
+            print(f"  {category}: byte offsets {spans}")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_mmap_scanner()
@@ -6,49 +6,75 @@ Author: Your Name
 Version: 1.0
 """
 
+import hashlib
+import json
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Any, Optional
 
+from rules import RuleRegistry, get_registry, ipv4_valid, luhn_valid
+from scanner import PatternSpec, get_scanner
 
-class PatternLibrary:
-    """Library containing all regex patterns for detecting suspicious data"""
-
-    def __init__(self):
-        # Email pattern - matches most valid email formats
-        self.EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-
-        # Phone number patterns - various formats
-        self.PHONE_PATTERN = r'(?:\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})'
-
-        # Credit card pattern - 4 groups of 4 digits
-        self.CREDIT_CARD_PATTERN = r'\b(?:\d{4}[-\s]?){3}\d{4}\b'
-
-        # Social Security Number pattern
-        self.SSN_PATTERN = r'\b\d{3}-?\d{2}-?\d{4}\b'
-
-        # URL pattern - matches http/https URLs
-        self.URL_PATTERN = r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*)?(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?'
-
-        # IP Address pattern - IPv4
-        self.IP_PATTERN = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-
-        # Bitcoin address pattern
-        self.BITCOIN_PATTERN = r'\b[13][a-km-zA-HJ-NP-Z1-9]{25,34}\b'
-
-        # File path pattern - Windows and Unix paths
-        self.FILE_PATH_PATTERN = r'(?:[A-Za-z]:\\|/)[^\s<>"]*'
-
-        # MAC Address pattern
-        self.MAC_PATTERN = r'\b([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})\b'
 
-        # API Key pattern (basic)
-        self.API_KEY_PATTERN = r'\b(?:api_key|apikey|api-key)[:=]\s*["\']?([A-Za-z0-9_-]{20,})["\']?\b'
+class PatternLibrary:
+    """Library containing all regex patterns for detecting suspicious data
 
-        # AWS Access Key pattern
-        self.AWS_KEY_PATTERN = r'\bAKIA[0-9A-Z]{16}\b'
+    The patterns themselves live in rule packs (rules/*.json) and are read
+    through a RuleRegistry shared with SuspiciousPatternAnalyzer.
+    """
 
-        # Password pattern (basic)
-        self.PASSWORD_PATTERN = r'\b(?:password|pwd|pass)[:=]\s*["\']?([^\s"\']{6,})["\']?\b'
+    # Attribute names of the original hard-coded patterns -> rule category
+    LEGACY_PATTERN_NAMES = {
+        'EMAIL_PATTERN': 'emails',
+        'PHONE_PATTERN': 'phone_numbers',
+        'CREDIT_CARD_PATTERN': 'credit_cards',
+        'SSN_PATTERN': 'ssn_numbers',
+        'URL_PATTERN': 'urls',
+        'IP_PATTERN': 'ip_addresses',
+        'BITCOIN_PATTERN': 'bitcoin_addresses',
+        'FILE_PATH_PATTERN': 'file_paths',
+        'MAC_PATTERN': 'mac_addresses',
+        'API_KEY_PATTERN': 'api_keys',
+        'AWS_KEY_PATTERN': 'aws_keys',
+        'PASSWORD_PATTERN': 'passwords'
+    }
+
+    def __init__(self, registry: Optional[RuleRegistry] = None):
+        self.registry = registry or get_registry()
+
+    def __getattr__(self, name: str) -> str:
+        # EMAIL_PATTERN etc. still work, answered from the registry
+        category = PatternLibrary.LEGACY_PATTERN_NAMES.get(name)
+        if category is not None:
+            rule = self.registry.rule(category)
+            if rule is not None:
+                return rule.pattern
+        raise AttributeError(name)
+
+    @property
+    def CATEGORY_PATTERNS(self) -> List[tuple]:
+        """Scan order for every category: (result key, pattern, regex flags, trigger characters)"""
+        return [(rule.category, rule.pattern, rule.flags, rule.triggers) for rule in self.registry.rules()]
+
+    def get_scan_specs(self, categories: Optional[List[str]] = None) -> List[PatternSpec]:
+        """Return scanner specs for the given categories (all enabled categories by default)"""
+        return self.registry.specs(categories)
+
+    def get_scanner(self, categories: Optional[List[str]] = None, binary: bool = False):
+        """Return the compiled (and cached) multi-pattern scanner for these categories"""
+        return get_scanner(self.get_scan_specs(categories), binary)
+
+    def fingerprint(self, categories: Optional[List[str]] = None) -> str:
+        """Version hash of the pattern set - changes whenever a pattern, flag or validator changes"""
+        state = [(spec.name, spec.pattern, int(spec.flags), getattr(spec.validator, '__name__', None))
+                 for spec in self.get_scan_specs(categories)]
+        return hashlib.sha256(json.dumps(state).encode('utf-8')).hexdigest()
+
+    def validate(self, category: str, value: Any) -> bool:
+        """Run the category's validator on a match (True when it has none)"""
+        validator = self.registry.validator(category)
+        if validator is None:
+            return True
+        return validator('-'.join(value) if isinstance(value, tuple) else value)
 
     def validate_email(self, email: str) -> bool:
         """Validate if email format is correct"""
@@ -58,63 +84,23 @@ class PatternLibrary:
         """Validate if IP address is in correct format"""
         if not re.match(self.IP_PATTERN, ip):
             return False
-
-        parts = ip.split('.')
-        return all(0 <= int(part) <= 255 for part in parts)
+        return ipv4_valid(ip)
 
     def validate_credit_card(self, cc: str) -> bool:
         """Basic credit card validation using Luhn algorithm"""
-        # Remove spaces and hyphens
-        cc_clean = re.sub(r'[-\s]', '', cc)
-
-        if not cc_clean.isdigit() or len(cc_clean) < 13 or len(cc_clean) > 19:
-            return False
-
-        # Luhn algorithm
-        total = 0
-        reverse_digits = cc_clean[::-1]
-
-        for i, digit in enumerate(reverse_digits):
-            n = int(digit)
-            if i % 2 == 1:  # Every second digit from right
-                n *= 2
-                if n > 9:
-                    n = n // 10 + n % 10
-            total += n
-
-        return total % 10 == 0
+        return luhn_valid(cc)
 
     def find_all_patterns(self, text: str) -> Dict[str, List[str]]:
         """Find all patterns in the given text"""
-        results = {
-            'emails': [],
-            'phone_numbers': [],
-            'credit_cards': [],
-            'ssn_numbers': [],
-            'urls': [],
-            'ip_addresses': [],
-            'bitcoin_addresses': [],
-            'file_paths': [],
-            'mac_addresses': [],
-            'api_keys': [],
-            'aws_keys': [],
-            'passwords': []
-        }
+        results = {name: [] for name in self.registry.categories()}
 
         try:
-            # Find all pattern types
-            results['emails'] = list(set(re.findall(self.EMAIL_PATTERN, text, re.IGNORECASE)))
-            results['phone_numbers'] = list(set(['-'.join(match) for match in re.findall(self.PHONE_PATTERN, text)]))
-            results['credit_cards'] = list(set(re.findall(self.CREDIT_CARD_PATTERN, text)))
-            results['ssn_numbers'] = list(set(re.findall(self.SSN_PATTERN, text)))
-            results['urls'] = list(set(re.findall(self.URL_PATTERN, text, re.IGNORECASE)))
-            results['ip_addresses'] = list(set(re.findall(self.IP_PATTERN, text)))
-            results['bitcoin_addresses'] = list(set(re.findall(self.BITCOIN_PATTERN, text)))
-            results['file_paths'] = list(set(re.findall(self.FILE_PATH_PATTERN, text)))
-            results['mac_addresses'] = list(set(re.findall(self.MAC_PATTERN, text)))
-            results['api_keys'] = list(set(re.findall(self.API_KEY_PATTERN, text, re.IGNORECASE)))
-            results['aws_keys'] = list(set(re.findall(self.AWS_KEY_PATTERN, text)))
-            results['passwords'] = list(set(re.findall(self.PASSWORD_PATTERN, text, re.IGNORECASE)))
+            # One prefilter walk, then each compiled pattern runs over the candidate windows
+            results = self.get_scanner().scan(text)
+
+            # Phone matches come back as digit groups - join them for display
+            if 'phone_numbers' in results:
+                results['phone_numbers'] = list(dict.fromkeys('-'.join(match) for match in results['phone_numbers']))
 
         except Exception as e:
             print(f"Error finding patterns: {str(e)}")
@@ -125,25 +111,23 @@ class PatternLibrary:
         """Generate a comprehensive report of all patterns found"""
         patterns = self.find_all_patterns(text)
 
-        report = "SHADOWTRACE PATTERN ANALYSIS REPORT\n"
-        report += "=" * 50 + "\n\n"
+        lines = ["SHADOWTRACE PATTERN ANALYSIS REPORT", "=" * 50, ""]
 
         total_patterns = sum(len(matches) for matches in patterns.values())
-        report += f"Total Suspicious Patterns Found: {total_patterns}\n\n"
+        lines += [f"Total Suspicious Patterns Found: {total_patterns}", ""]
 
         for pattern_type, matches in patterns.items():
             if matches:
-                report += f"{pattern_type.replace('_', ' ').title()}: {len(matches)} found\n"
-                for match in matches[:5]:  # Show first 5 matches
-                    report += f"  - {match}\n"
+                lines.append(f"{pattern_type.replace('_', ' ').title()}: {len(matches)} found")
+                lines.extend(f"  - {match}" for match in matches[:5])  # Show first 5 matches
                 if len(matches) > 5:
-                    report += f"  ... and {len(matches) - 5} more\n"
-                report += "\n"
+                    lines.append(f"  ... and {len(matches) - 5} more")
+                lines.append("")
 
         if total_patterns == 0:
-            report += "No suspicious patterns detected.\n"
+            lines.append("No suspicious patterns detected.")
 
-        return report
+        return "\n".join(lines) + "\n"
 
 
 def test_patterns():
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Profiling - Opt-in stage timers, per-rule costs and hooks for metrics exporters
+Author: Your Name
+Version: 1.0
+"""
+
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+
+# Set to 1 to profile every analyzer in this process (and in batch workers)
+PROFILE_ENV = "SHADOWTRACE_PROFILE"
+
+# The process-wide profiler handed out by profiler_from_env()
+_env_profiler = None
+
+
+class ScanProfile:
+    """Stage timers and per-rule costs of one document
+
+    Stages are timed with mark(): each call charges the time since the
+    previous mark to the named stage, so instrumenting code costs one
+    perf_counter() call per stage. Rule seconds come from the RuleBudget
+    that already times every pattern call. Profiles of document pieces
+    (chunks, file ranges) merge by adding up.
+    """
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.stages = {}
+        self.rule_seconds = {}
+        self.rule_matches = {}
+        self.over_budget = []
+        self.errors = []
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str):
+        """Charge the time since the previous mark to `stage`"""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def skip(self):
+        """Start the next stage from now, without charging the time since the last mark"""
+        self._last = time.perf_counter()
+
+    def add_rules(self, budget):
+        """Add the per-rule pattern time a RuleBudget measured, and the rules it switched off"""
+        for name, seconds in budget.spent.items():
+            self.rule_seconds[name] = self.rule_seconds.get(name, 0.0) + seconds
+        self._add_over_budget(budget.exceeded)
+
+    def _add_over_budget(self, names: Iterable[str]):
+        for name in names:
+            if name not in self.over_budget:
+                self.over_budget.append(name)
+
+    def set_matches(self, patterns: Dict[str, List[Any]]):
+        """Record the unique match count of every rule"""
+        self.rule_matches = {name: len(matches) for name, matches in patterns.items()}
+
+    def add_error(self, stage: str, error: Exception):
+        """Note an exception that a stage caught and printed"""
+        self.errors.append(f"{stage}: {error}")
+
+    def merge(self, other: 'ScanProfile'):
+        """Fold in the profile of another piece of the same document"""
+        self.size += other.size
+        for stage, seconds in other.stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        for name, seconds in other.rule_seconds.items():
+            self.rule_seconds[name] = self.rule_seconds.get(name, 0.0) + seconds
+        self._add_over_budget(other.over_budget)
+        self.errors.extend(other.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form, as it appears in result['profile']"""
+        names = list(self.rule_matches) + [name for name in self.rule_seconds if name not in self.rule_matches]
+        return {
+            'bytes': self.size,
+            'seconds': round(sum(self.stages.values()), 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+            'rules': {
+                name: {'seconds': round(self.rule_seconds.get(name, 0.0), 6),
+                       'matches': self.rule_matches.get(name, 0)}
+                for name in names
+            },
+            'rules_over_budget': list(self.over_budget),
+            'errors': list(self.errors)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScanProfile':
+        """Rebuild a profile from to_dict() output"""
+        profile = cls(data.get('bytes', 0))
+        profile.stages = dict(data.get('stages', {}))
+        profile.rule_seconds = {name: rule['seconds'] for name, rule in data.get('rules', {}).items()}
+        profile.rule_matches = {name: rule['matches'] for name, rule in data.get('rules', {}).items()}
+        profile.over_budget = list(data.get('rules_over_budget', []))
+        profile.errors = list(data.get('errors', []))
+        return profile
+
+    # Pickle without the timer state, so worker profiles travel as plain data
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__dict__.update(ScanProfile.from_dict(state).__dict__)
+
+
+class Profiler:
+    """Collects finished document profiles and passes each one to hooks
+
+    Attach one to an analyzer (SuspiciousPatternAnalyzer(profiler=...)) to
+    turn profiling on; without it the analyzer does no extra timing at all.
+    A hook is any callable taking the profile dict, e.g. a metrics exporter.
+    """
+
+    def __init__(self, hooks: Iterable[Callable[[Dict[str, Any]], None]] = ()):
+        self.hooks = list(hooks)
+        self.documents = 0
+        self.size = 0
+        self.stages = Counter()
+        self.rule_seconds = Counter()
+        self.rule_matches = Counter()
+        self.errors = Counter()
+
+    def add_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """Call `hook(profile_dict)` for every document finished from now on"""
+        self.hooks.append(hook)
+
+    def start(self, size: int = 0) -> ScanProfile:
+        """Begin timing one document"""
+        return ScanProfile(size)
+
+    def record(self, profile: ScanProfile) -> Dict[str, Any]:
+        """Add a finished document to the totals, run the hooks and return its dict"""
+        data = profile.to_dict()
+        self.documents += 1
+        self.size += profile.size
+        self.stages.update(profile.stages)
+        self.rule_seconds.update(profile.rule_seconds)
+        self.rule_matches.update(profile.rule_matches)
+        for error in profile.errors:
+            self.errors[error.split(':', 1)[0]] += 1
+
+        for hook in self.hooks:
+            try:
+                hook(data)
+            except Exception as e:
+                print(f"Error in profiling hook: {str(e)}")
+        return data
+
+    def add_error(self, stage: str, error: Exception):
+        """Count an error caught outside a document profile"""
+        self.errors[stage] += 1
+
+    def totals(self) -> Dict[str, Any]:
+        """Totals over every recorded document"""
+        return {
+            'documents': self.documents,
+            'bytes': self.size,
+            'seconds': round(sum(self.stages.values()), 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stages.most_common()},
+            'rules': {name: {'seconds': round(seconds, 6), 'matches': self.rule_matches[name]}
+                      for name, seconds in self.rule_seconds.most_common()},
+            'errors': dict(self.errors)
+        }
+
+    def report(self) -> str:
+        """Readable summary: where the time went, stage by stage and rule by rule"""
+        total = sum(self.stages.values())
+        megabytes = self.size / (1024 * 1024)
+        speed = f" ({megabytes / total:.1f} MB/s)" if total > 0 else ""
+        lines = [f"Profile: {self.documents} document(s), {megabytes:.2f} MB in {total:.3f}s{speed}", "Stages:"]
+
+        for stage, seconds in self.stages.most_common():
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"  {stage:<18}{seconds:>9.3f}s {share:>6.1f}%")
+
+        rule_total = sum(self.rule_seconds.values())
+        if self.rule_seconds:
+            lines.append("Rules (regex time):")
+            for name, seconds in self.rule_seconds.most_common():
+                share = seconds / rule_total * 100 if rule_total else 0.0
+                lines.append(f"  {name:<18}{seconds:>9.3f}s {share:>6.1f}% {self.rule_matches[name]:>8} matches")
+            pattern_time = self.stages.get('find_patterns', 0.0)
+            if pattern_time > rule_total:
+                lines.append(f"  {'(prefilter etc.)':<18}{pattern_time - rule_total:>9.3f}s")
+
+        if self.errors:
+            lines.append("Errors: " + ", ".join(f"{stage}={count}" for stage, count in self.errors.items()))
+        return "\n".join(lines)
+
+
+def profiler_from_env() -> Optional[Profiler]:
+    """The process-wide Profiler when SHADOWTRACE_PROFILE is set, else None
+
+    Every analyzer built without an explicit profiler shares this one, so a
+    single report covers all of them.
+    """
+    global _env_profiler
+    if os.environ.get(PROFILE_ENV, "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    if _env_profiler is None:
+        _env_profiler = Profiler()
+    return _env_profiler
+
+
+# Test function for development
+def test_profiling():
+    """Profile a small analysis and check it gives the same result as an unprofiled one"""
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    test_text = """
+    Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+    My credit card number is 4532-1234-5678-9012. Please transfer money to my
+    Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+    You can visit https://example.com for more info.
+    """ * 2000
+
+    seen = []
+    profiler = Profiler(hooks=[seen.append])
+    profiled = SuspiciousPatternAnalyzer(profiler=profiler).analyze(test_text)
+    plain = SuspiciousPatternAnalyzer().analyze(test_text)
+
+    profile = profiled.pop('profile')
+    print(f"Same result as unprofiled: {profiled == plain}")
+    print(f"Hook called: {len(seen) == 1 and seen[0] == profile}")
+    print(profiler.report())
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_profiling()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Redaction - Streaming writer that copies text with every finding masked
+Author: Your Name
+Version: 1.0
+"""
+
+import hashlib
+import io
+import os
+import re
+import sys
+from typing import Dict, List, Tuple, Any, Iterable, Optional, TextIO
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from scanner import RuleBudget
+    from streaming import DEFAULT_CHUNK_SIZE, DEFAULT_OVERLAP
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    sys.exit(1)
+
+
+# How a finding is rewritten:
+#   mask  - every character except line breaks becomes MASK_CHAR
+#   last4 - letters and digits become MASK_CHAR except the last four; separators stay
+#   hash  - [category:first 48 bits of sha256(salt + value)], the same for equal values
+#   label - [category]
+#   keep  - left as it is
+STYLES = ('mask', 'last4', 'hash', 'label', 'keep')
+
+# Style of every category not named in the style spec
+DEFAULT_STYLE = 'mask'
+
+# Per-category defaults; a style spec overrides them
+DEFAULT_STYLES = {'credit_cards': 'last4', 'emails': 'hash'}
+
+MASK_CHAR = '*'
+
+# Salt for the hash style; set it so tokens cannot be matched against hashes of guessed values
+SALT_ENV = "SHADOWTRACE_REDACT_SALT"
+
+# Hash tokens spell each hex digit as a letter (0 -> a ... f -> p), so no
+# run of digits in a token can look like a phone number or card again
+HASH_LETTERS = str.maketrans('0123456789abcdef', 'abcdefghijklmnop')
+
+# Replacements are cached per value; the cache is emptied when it reaches this size
+REPLACEMENT_CACHE_SIZE = 65536
+
+# Output files are written through a buffer of this size
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Everything but line breaks, so masked logs keep their line structure
+MASKABLE = re.compile(r'[^\r\n]')
+
+
+def parse_styles(spec: Optional[str]) -> Dict[str, str]:
+    """Parse "credit_cards=last4,emails=hash,*=label" ('*' sets the default style)
+
+    The result starts from DEFAULT_STYLES; raises ValueError for an unknown style.
+    """
+    styles = dict(DEFAULT_STYLES)
+    styles['*'] = DEFAULT_STYLE
+    if not spec:
+        return styles
+
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        category, separator, style = item.partition('=')
+        category, style = category.strip(), style.strip().lower()
+        if not separator or not category:
+            raise ValueError(f"expected CATEGORY=STYLE, got '{item}'")
+        if style not in STYLES:
+            raise ValueError(f"unknown redaction style '{style}' (choose from {', '.join(STYLES)})")
+        styles[category] = style
+    return styles
+
+
+def mask_all(value: str) -> str:
+    """Mask every character except line breaks"""
+    return MASKABLE.sub(MASK_CHAR, value)
+
+
+def mask_keep_last(value: str, keep: int = 4) -> str:
+    """Mask letters and digits except the last `keep`: 4532-1234-5678-9012 -> ****-****-****-9012"""
+    remaining = sum(1 for ch in value if ch.isalnum())
+    characters = []
+    for ch in value:
+        if ch.isalnum():
+            characters.append(ch if remaining <= keep else MASK_CHAR)
+            remaining -= 1
+        else:
+            characters.append(ch)
+    return ''.join(characters)
+
+
+class Redactor:
+    """Copies text to an output stream with every pattern hit replaced
+
+    Hits come from the same scanner as the analysis (with its validators),
+    so exactly the findings of a scan are redacted. Input is processed in
+    chunks like streaming.ChunkedScanner: each round writes up to the last
+    line break before the final `overlap` characters of the buffer and keeps
+    the rest, so memory stays at about one chunk however big the input is.
+    A hit that crosses the cut moves the cut to its end.
+
+    A cut inside a token (a long line without whitespace, or the end of a
+    hit) would hide the rest of that token from the prefilter, whose
+    windows only start after whitespace. So after such a cut the next round
+    keeps max_match_length characters of context and scans from the start
+    of the buffer, which the scanner treats as a window start: the same
+    view a segment of a hostile line gets. Only hits past the cut count.
+
+    Each round builds a list of slices and replacements and hands it to one
+    writelines() call, so the output is never assembled by concatenation.
+    Overlapping hits (a URL containing an email, say) are merged and the
+    merged span is fully masked unless all of them share one category.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+                 styles: Optional[Dict[str, str]] = None, salt: Optional[str] = None,
+                 overlap: int = DEFAULT_OVERLAP):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.scanner = self.analyzer.scanner
+        self.styles = styles if styles is not None else parse_styles(None)
+        self.salt = salt if salt is not None else os.environ.get(SALT_ENV, "")
+        self.overlap = overlap
+        self._replacements = {}
+
+    def style_for(self, category: str) -> str:
+        """Style used for one category"""
+        return self.styles.get(category, self.styles.get('*', DEFAULT_STYLE))
+
+    def replacement(self, category: str, value: str) -> str:
+        """Redacted form of one matched value (cached)"""
+        key = (category, value)
+        replaced = self._replacements.get(key)
+        if replaced is not None:
+            return replaced
+
+        style = self.style_for(category)
+        if style == 'keep':
+            replaced = value
+        elif style == 'last4':
+            replaced = mask_keep_last(value)
+        elif style == 'hash':
+            digest = hashlib.sha256((self.salt + value).encode('utf-8', 'surrogateescape')).hexdigest()
+            replaced = f"[{category}:{digest[:12].translate(HASH_LETTERS)}]"
+        elif style == 'label':
+            replaced = f"[{category}]"
+        else:
+            replaced = mask_all(value)
+
+        if len(self._replacements) >= REPLACEMENT_CACHE_SIZE:
+            self._replacements.clear()
+        self._replacements[key] = replaced
+        return replaced
+
+    def _hits(self, buffer: str, position: int, budget: RuleBudget,
+              restart: bool = False) -> List[Tuple[int, int, str]]:
+        """(start, end, category) of every hit in buffer[position:], sorted
+
+        With restart=True buffer[:position] is scanned as well, as context
+        for a token that continues past position, and hits ending before
+        position are dropped. Rules whose value is one capture group
+        (passwords, api_keys) only have that group redacted, so "password="
+        stays readable.
+        """
+        hits = []
+        for category, value, start, end in self.scanner.iter_matches(buffer, 0 if restart else position,
+                                                                     budget=budget):
+            if end <= position:
+                continue
+            if isinstance(value, str) and value and len(value) < end - start:
+                inner = buffer.rfind(value, start, end)
+                if inner != -1:
+                    start, end = inner, inner + len(value)
+            hits.append((start, end, category))
+        hits.sort()
+        return hits
+
+    def _write_region(self, buffer: str, position: int, cut: int, hits: List[Tuple[int, int, str]],
+                      output: TextIO, counts: Dict[str, int]):
+        """Write buffer[position:cut] with the hits replaced, in one writelines() call"""
+        pieces = []
+        written = position
+        index = 0
+        while index < len(hits):
+            start, end, category = hits[index]
+            index += 1
+            if end <= written:
+                continue
+            start = max(start, written)
+
+            # Merge every hit that overlaps this one
+            mixed = False
+            while index < len(hits) and hits[index][0] < end:
+                if hits[index][2] != category:
+                    mixed = True
+                end = max(end, hits[index][1])
+                index += 1
+
+            pieces.append(buffer[written:start])
+            value = buffer[start:end]
+            pieces.append(mask_all(value) if mixed else self.replacement(category, value))
+            counts[category] = counts.get(category, 0) + 1
+            written = end
+
+        pieces.append(buffer[written:cut])
+        output.writelines(pieces)
+
+    def redact_chunks(self, chunks: Iterable[str], output: TextIO) -> Dict[str, Any]:
+        """Write the redacted text of an iterable of chunks to output; return statistics
+
+        The statistics give the characters read, the number of replacements
+        per category and 'rules_over_budget': rules that stopped matching
+        because they ran out of time, so their later hits were NOT redacted.
+        """
+        budget = RuleBudget()
+        counts = {category: 0 for category in self.analyzer.CATEGORIES}
+        buffer = ''
+        position = 0     # buffer[:position] is context that has been written already
+        restart = False  # whether the last cut split a token
+        size = 0
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            keep = min(position, self.scanner.max_match_length if restart else 1)
+            buffer = buffer[position - keep:] + chunk
+            position = keep
+            limit = len(buffer) - self.overlap
+            if limit <= position:
+                continue
+
+            # Cut after a line break (or at least on whitespace) so no token is split
+            cut = buffer.rfind('\n', position, limit) + 1
+            if cut <= position:
+                cut = max(buffer.rfind(' ', position, limit), buffer.rfind('\t', position, limit)) + 1
+            if cut <= position:
+                cut = limit
+
+            hits = [hit for hit in self._hits(buffer, position, budget, restart) if hit[0] < cut]
+            if hits:
+                cut = max(cut, max(end for _, end, _ in hits))
+            self._write_region(buffer, position, cut, hits, output, counts)
+            restart = not buffer[cut - 1].isspace() and (cut == len(buffer) or not buffer[cut].isspace())
+            position = cut
+
+        if len(buffer) > position:
+            self._write_region(buffer, position, len(buffer), self._hits(buffer, position, budget, restart),
+                               output, counts)
+
+        return {
+            'chars_scanned': size,
+            'redacted': sum(counts.values()),
+            'categories': counts,
+            'rules_over_budget': list(budget.exceeded)
+        }
+
+    def redact_text(self, text: str) -> str:
+        """Redacted copy of a string"""
+        output = io.StringIO()
+        self.redact_chunks([text], output)
+        return output.getvalue()
+
+    def redact_file(self, path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """Write a redacted copy of a file ('-' for standard input/output)
+
+        Undecodable bytes and line endings are carried over unchanged.
+        """
+        source = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', errors='surrogateescape',
+                                                      newline='')
+        if output_path == '-':
+            target = sys.stdout
+        else:
+            target = open(output_path, 'w', encoding='utf-8', errors='surrogateescape', newline='',
+                          buffering=WRITE_BUFFER_SIZE)
+
+        try:
+            return self.redact_chunks(iter(lambda: source.read(chunk_size), ''), target)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not sys.stdout:
+                target.close()
+            else:
+                target.flush()
+
+
+def benchmark_redaction(size_mb: int = 64):
+    """Compare redacting a file with scanning it for hits only"""
+    import tempfile
+    import time
+
+    try:
+        from scanner import generate_sample_log
+        from streaming import iter_file_chunks
+    except ImportError:
+        print("Error: scanner.py not found. Make sure all files are in the same directory.")
+        return
+
+    analyzer = SuspiciousPatternAnalyzer()
+    redactor = Redactor(analyzer)
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'sample.log')
+        target = os.path.join(directory, 'redacted.log')
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write(generate_sample_log(size_mb * 1024 * 1024))
+
+        start = time.perf_counter()
+        hits = sum(1 for chunk in iter_file_chunks(source) for _ in analyzer.scanner.iter_matches(chunk))
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = redactor.redact_file(source, target)
+        redact_time = time.perf_counter() - start
+
+        leftover = sum(1 for chunk in iter_file_chunks(target) for category, _, _, _
+                       in analyzer.scanner.iter_matches(chunk) if redactor.style_for(category) != 'keep')
+        size_change = os.path.getsize(target) - os.path.getsize(source)
+
+    print(f"{size_mb} MB sample log, {hits:,} hits")
+    print(f"Scan only : {scan_time:.2f}s ({size_mb / scan_time:.1f} MB/s)")
+    print(f"Redact    : {redact_time:.2f}s ({size_mb / redact_time:.1f} MB/s), "
+          f"{stats['redacted']:,} replacements")
+    print(f"Hits left in the redacted copy: {leftover}; size change {size_change:+,} bytes")
+
+
+# Test function for development
+def test_redact():
+    """Redact a sample in each style and check chunked output matches whole-text output"""
+    test_text = """Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+My credit card number is 4532-0151-1283-0366. Please transfer money to my
+Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa password=hunter2hunter2
+You can visit https://example.com for more info. Mail john.doe@example.com again.
+"""
+    analyzer = SuspiciousPatternAnalyzer()
+    redactor = Redactor(analyzer)
+
+    print("Redaction Test Results:")
+    print("=======================")
+    print(redactor.redact_text(test_text))
+
+    labelled = Redactor(analyzer, parse_styles("*=label,credit_cards=mask"))
+    print(labelled.redact_text(test_text))
+
+    # Chunk boundaries must not change the output
+    big_text = test_text * 2000
+    whole = Redactor(analyzer).redact_text(big_text)
+    output = io.StringIO()
+    stats = Redactor(analyzer, overlap=256).redact_chunks(
+        (big_text[i:i + 1000] for i in range(0, len(big_text), 1000)), output)
+    print(f"Chunked output identical: {output.getvalue() == whole}")
+    print(f"Replacements: {stats['redacted']} {stats['categories']}")
+    print(f"Hits left after redaction: {len(list(analyzer.scanner.iter_matches(whole)))}")
+
+    # Lines long enough to be scanned in segments must be fully redacted too
+    long_lines = ''.join('x' * pad + ' john.doe@example.com ' + 'y' * pad + ' pass=hunter2hunter2\n'
+                         for pad in (1000, 2000, 2020, 2040, 4090))
+    redacted = redactor.redact_text(long_lines)
+    print(f"Long lines leak: {'john.doe' in redacted or 'hunter2' in redacted}")
+
+    # One whitespace-free line (minified JSON) many chunks long: every chunk cut splits a token
+    minified = '[' + ','.join(f'{{"id":{n},"mail":"user{n}@example.com","note":"pass={n:08d}x"}}'
+                              for n in range(1500)) + ']'
+    output = io.StringIO()
+    Redactor(analyzer, overlap=256).redact_chunks((minified[i:i + 1000] for i in range(0, len(minified), 1000)),
+                                                  output)
+    print(f"Minified line hits left: {len(list(analyzer.scanner.iter_matches(output.getvalue())))} "
+          f"(identical to whole-text: {output.getvalue() == redactor.redact_text(minified)})")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        benchmark_redaction(int(sys.argv[1]))
+    else:
+        test_redact()
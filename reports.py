@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Report Writers - Streaming text, JSON, JSON Lines, CSV and SARIF output
+Author: Your Name
+Version: 1.0
+"""
+
+import csv
+import json
+import os
+import sys
+from typing import Dict, List, Tuple, Any, Iterable, Optional, TextIO
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    sys.exit(1)
+
+
+# Report files are written through a buffer of this size
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Columns of a per-finding record (JSON Lines keys, CSV header)
+FINDING_FIELDS = ['source', 'category', 'value', 'start', 'end', 'line']
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# SARIF level of a rule by its risk weight
+SARIF_LEVELS = [(25, 'error'), (10, 'warning'), (0, 'note')]
+
+
+def format_value(value: Any) -> str:
+    """Matched value as one string (multi-group hits such as phone numbers are joined with '-')"""
+    return "-".join(value) if isinstance(value, tuple) else str(value)
+
+
+def format_text_line(source: str, result: dict) -> str:
+    """One plain-text summary line per scanned input"""
+    found = ", ".join(f"{name}={len(items)}" for name, items in result['patterns'].items() if items)
+    line = f"{source}: risk {result['risk_score']}% | sentiment {result['sentiment']} | {found or 'no patterns'}"
+    if result.get('rules_over_budget'):
+        line += f" | over budget: {', '.join(result['rules_over_budget'])}"
+    return line
+
+
+def locate_hits(text: str, analyzer: SuspiciousPatternAnalyzer) -> List[Tuple[str, Any, int, int, int]]:
+    """(category, value, start, end, line) of every hit in a string, in text order"""
+    hits = sorted(analyzer.scanner.iter_matches(text), key=lambda hit: (hit[2], hit[3]))
+    located = []
+    line = 1
+    previous = 0
+    for category, value, start, end in hits:
+        line += text.count('\n', previous, start)
+        previous = start
+        located.append((category, value, start, end, line))
+    return located
+
+
+class ReportWriter:
+    """Writes scan results one record at a time as they arrive
+
+    A writer emits either one record per document (write_document) or one
+    per finding (write_finding); `findings` says which the caller asked
+    for. Nothing is collected in memory: each record goes straight to the
+    (buffered) output, and close() writes whatever closing syntax the
+    format needs. Offsets are byte offsets for files and character offsets
+    for text; `unit` says which.
+    """
+
+    def __init__(self, output: TextIO, analyzer: SuspiciousPatternAnalyzer, findings: bool = False,
+                 owns_output: bool = False):
+        self.output = output
+        self.analyzer = analyzer
+        self.categories = list(analyzer.CATEGORIES)
+        self.findings = findings
+        self.owns_output = owns_output
+        self.documents_written = 0
+        self.findings_written = 0
+
+    def write_document(self, source: str, result: Dict[str, Any]):
+        """Write the summary record of one scanned document"""
+        self.documents_written += 1
+        self._document(source, result)
+
+    def write_finding(self, source: str, category: str, value: Any, start: Optional[int] = None,
+                      end: Optional[int] = None, line: Optional[int] = None, unit: str = 'byte'):
+        """Write one hit"""
+        self.findings_written += 1
+        self._finding(source, category, format_value(value), start, end, line, unit)
+
+    def write_text_findings(self, source: str, text: str):
+        """Write every hit of a string, with line numbers"""
+        for category, value, start, end, line in locate_hits(text, self.analyzer):
+            self.write_finding(source, category, value, start, end, line, unit='char')
+
+    def flush(self):
+        self.output.flush()
+
+    def close(self):
+        """Finish the report and flush it (the output is closed only if the writer opened it)"""
+        self._finish()
+        if self.owns_output:
+            self.output.close()
+        else:
+            self.output.flush()
+
+    def _document(self, source: str, result: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _finding(self, source: str, category: str, value: str, start: Optional[int], end: Optional[int],
+                 line: Optional[int], unit: str):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+
+class TextReportWriter(ReportWriter):
+    """One readable line per document or finding
+
+    Findings read "source:offset: category: value", plus the line number
+    when it is known; archive members give "archive!member:offset".
+    """
+
+    def _document(self, source, result):
+        self.output.write(format_text_line(source, result) + "\n")
+
+    def _finding(self, source, category, value, start, end, line, unit):
+        where = f":{start}" if start is not None else ""
+        suffix = f" (line {line})" if line is not None else ""
+        self.output.write(f"{source}{where}: {category}: {value}{suffix}\n")
+
+
+class JsonReportWriter(ReportWriter):
+    """A single JSON array, written element by element"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._separator = "[\n"
+
+    def _element(self, record: Dict[str, Any]):
+        text = json.dumps(record, indent=2)
+        self.output.write(self._separator + "  " + text.replace("\n", "\n  "))
+        self._separator = ",\n"
+
+    def _document(self, source, result):
+        self._element({'source': source, **result})
+
+    def _finding(self, source, category, value, start, end, line, unit):
+        self._element(dict(zip(FINDING_FIELDS, (source, category, value, start, end, line))))
+
+    def _finish(self):
+        self.output.write("[]\n" if self._separator == "[\n" else "\n]\n")
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """One JSON object per line"""
+
+    def _document(self, source, result):
+        self.output.write(json.dumps({'source': source, **result}) + "\n")
+
+    def _finding(self, source, category, value, start, end, line, unit):
+        self.output.write(json.dumps(dict(zip(FINDING_FIELDS, (source, category, value, start, end, line)))) + "\n")
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV with a header row
+
+    Document rows hold the risk score, risk level, sentiment and the number
+    of unique hits per category. Finding rows hold FINDING_FIELDS.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer = csv.writer(self.output)
+        if self.findings:
+            self.writer.writerow(FINDING_FIELDS)
+        else:
+            self.writer.writerow(['source', 'risk_score', 'risk_level', 'sentiment'] + self.categories
+                                 + ['rules_over_budget'])
+
+    def _document(self, source, result):
+        patterns = result['patterns']
+        self.writer.writerow([source, result['risk_score'], self.analyzer.get_risk_level(result['risk_score']),
+                              result['sentiment']]
+                             + [len(patterns.get(category, ())) for category in self.categories]
+                             + [' '.join(result.get('rules_over_budget', ()))])
+
+    def _finding(self, source, category, value, start, end, line, unit):
+        self.writer.writerow([source, category, value, start, end, line])
+
+
+class SarifReportWriter(ReportWriter):
+    """SARIF 2.1.0 log with one run; results are streamed into its results array
+
+    Every enabled rule becomes a reportingDescriptor, with a level taken
+    from its risk weight. A finding becomes one result located at its
+    line and byte/character range; a document becomes one result per
+    category it has hits in.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        rules = [rule for rule in self.analyzer.registry.rules() if rule.category in self.categories]
+        self.rule_index = {rule.category: index for index, rule in enumerate(rules)}
+        self.levels = {rule.category: sarif_level(rule.weight) for rule in rules}
+        driver = {
+            'name': "ShadowTrace",
+            'version': "1.0",
+            'rules': [
+                {
+                    'id': rule.category,
+                    'name': rule.category,
+                    'shortDescription': {'text': rule.description or rule.category},
+                    'defaultConfiguration': {'level': self.levels[rule.category]},
+                    'properties': {'weight': rule.weight, 'pack': rule.pack}
+                }
+                for rule in rules
+            ]
+        }
+
+        # Everything up to the results array is written now; close() ends it
+        header = json.dumps({'$schema': SARIF_SCHEMA, 'version': "2.1.0",
+                             'runs': [{'tool': {'driver': driver}, 'columnKind': 'unicodeCodePoints',
+                                       'results': []}]})
+        self.output.write(header[:-len("]}]}")] + "\n")
+        self._separator = ""
+
+    def _result(self, category: str, message: str, source: str, region: Optional[Dict[str, int]] = None,
+                properties: Optional[Dict[str, Any]] = None):
+        location = {'artifactLocation': {'uri': artifact_uri(source)}}
+        if region:
+            location['region'] = region
+        result = {
+            'ruleId': category,
+            'ruleIndex': self.rule_index.get(category, -1),
+            'level': self.levels.get(category, 'warning'),
+            'message': {'text': message},
+            'locations': [{'physicalLocation': location}]
+        }
+        if properties:
+            result['properties'] = properties
+        self.output.write(self._separator + json.dumps(result))
+        self._separator = ",\n"
+
+    def _document(self, source, result):
+        for category, matches in result['patterns'].items():
+            if matches:
+                self._result(category, f"{len(matches)} unique {category} found", source,
+                             properties={'count': len(matches), 'risk_score': result['risk_score']})
+
+    def _finding(self, source, category, value, start, end, line, unit):
+        region = {}
+        if line is not None:
+            region['startLine'] = line
+        if start is not None and end is not None:
+            region[f'{unit}Offset'] = start
+            region[f'{unit}Length'] = end - start
+        self._result(category, f"{category}: {value}", source, region)
+
+    def _finish(self):
+        self.output.write("\n]}]}\n")
+
+
+def sarif_level(weight: int) -> str:
+    """SARIF level (error, warning, note) for a rule's risk weight"""
+    for minimum, level in SARIF_LEVELS:
+        if weight >= minimum:
+            return level
+    return 'note'
+
+
+def artifact_uri(source: str) -> str:
+    """SARIF artifact URI: file:// for absolute paths, the relative path (with '/') otherwise"""
+    if source.startswith('<') or not source:
+        return source.strip('<>') or "stdin"
+    if os.path.isabs(source):
+        from pathlib import Path
+        return Path(source).as_uri()
+    return source.replace(os.sep, '/')
+
+
+# Format name -> writer class
+REPORT_WRITERS = {
+    'text': TextReportWriter,
+    'json': JsonReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'csv': CsvReportWriter,
+    'sarif': SarifReportWriter,
+}
+
+REPORT_FORMATS = list(REPORT_WRITERS)
+
+
+def open_report(report_format: str, path: Optional[str], analyzer: SuspiciousPatternAnalyzer,
+                findings: bool = False) -> ReportWriter:
+    """Writer for a format, writing to path (buffered) or to standard output when path is None or '-'"""
+    writer_class = REPORT_WRITERS[report_format]
+    if path is None or path == '-':
+        return writer_class(sys.stdout, analyzer, findings)
+
+    # newline='' lets the csv module write its own line endings
+    output = open(path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE)
+    return writer_class(output, analyzer, findings, owns_output=True)
+
+
+def write_report(report_format: str, path: Optional[str], documents: Iterable[Tuple[str, Dict[str, Any]]],
+                 analyzer: Optional[SuspiciousPatternAnalyzer] = None) -> int:
+    """Write (source, result) pairs as they are produced; returns the number written"""
+    writer = open_report(report_format, path, analyzer or SuspiciousPatternAnalyzer())
+    try:
+        for source, result in documents:
+            writer.write_document(source, result)
+    finally:
+        writer.close()
+    return writer.documents_written
+
+
+# Test function for development
+def test_reports():
+    """Write a sample in every format and parse the machine-readable ones back"""
+    import io
+
+    analyzer = SuspiciousPatternAnalyzer()
+    test_text = """Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+My credit card number is 4532-0151-1283-0366. Please transfer money to my
+Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+You can visit https://example.com for more info.
+"""
+    result = analyzer.analyze(test_text)
+
+    print("Report Writers Test Results:")
+    print("============================")
+    for report_format in REPORT_FORMATS:
+        for findings in (False, True):
+            output = io.StringIO()
+            writer = REPORT_WRITERS[report_format](output, analyzer, findings)
+            if findings:
+                writer.write_text_findings("sample.txt", test_text)
+            else:
+                writer.write_document("sample.txt", result)
+                writer.write_document("copy.txt", result)
+            writer.close()
+            text = output.getvalue()
+
+            if report_format in ('json', 'sarif'):
+                parsed = json.loads(text)
+                count = len(parsed) if report_format == 'json' else len(parsed['runs'][0]['results'])
+            elif report_format == 'jsonl':
+                count = len([json.loads(line) for line in text.splitlines()])
+            elif report_format == 'csv':
+                count = len(list(csv.reader(io.StringIO(text)))) - 1
+            else:
+                count = len(text.splitlines())
+            kind = "findings" if findings else "documents"
+            print(f"  {report_format:<6} {kind:<9}: {count} records, {len(text)} chars")
+
+    output = io.StringIO()
+    writer = SarifReportWriter(output, analyzer, findings=True)
+    writer.write_text_findings("sample.txt", test_text)
+    writer.close()
+    print(json.dumps(json.loads(output.getvalue())['runs'][0]['results'][0], indent=2))
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_reports()
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Rule Registry - Pattern packs loaded from JSON/YAML files
+Author: Your Name
+Version: 1.0
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+from scanner import PatternSpec
+
+
+# Packs shipped with ShadowTrace
+BUILTIN_RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+
+# Packs enabled when nothing else is configured
+DEFAULT_PACKS = ('core', 'secrets')
+
+# Environment overrides (inherited by worker processes):
+#   SHADOWTRACE_PACKS       comma-separated pack names to enable
+#   SHADOWTRACE_RULES_PATH  extra directories to look for packs in (os.pathsep separated)
+#   SHADOWTRACE_KEEP_INVALID  "1" keeps hits that fail their rule's validator
+PACKS_ENV = "SHADOWTRACE_PACKS"
+RULES_PATH_ENV = "SHADOWTRACE_RULES_PATH"
+KEEP_INVALID_ENV = "SHADOWTRACE_KEEP_INVALID"
+
+PACK_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+# Weight used when a rule does not set one (same default as calculate_pattern_risk)
+DEFAULT_WEIGHT = 5
+
+# One detection rule; `category` is also the key in result['patterns']
+Rule = namedtuple('Rule', ['category', 'pattern', 'flags', 'triggers', 'weight', 'validator', 'pack', 'description',
+                           'anchors', 'anchor_prefix', 'budget'])
+
+# Parsed packs, keyed by (path, mtime) so edited files are picked up again
+_PACK_CACHE = {}
+
+# Shared registries, keyed by their configuration
+_REGISTRY_CACHE = {}
+
+# Validator functions that rules can refer to by name
+VALIDATORS = {}
+
+
+def register_validator(name: str) -> Callable:
+    """Decorator that makes a function available to rules as "validator": name"""
+    def decorator(function: Callable[[str], bool]) -> Callable[[str], bool]:
+        VALIDATORS[name] = function
+        return function
+    return decorator
+
+
+# Separators a card number may contain (\s of the credit card pattern, ASCII)
+LUHN_SEPARATORS = b'-\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f '
+
+# Digit -> digit sum of twice that digit, as a bytes translation table
+LUHN_DOUBLED = bytes.maketrans(b'0123456789', b'0246813579')
+
+
+@register_validator('luhn')
+def luhn_valid(value) -> bool:
+    """Credit card checksum (Luhn algorithm); spaces and hyphens are ignored
+
+    ASCII input (str or bytes) is checked with two translate() calls and
+    two sums, without a Python-level step per digit.
+    """
+    if isinstance(value, str):
+        if not value.isascii():
+            return _luhn_valid_unicode(value)
+        value = value.encode('ascii')
+
+    digits = value.translate(None, LUHN_SEPARATORS)
+    if not digits.isdigit() or len(digits) < 13 or len(digits) > 19:
+        return False
+
+    # Every second digit from the right is doubled; subtract the ASCII '0' offsets at the end
+    total = sum(digits[-1::-2]) + sum(digits[-2::-2].translate(LUHN_DOUBLED)) - 48 * len(digits)
+    return total % 10 == 0
+
+
+def _luhn_valid_unicode(value: str) -> bool:
+    """Luhn for numbers written with non-ASCII digits (\\d matches any Unicode digit)"""
+    digits = re.sub(r'[-\s]', '', value)
+    if not digits.isdigit() or len(digits) < 13 or len(digits) > 19:
+        return False
+
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        n = int(digit)
+        if i % 2 == 1:  # Every second digit from right
+            n *= 2
+            if n > 9:
+                n = n // 10 + n % 10
+        total += n
+
+    return total % 10 == 0
+
+
+# A dotted quad whose octets are all 0-255 (leading zeros allowed, like int() does)
+IPV4_OCTET = r'0*(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+IPV4_VALID = re.compile(r'(?:{0}\.){{3}}{0}'.format(IPV4_OCTET))
+IPV4_VALID_BYTES = re.compile(IPV4_VALID.pattern.encode('ascii'))
+
+# SSA numbering rules: area not 000, 666 or 900-999, group not 00, serial not 0000
+SSN_VALID = re.compile(r'(?!000|666|9)\d{3}-?(?!00)\d{2}-?(?!0000)\d{4}')
+SSN_VALID_BYTES = re.compile(SSN_VALID.pattern.encode('ascii'))
+
+
+@register_validator('ipv4')
+def ipv4_valid(value) -> bool:
+    """Every octet of a dotted IPv4 address is in 0-255"""
+    if isinstance(value, bytes):
+        return IPV4_VALID_BYTES.fullmatch(value) is not None
+    if value.isascii():
+        return IPV4_VALID.fullmatch(value) is not None
+
+    parts = value.split('.')
+    return len(parts) == 4 and all(part.isdigit() and int(part) <= 255 for part in parts)
+
+
+@register_validator('ssn')
+def ssn_valid(value) -> bool:
+    """SSN that could have been issued: area not 000, 666 or 9xx, group not 00, serial not 0000"""
+    if isinstance(value, bytes):
+        return SSN_VALID_BYTES.fullmatch(value) is not None
+    return SSN_VALID.fullmatch(value) is not None
+
+
+def parse_flags(names: Iterable[str]) -> int:
+    """Turn ["IGNORECASE", ...] into re flag bits"""
+    flags = 0
+    for name in names or ():
+        flag = getattr(re, str(name).upper(), None)
+        if not isinstance(flag, re.RegexFlag):
+            raise ValueError(f"unknown regex flag {name!r}")
+        flags |= flag
+    return flags
+
+
+def load_pack(path: str) -> List[Rule]:
+    """Read and check one pack file (cached until the file changes)"""
+    key = (path, os.stat(path).st_mtime_ns)
+    if key in _PACK_CACHE:
+        return _PACK_CACHE[key]
+
+    with open(path, 'r', encoding='utf-8') as file:
+        if path.endswith('.json'):
+            data = json.load(file)
+        else:
+            # PyYAML is optional and slow to import - only YAML packs need it
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: PyYAML is required for YAML rule packs (pip install pyyaml)")
+            data = yaml.safe_load(file)
+
+    pack = data.get('pack') or os.path.splitext(os.path.basename(path))[0]
+    rules = []
+    for index, entry in enumerate(data.get('rules', [])):
+        try:
+            category = entry['category']
+            if not isinstance(category, str) or not category:
+                raise TypeError("'category' (a non-empty string)")
+            flags = parse_flags(entry.get('flags'))
+            re.compile(entry['pattern'], flags)  # fail on load, not on the first scan
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{path}: rule {index} of pack {pack!r} is missing {str(e)}")
+        except (ValueError, re.error) as e:
+            raise ValueError(f"{path}: rule {index} ({category}) of pack {pack!r}: {str(e)}")
+
+        validator = entry.get('validator')
+        if validator is not None and validator not in VALIDATORS:
+            raise ValueError(f"{path}: rule {index} uses unknown validator {validator!r}")
+
+        anchors = entry.get('anchors')
+        if anchors is not None and (not isinstance(anchors, list) or not all(isinstance(a, str) and a for a in anchors)):
+            raise ValueError(f"{path}: rule {index} anchors must be a list of non-empty strings")
+
+        # Windowed rules run on prefilter windows, never at anchor offsets
+        if entry.get('anchor_prefix') and entry.get('triggers') is not None:
+            raise ValueError(f"{path}: rule {index} ({category}) sets anchor_prefix, which only applies "
+                             f"to full-text rules (triggers: null)")
+
+        # Optional time budget in seconds per MB of input (see scanner.RuleBudget)
+        budget = entry.get('budget')
+        if budget is not None and (isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget <= 0):
+            raise ValueError(f"{path}: rule {index} budget must be a positive number of seconds per MB")
+
+        rules.append(Rule(
+            category=category,
+            pattern=entry['pattern'],
+            flags=flags,
+            triggers=entry.get('triggers'),
+            weight=entry.get('weight', DEFAULT_WEIGHT),
+            validator=validator,
+            pack=pack,
+            description=entry.get('description', ''),
+            anchors=tuple(anchors) if anchors else None,
+            anchor_prefix=bool(entry.get('anchor_prefix', False)),
+            budget=budget
+        ))
+
+    _PACK_CACHE[key] = rules
+    return rules
+
+
+class RuleRegistry:
+    """The set of detection rules from all enabled packs
+
+    Pack files are found by name in the built-in rules/ directory plus any
+    extra directories. Only enabled packs are ever read, and only on first
+    use. Compiling happens later still, when a scanner is requested, and
+    compiled scanners are shared process-wide. Packs are applied in order:
+    a later pack that defines an existing category replaces that rule in
+    place, so local packs can tune built-in rules.
+
+    Validators are handed to the scanner with the specs, so hits that fail
+    them are dropped during the scan. With keep_invalid the specs carry no
+    validators and every regex hit is reported.
+    """
+
+    def __init__(self, packs: Optional[Iterable[str]] = None, paths: Optional[Iterable[str]] = None,
+                 keep_invalid: bool = False):
+        self.packs = list(packs) if packs else list(DEFAULT_PACKS)
+        self.paths = list(paths or []) + [BUILTIN_RULES_DIR]
+        self.keep_invalid = keep_invalid
+        self._rules = None
+
+    def available_packs(self) -> Dict[str, str]:
+        """{pack name: file path} for every pack file on the search path (files are not read)"""
+        found = {}
+        for directory in self.paths:
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                name, extension = os.path.splitext(filename)
+                if extension in PACK_EXTENSIONS:
+                    found.setdefault(name, os.path.join(directory, filename))
+        return found
+
+    def rules(self) -> List[Rule]:
+        """All enabled rules in scan order (packs are loaded on first call)"""
+        if self._rules is None:
+            available = self.available_packs()
+            by_category = {}
+            for pack in self.packs:
+                if pack not in available:
+                    raise ValueError(f"rule pack {pack!r} not found (available: {', '.join(sorted(available))})")
+                for rule in load_pack(available[pack]):
+                    by_category[rule.category] = rule
+            self._rules = list(by_category.values())
+        return self._rules
+
+    def rule(self, category: str) -> Optional[Rule]:
+        """The rule for a category, or None if no enabled pack defines it"""
+        for rule in self.rules():
+            if rule.category == category:
+                return rule
+        return None
+
+    def categories(self) -> List[str]:
+        """Result keys of all enabled rules, in scan order"""
+        return [rule.category for rule in self.rules()]
+
+    def weights(self) -> Dict[str, int]:
+        """Risk weight per category (a fresh dict that callers may change)"""
+        return {rule.category: rule.weight for rule in self.rules()}
+
+    def specs(self, categories: Optional[Iterable[str]] = None) -> List[PatternSpec]:
+        """Scanner specs for the given categories (all enabled ones by default)"""
+        wanted = None if categories is None else set(categories)
+        return [
+            PatternSpec(rule.category, rule.pattern, rule.flags, rule.triggers, rule.anchors, rule.anchor_prefix,
+                        None if self.keep_invalid or rule.validator is None else VALIDATORS[rule.validator],
+                        rule.budget)
+            for rule in self.rules()
+            if wanted is None or rule.category in wanted
+        ]
+
+    def validator(self, category: str) -> Optional[Callable[[str], bool]]:
+        """The validator function configured for a category, if any"""
+        rule = self.rule(category)
+        if rule is None or rule.validator is None:
+            return None
+        return VALIDATORS[rule.validator]
+
+    def fingerprint(self) -> str:
+        """Hash of every enabled rule - changes when any pack content changes"""
+        state = [(rule.category, rule.pattern, int(rule.flags), rule.triggers, rule.weight, rule.validator,
+                  rule.anchors, rule.anchor_prefix, rule.budget) for rule in self.rules()]
+        state.append(self.keep_invalid)
+        return hashlib.sha256(json.dumps(state).encode('utf-8')).hexdigest()
+
+
+def get_registry(packs: Optional[Iterable[str]] = None, paths: Optional[Iterable[str]] = None,
+                 keep_invalid: Optional[bool] = None) -> RuleRegistry:
+    """Shared registry for a configuration; defaults come from the environment"""
+    if packs is None and os.environ.get(PACKS_ENV):
+        packs = [pack.strip() for pack in os.environ[PACKS_ENV].split(',') if pack.strip()]
+    if paths is None and os.environ.get(RULES_PATH_ENV):
+        paths = [path for path in os.environ[RULES_PATH_ENV].split(os.pathsep) if path]
+    if keep_invalid is None:
+        keep_invalid = os.environ.get(KEEP_INVALID_ENV, '') not in ('', '0')
+
+    key = (tuple(packs or DEFAULT_PACKS), tuple(paths or ()), bool(keep_invalid))
+    if key not in _REGISTRY_CACHE:
+        _REGISTRY_CACHE[key] = RuleRegistry(*key)
+    return _REGISTRY_CACHE[key]
+
+
+def generate_numeric_log(size_bytes: int, id_every: int = 4, seed: int = 5) -> str:
+    """Access-log lines full of numbers: hosts from a fixed pool (some not valid IPs), ports, sizes and
+    durations, and on every id_every-th line a fresh 16-digit id and an SSN-like account number"""
+    import random
+
+    rng = random.Random(seed)
+    hosts = ['.'.join(str(rng.choice((rng.randint(0, 255), rng.randint(0, 999)))) for _ in range(4))
+             for _ in range(2000)]
+    lines = []
+    total = 0
+    while total < size_bytes:
+        line = (f"2024-05-{rng.randint(1, 28):02d} 12:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} "
+                f"src={rng.choice(hosts)}:{rng.randint(1024, 65535)} status={rng.choice((200, 200, 304, 404, 500))} "
+                f"bytes={rng.randint(0, 10 ** 6)} ms={rng.randint(0, 5000)}")
+        if len(lines) % id_every == 0:
+            line += (f" txn={' '.join(f'{rng.randint(0, 9999):04d}' for _ in range(4))}"
+                     f" acct={rng.randint(0, 999):03d}-{rng.randint(0, 99):02d}-{rng.randint(0, 9999):04d}")
+        lines.append(line + "\n")
+        total += len(line) + 1
+    return ''.join(lines)
+
+
+def benchmark_validators(size_mb: int = 20, id_every: int = 4, runs: int = 5):
+    """Cost of fusing validators into the scan, measured two ways
+
+    The validators' own time is measured directly: every distinct raw hit
+    of a validated category is checked once, as scan() does. The whole-scan
+    comparison (best of `runs` scans with and without validators, in
+    alternating order) is printed too, but on a busy or single-core machine its
+    run-to-run noise is larger than the validators' cost.
+    """
+    from scanner import PatternScanner
+
+    text = generate_numeric_log(size_mb * 1024 * 1024, id_every)
+    checking_scanner = PatternScanner(get_registry(keep_invalid=False).specs())
+    raw_scanner = PatternScanner(get_registry(keep_invalid=True).specs())
+
+    timings = {}
+    counts = {}
+    raw_results = None
+    pairs = (('keep invalid', raw_scanner), ('validated', checking_scanner))
+    for label, scanner in [pair for run in range(runs) for pair in (pairs if run % 2 == 0 else pairs[::-1])]:
+        start = time.perf_counter()
+        results = scanner.scan(text)
+        timings[label] = min(timings.get(label, float('inf')), time.perf_counter() - start)
+        counts[label] = {category: len(results[category])
+                         for category in ('credit_cards', 'ssn_numbers', 'ip_addresses')}
+        if scanner is raw_scanner:
+            raw_results = results
+
+    start = time.perf_counter()
+    for spec in checking_scanner.specs:
+        if spec.validator is not None:
+            for value in raw_results[spec.name]:
+                spec.validator(value)
+    validator_time = time.perf_counter() - start
+
+    for label in ('keep invalid', 'validated'):
+        print(f"{label:>12}: {timings[label]:.2f}s {counts[label]}")
+    overhead = validator_time / timings['keep invalid'] * 100
+    scan_difference = (timings['validated'] / timings['keep invalid'] - 1) * 100
+    print(f"Validator time on {size_mb} MB of numeric logs (ids every {id_every} lines): "
+          f"{validator_time * 1000:.1f} ms = {overhead:.2f}% of the scan "
+          f"({'within' if overhead < 5 else 'OVER'} the 5% target)")
+    print(f"Whole-scan difference, best of {runs}: {scan_difference:+.1f}% (includes timing noise)")
+    return overhead
+
+
+# Test function for development
+def test_rules():
+    """List the packs, then load a custom pack that retunes one rule"""
+    import shutil
+    import tempfile
+
+    registry = get_registry()
+    print("Rule Registry Test Results:")
+    print("===========================")
+    print(f"Available packs: {sorted(registry.available_packs())}")
+    for rule in registry.rules():
+        print(f"  [{rule.pack}] {rule.category} (weight {rule.weight}, validator {rule.validator})")
+
+    directory = tempfile.mkdtemp(prefix='shadowtrace_rules_')
+    try:
+        with open(os.path.join(directory, "strict.json"), 'w') as file:
+            json.dump({'pack': 'strict', 'rules': [
+                {'category': 'emails', 'pattern': r'\b[\w.+-]+@corp\.example\b', 'flags': ['IGNORECASE'],
+                 'triggers': '@', 'weight': 20}
+            ]}, file)
+
+        custom = RuleRegistry(['core', 'strict'], [directory])
+        print(f"Custom emails rule: {custom.rule('emails').pattern} (weight {custom.weights()['emails']})")
+        print(f"Fingerprints differ: {custom.fingerprint() != registry.fingerprint()}")
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"Luhn: 4111 1111 1111 1111 {luhn_valid('4111 1111 1111 1111')}, "
+          f"4532-1234-5678-9012 {luhn_valid('4532-1234-5678-9012')}")
+    print(f"SSN: 123-45-6789 {ssn_valid('123-45-6789')}, 666-12-3456 {ssn_valid('666-12-3456')}")
+    print(f"IPv4: 10.0.0.255 {ipv4_valid('10.0.0.255')}, 999.1.1.1 {ipv4_valid('999.1.1.1')}")
+    benchmark_validators(size_mb=5)
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_rules()
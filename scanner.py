@@ -0,0 +1,741 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Pattern Scanner - Compiled multi-pattern engine with a single prefilter pass
+Author: Your Name
+Version: 1.0
+"""
+
+import re
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from typing import Dict, List, Tuple, Any, Iterable, Optional
+
+
+# One scannable category: name, regex source, regex flags, the characters
+# that every match is guaranteed to contain (None = scan the full text),
+# literal anchors of which every match contains at least one (None = no
+# anchor gate), whether every match starts with one of those anchors, a
+# validator that a match value must pass to be reported (None = keep all)
+# and the rule's time budget in seconds per MB (None = DEFAULT_RULE_BUDGET)
+PatternSpec = namedtuple('PatternSpec', ['name', 'pattern', 'flags', 'triggers', 'anchors', 'anchor_prefix',
+                                         'validator', 'budget'],
+                         defaults=(None, False, None, None))
+
+# Text placed between candidate windows. No window-safe pattern can match
+# across two whitespace characters, so hits never leak between windows.
+WINDOW_SEPARATOR = '\n\n'
+
+# How much candidate text iter_matches() joins before scanning it
+MATCH_BATCH_SIZE = 16 * 1024 * 1024
+
+# Candidate windows longer than this are hostile (minified code, runs of
+# slashes or dots) and are cut into segments of at most this length. Each
+# segment gets its own regex call, which bounds the cost of any one call.
+MAX_LINE_LENGTH = 2048
+
+# Matched values longer than this are cut to this length. Segments of a
+# hostile window also see this much of the window on either side of the
+# piece they own, so matches crossing a cut are found whole.
+MAX_MATCH_LENGTH = 1024
+
+# Regex time a rule may use per MB of input (at least one MB's worth)
+# before it is switched off for the rest of the scan
+DEFAULT_RULE_BUDGET = 1.0
+
+# Compiled scanners are shared between all PatternLibrary/analyzer instances
+_SCANNER_CACHE = {}
+
+
+def clip_value(value: Any, limit: int) -> Any:
+    """Cut a str/bytes match value to at most limit characters (group tuples are left alone)"""
+    if not isinstance(value, tuple) and len(value) > limit:
+        return value[:limit]
+    return value
+
+
+def match_value(match, group_count: int) -> Any:
+    """Return the same value re.findall() would produce for this match"""
+    if group_count == 0:
+        return match.group(0)
+    if group_count == 1:
+        return match.group(1) or match.string[:0]
+    return tuple(group or match.string[:0] for group in match.groups())
+
+
+class AnchorSet:
+    """The literal anchors of one pattern and fast ways to look for them
+
+    Case-sensitive anchors use str/bytes.find. Case-insensitive ones use
+    find on a lowercased copy of ASCII text (same offsets). Other text,
+    bytes and mmaps fall back to a regex built from the anchors, with the
+    pattern's own flags so Unicode case folding agrees with the pattern.
+    """
+
+    def __init__(self, anchors: Iterable[str], flags: int, binary: bool):
+        anchors = list(anchors)
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        self.use_lowered = self.ignore_case and not binary and all(anchor.isascii() for anchor in anchors)
+
+        literals = [anchor.lower() for anchor in anchors] if self.use_lowered else anchors
+        self.literals = [literal.encode('ascii') for literal in literals] if binary else literals
+
+        source = '|'.join(re.escape(anchor) for anchor in anchors)
+        if binary:
+            source = source.encode('ascii')
+        self.regex = re.compile(source, flags & re.IGNORECASE)
+
+    def present(self, text, lowered, pos: int, endpos: int) -> bool:
+        """True if any anchor occurs in text[pos:endpos]"""
+        if not self.ignore_case:
+            return any(text.find(literal, pos, endpos) != -1 for literal in self.literals)
+        if self.use_lowered and lowered is not None:
+            return any(lowered.find(literal, pos, endpos) != -1 for literal in self.literals)
+        return self.regex.search(text, pos, endpos) is not None
+
+    def positions(self, text, lowered, pos: int, endpos: int) -> List[int]:
+        """Sorted start offsets of every (possibly overlapping) anchor occurrence"""
+        if self.ignore_case and not (self.use_lowered and lowered is not None):
+            found = set()
+            index = pos
+            while True:
+                match = self.regex.search(text, index, endpos)
+                if match is None:
+                    break
+                found.add(match.start())
+                index = match.start() + 1
+            return sorted(found)
+
+        haystack = lowered if self.ignore_case else text
+        found = set()
+        for literal in self.literals:
+            index = haystack.find(literal, pos, endpos)
+            while index != -1:
+                found.add(index)
+                index = haystack.find(literal, index + 1, endpos)
+        return sorted(found)
+
+
+class RuleBudget:
+    """Time budgets for the rules during one scan (or one streamed document)
+
+    Pattern calls are timed and charged to their rule. A rule that uses up
+    its budget is skipped for the rest of the scan and listed in
+    `exceeded`, so a pathological input costs bounded time instead of
+    hanging the worker. The budget grows with the input size via
+    add_input().
+    """
+
+    def __init__(self, seconds: float = DEFAULT_RULE_BUDGET):
+        self.seconds = seconds
+        self.input_size = 0
+        self.spent = {}
+        self.exceeded = []
+
+    def add_input(self, size: int):
+        """Count more input towards the per-MB allowance"""
+        self.input_size += size
+
+    def allows(self, spec: PatternSpec) -> bool:
+        """True while the rule still has budget left"""
+        return spec.name not in self.exceeded
+
+    def charge(self, spec: PatternSpec, seconds: float):
+        """Record time spent by a rule, switching it off once it is over budget"""
+        spent = self.spent.get(spec.name, 0.0) + seconds
+        self.spent[spec.name] = spent
+
+        megabytes = max(self.input_size / (1024 * 1024), 1.0)
+        if spent > (spec.budget or self.seconds) * megabytes and spec.name not in self.exceeded:
+            self.exceeded.append(spec.name)
+
+
+class PatternScanner:
+    """Scans text for many patterns with one prefilter walk over the input
+
+    The prefilter is a single compiled regex that finds "candidate windows":
+    runs of whitespace-separated tokens that contain at least one trigger
+    character (digits, '@', '/', ...). Every match of a window-safe pattern
+    is guaranteed to sit inside one window, so the expensive category
+    patterns only run over the joined windows instead of the whole text.
+    Results are identical to running re.findall() per pattern.
+
+    Before that, patterns that declare literal anchors are gated: a pattern
+    whose anchors do not occur is skipped, and its trigger characters are
+    left out of the window prefilter. Full-text patterns whose matches start
+    with an anchor are only tried at the anchor positions.
+
+    Specs with a validator only report values it accepts, in every scan
+    mode. Each distinct value is checked once per call.
+
+    Every scan runs under a RuleBudget. Hostile windows (longer than
+    max_line_length) are scanned segment by segment, and a rule that
+    exceeds its time budget stops reporting for the rest of that scan.
+    Segments overlap by max_match_length and a hit counts only in the
+    segment where it starts, so cutting changes nothing for matches up to
+    that length. Values are cut to max_match_length.
+    """
+
+    def __init__(self, specs: Iterable[PatternSpec], binary: bool = False):
+        self.specs = list(specs)
+        self.binary = binary
+        self.max_line_length = MAX_LINE_LENGTH
+        self.max_match_length = MAX_MATCH_LENGTH
+
+        # Compile every category pattern exactly once
+        self.compiled = []
+        for spec in self.specs:
+            source = spec.pattern.encode('ascii') if binary else spec.pattern
+            self.compiled.append((spec, re.compile(source, spec.flags)))
+
+        # Union of trigger characters for the window prefilter
+        triggers = set()
+        for spec in self.specs:
+            if spec.triggers:
+                triggers.update(spec.triggers)
+        self.window_pattern = self._build_window_pattern(''.join(sorted(triggers)))
+        self._window_patterns = {''.join(sorted(triggers)): self.window_pattern}
+        self.window_tail_pattern = self._build_window_pattern(''.join(sorted(triggers)), tail=True)
+
+        # Literal anchor gates (None = always scanned)
+        self.anchor_sets = [
+            AnchorSet(spec.anchors, spec.flags, binary) if spec.anchors else None
+            for spec in self.specs
+        ]
+        self.needs_lowered = any(anchors is not None and anchors.use_lowered for anchors in self.anchor_sets)
+
+        # Post-match validators (None = every regex hit counts)
+        self.validators = [spec.validator for spec in self.specs]
+
+        if binary:
+            self.separator = WINDOW_SEPARATOR.encode('ascii')
+            self.spec_triggers = [
+                [ch.encode('ascii') for ch in spec.triggers] if spec.triggers else None
+                for spec in self.specs
+            ]
+        else:
+            self.separator = WINDOW_SEPARATOR
+            self.spec_triggers = [list(spec.triggers) if spec.triggers else None for spec in self.specs]
+
+    def _build_window_pattern(self, triggers: str, tail: bool = False):
+        """Compile the prefilter regex for the given trigger characters
+
+        tail=True gives a pattern that, matched at any offset inside a
+        window, ends exactly where that window ends.
+        """
+        if not triggers:
+            return None
+
+        charset = re.escape(triggers)
+        token = r'[^\s%s]*[%s]\S*' % (charset, charset)
+        if tail:
+            source = r'\S*(?:\s%s)*' % token
+        else:
+            source = r'(?<!\S)%s(?:\s%s)*' % (token, token)
+        if self.binary:
+            source = source.encode('ascii')
+        return re.compile(source)
+
+    def window_pattern_for(self, indices: Iterable[int]):
+        """Prefilter regex for the trigger characters of just these specs (cached)"""
+        triggers = set()
+        for index in indices:
+            triggers.update(self.specs[index].triggers or '')
+        key = ''.join(sorted(triggers))
+        if key not in self._window_patterns:
+            self._window_patterns[key] = self._build_window_pattern(key)
+        return self._window_patterns[key]
+
+    def lowered(self, text):
+        """Lowercased copy for case-insensitive anchor search (ASCII text only, so offsets match)"""
+        if not self.needs_lowered or not isinstance(text, str) or not text.isascii():
+            return None
+        return text.lower()
+
+    def active_indices(self, text, pos: int = 0, endpos: Optional[int] = None, lowered=None) -> List[int]:
+        """Indices of the specs whose anchors occur in text[pos:endpos] (unanchored specs always count)"""
+        if endpos is None:
+            endpos = len(text)
+        return [
+            index for index, anchors in enumerate(self.anchor_sets)
+            if anchors is None or anchors.present(text, lowered, pos, endpos)
+        ]
+
+    def iter_full_matches(self, index: int, text, pos: int = 0, endpos: Optional[int] = None, lowered=None,
+                          budget: Optional[RuleBudget] = None):
+        """Same match objects as compiled.finditer(text, pos, endpos) for one spec, using its anchors
+
+        Prefix-anchored patterns are only tried at anchor offsets. That is
+        exact: finditer moves left to right, and a match can only begin
+        where an anchor begins. With a budget, the search time is charged
+        to the rule and the matches stop once it runs out.
+        """
+        matches = self._iter_full_matches(index, text, pos, endpos, lowered)
+        if budget is None:
+            yield from matches
+            return
+
+        spec = self.specs[index]
+        clock = time.perf_counter
+        while budget.allows(spec):
+            started = clock()
+            match = next(matches, None)
+            budget.charge(spec, clock() - started)
+            if match is None:
+                return
+            yield match
+
+    def _iter_full_matches(self, index: int, text, pos: int, endpos: Optional[int], lowered):
+        spec, compiled = self.compiled[index]
+        anchors = self.anchor_sets[index]
+        if endpos is None:
+            endpos = len(text)
+
+        if anchors is None:
+            yield from compiled.finditer(text, pos, endpos)
+            return
+
+        if not spec.anchor_prefix:
+            if anchors.present(text, lowered, pos, endpos):
+                yield from compiled.finditer(text, pos, endpos)
+            return
+
+        resume = pos
+        for position in anchors.positions(text, lowered, pos, endpos):
+            if position < resume:
+                continue
+            match = compiled.match(text, position, endpos)
+            if match is not None:
+                yield match
+                resume = max(match.end(), position + 1)
+
+    def reduce(self, text, window_pattern=None) -> Tuple[Any, List[int], List[int]]:
+        """Collapse text to its candidate windows
+
+        Returns the joined windows plus two parallel offset lists: where each
+        window starts in the original text and in the reduced text.
+        """
+        window_pattern = window_pattern or self.window_pattern
+        if window_pattern is None:
+            return text[:0], [], []
+
+        original_starts = []
+        reduced_starts = []
+        parts = []
+        position = 0
+        step = len(self.separator)
+
+        for match in window_pattern.finditer(text):
+            original_starts.append(match.start())
+            reduced_starts.append(position)
+            window = match.group(0)
+            parts.append(window)
+            position += len(window) + step
+
+        return self.separator.join(parts), original_starts, reduced_starts
+
+    def window_batches(self, windows: Iterable[Tuple[Any, int]], batch_size: int = MATCH_BATCH_SIZE
+                       ) -> Iterable[Tuple[Any, List[int], List[int], Optional[Tuple[int, int]]]]:
+        """Join (window, start) pairs into (reduced, original_starts, reduced_starts, owned) batches
+
+        Hostile windows are cut into segments, each yielded as a batch of its
+        own, so rule budgets are checked after every segment. For a segment,
+        owned is the (start, end) range of reduced whose hits it reports -
+        the rest is context shared with its neighbours. Joined windows have
+        owned=None: every hit counts.
+        """
+        original_starts = []
+        reduced_starts = []
+        parts = []
+        position = 0
+        step = len(self.separator)
+
+        for window, start in windows:
+            if len(window) > self.max_line_length:
+                # Keep hits in text order: flush the normal windows before the segments
+                if parts:
+                    yield self.separator.join(parts), original_starts, reduced_starts, None
+                    original_starts, reduced_starts, parts, position = [], [], [], 0
+                for segment, segment_start, owned in self.segments(window, start):
+                    yield segment, [segment_start], [0], owned
+                continue
+
+            original_starts.append(start)
+            reduced_starts.append(position)
+            parts.append(window)
+            position += len(window) + step
+
+            if position >= batch_size:
+                yield self.separator.join(parts), original_starts, reduced_starts, None
+                original_starts, reduced_starts, parts, position = [], [], [], 0
+
+        if parts:
+            yield self.separator.join(parts), original_starts, reduced_starts, None
+
+    def segments(self, window, start: int, position: int = 0,
+                 final: bool = True) -> Iterable[Tuple[Any, int, Tuple[int, int]]]:
+        """Cut a hostile window into pieces of at most max_line_length, after a line break where possible
+
+        Yields (segment, offset of segment[0], owned range in segment). Each
+        segment reaches max_match_length characters past both ends of the
+        piece it owns, so a match crossing a cut is seen whole (and with its
+        real left context) by the segment it starts in.
+
+        Cutting starts at window[position:], window[:position] being context
+        from earlier pieces. With final=False the window may still grow, so
+        only segments that more text cannot change are yielded; the next one
+        starts where the last owned range ends.
+        """
+        limit = self.max_line_length
+        context = self.max_match_length
+        newline = self.separator[:1]
+        size = len(window)
+
+        while position < size:
+            if not final and size - position <= limit + context:
+                return
+            if size - position > limit:
+                cut = window.rfind(newline, position + limit // 2, position + limit)
+                cut = cut + 1 if cut != -1 else position + limit
+            else:
+                cut = size
+            low = max(position - context, 0)
+            high = min(cut + context, size)
+            yield window[low:high], start + low, (position - low, cut - low)
+            position = cut
+
+    def scan_reduced(self, reduced, indices: Optional[Iterable[int]] = None, finish: bool = True,
+                     budget: Optional[RuleBudget] = None, owned: Optional[Tuple[int, int]] = None
+                     ) -> Dict[str, List[Any]]:
+        """Run the window-safe patterns (or just those at indices) over reduced text (all matches, in order)
+
+        finish=False skips finish_values(), for callers that deduplicate first.
+        With owned (see window_batches) only hits starting in that range count.
+        """
+        results = {}
+        wanted = None if indices is None else set(indices)
+        clock = time.perf_counter
+
+        for index, (spec, compiled) in enumerate(self.compiled):
+            triggers = self.spec_triggers[index]
+            if triggers is None or (wanted is not None and index not in wanted):
+                continue
+
+            # Skip categories whose trigger characters never occur, and rules out of budget
+            if (budget is None or budget.allows(spec)) and any(ch in reduced for ch in triggers):
+                started = clock()
+                if owned is None:
+                    matches = compiled.findall(reduced)
+                else:
+                    matches = [match_value(match, compiled.groups) for match in compiled.finditer(reduced)
+                               if owned[0] <= match.start() < owned[1]]
+                if budget is not None:
+                    budget.charge(spec, clock() - started)
+                results[spec.name] = self.finish_values(index, matches) if finish else matches
+            else:
+                results[spec.name] = []
+
+        return results
+
+    def scan(self, text, budget: Optional[RuleBudget] = None) -> Dict[str, List[Any]]:
+        """Return {category: unique matches} exactly like per-pattern re.findall()
+
+        Over-long values and rules over budget are the only exceptions; pass
+        a RuleBudget to learn which rules ran out.
+        """
+        results = {spec.name: [] for spec in self.specs}
+        if budget is None:
+            budget = RuleBudget()
+        budget.add_input(len(text))
+
+        lowered = self.lowered(text)
+        active = self.active_indices(text, lowered=lowered)
+        windowed = [index for index in active if self.spec_triggers[index] is not None]
+
+        if windowed:
+            # dict.fromkeys keeps first-seen order while removing duplicates
+            found = {self.specs[index].name: {} for index in windowed}
+            windows = ((match.group(0), match.start()) for match in self.window_pattern_for(windowed).finditer(text))
+            for reduced, _, _, owned in self.window_batches(windows):
+                for name, matches in self.scan_reduced(reduced, windowed, finish=False, budget=budget,
+                                                       owned=owned).items():
+                    found[name].update(dict.fromkeys(matches))
+
+            # Validate each distinct value once
+            for index in windowed:
+                name = self.specs[index].name
+                results[name] = self.finish_values(index, list(found[name]), unique=True)
+
+        for index in active:
+            if self.spec_triggers[index] is None:
+                spec, compiled = self.compiled[index]
+                values = (match_value(match, compiled.groups)
+                          for match in self.iter_full_matches(index, text, lowered=lowered, budget=budget))
+                results[spec.name] = self.finish_values(index, list(dict.fromkeys(values)), unique=True)
+
+        return results
+
+    def finish_values(self, index: int, values: List[Any], unique: bool = False) -> List[Any]:
+        """Drop values the spec's validator rejects and cut over-long ones to max_match_length
+
+        Order is kept and each distinct value is validated once. With
+        unique=True the values are known to be distinct already.
+        """
+        validator = self.validators[index]
+        if validator is not None and values:
+            if unique:
+                values = [value for value in values if validator(value)]
+            else:
+                rejected = {value for value in set(values) if not validator(value)}
+                if rejected:
+                    values = [value for value in values if value not in rejected]
+
+        # Tuples come from multi-group patterns, whose groups are short
+        limit = self.max_match_length
+        if values and not isinstance(values[0], tuple) and max(map(len, values)) > limit:
+            values = [value[:limit] for value in values]
+            if unique:
+                values = list(dict.fromkeys(values))
+        return values
+
+    def iter_matches(self, text, pos: int = 0, endpos: Optional[int] = None, batch_size: int = MATCH_BATCH_SIZE,
+                     budget: Optional[RuleBudget] = None) -> Iterable[Tuple[str, Any, int, int]]:
+        """Yield (category, value, start, end) for every hit with offsets into the original text
+
+        Only text[pos:endpos] is searched, but characters before pos still count
+        as context for \\b and look-behinds. Candidate windows are joined and
+        scanned in batches of about batch_size, so memory stays bounded even
+        for huge (e.g. memory-mapped) inputs.
+        """
+        if endpos is None:
+            endpos = len(text)
+        if budget is None:
+            budget = RuleBudget()
+        budget.add_input(endpos - pos)
+
+        lowered = self.lowered(text)
+        active = self.active_indices(text, pos, endpos, lowered)
+        windowed = [index for index in active if self.spec_triggers[index] is not None]
+
+        if windowed:
+            window_pattern = self.window_pattern_for(windowed)
+            windows = ((match.group(0), match.start()) for match in window_pattern.finditer(text, pos, endpos))
+            for reduced, original_starts, reduced_starts, owned in self.window_batches(windows, batch_size):
+                yield from self._iter_reduced_matches(reduced, original_starts, reduced_starts, windowed, budget,
+                                                      owned)
+
+        limit = self.max_match_length
+        for index in active:
+            if self.spec_triggers[index] is None:
+                spec, compiled = self.compiled[index]
+                validator = self.validators[index]
+                for match in self.iter_full_matches(index, text, pos, endpos, lowered, budget):
+                    value = match_value(match, compiled.groups)
+                    if validator is None or validator(value):
+                        yield spec.name, clip_value(value, limit), match.start(), match.end()
+
+    def _iter_reduced_matches(self, reduced, original_starts, reduced_starts, indices, budget: RuleBudget,
+                              owned: Optional[Tuple[int, int]] = None):
+        """Scan one batch of windows and map every hit back to original offsets (only owned hits of a segment)"""
+        clock = time.perf_counter
+        limit = self.max_match_length
+
+        for index in indices:
+            spec, compiled = self.compiled[index]
+            triggers = self.spec_triggers[index]
+            if not budget.allows(spec) or not any(ch in reduced for ch in triggers):
+                continue
+
+            started = clock()
+            matches = list(compiled.finditer(reduced))
+            budget.charge(spec, clock() - started)
+            if owned is not None:
+                matches = [match for match in matches if owned[0] <= match.start() < owned[1]]
+
+            validator = self.validators[index]
+            verdicts = {}
+            for match in matches:
+                value = match_value(match, compiled.groups)
+                if validator is not None:
+                    valid = verdicts.get(value)
+                    if valid is None:
+                        valid = verdicts[value] = validator(value)
+                    if not valid:
+                        continue
+
+                window = bisect_right(reduced_starts, match.start()) - 1
+                shift = original_starts[window] - reduced_starts[window]
+                yield spec.name, clip_value(value, limit), match.start() + shift, match.end() + shift
+
+
+def get_scanner(specs: Iterable[PatternSpec], binary: bool = False) -> PatternScanner:
+    """Return a cached scanner for these specs, compiling it on first use"""
+    key = (tuple(specs), binary)
+    scanner = _SCANNER_CACHE.get(key)
+    if scanner is None:
+        scanner = PatternScanner(key[0], binary)
+        _SCANNER_CACHE[key] = scanner
+    return scanner
+
+
+def generate_sample_log(size_bytes: int, seed: int = 7) -> str:
+    """Build a log-like text of roughly size_bytes with a sprinkle of sensitive data"""
+    import random
+
+    rng = random.Random(seed)
+    words = ("request served user login failed connection closed from host in ms "
+             "cache miss retry worker started stopped queue job done error warning").split()
+    extras = [
+        "contact {n}@example.com",
+        "card 4532-1234-5678-9012",
+        "GET https://example.com/api/v1/items/{n}?page=2",
+        "client 10.0.{a}.{b}",
+        "open /var/log/app/worker-{n}.log",
+        "call (555) 123-4567 ssn 123-45-6789",
+        "wallet 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa",
+    ]
+
+    lines = []
+    size = 0
+    n = 0
+    while size < size_bytes:
+        line = "2024-03-%02d 12:%02d:%02d INFO %s" % (
+            n % 28 + 1, n % 60, (n * 7) % 60, ' '.join(rng.choices(words, k=10)))
+        if rng.random() < 0.1:
+            line += ' ' + rng.choice(extras).format(n=n, a=n % 255, b=(n * 3) % 255)
+        lines.append(line)
+        size += len(line) + 1
+        n += 1
+
+    return '\n'.join(lines)
+
+
+def benchmark_scanner(size_mb: int = 100):
+    """Compare the prefiltered scanner with the old per-pattern re.findall loop"""
+    from patterns import PatternLibrary
+
+    library = PatternLibrary()
+    specs = library.get_scan_specs()
+    scanner = get_scanner(specs)
+
+    print(f"Generating {size_mb} MB of sample log data...")
+    text = generate_sample_log(size_mb * 1024 * 1024)
+
+    start = time.perf_counter()
+    old_results = {}
+    for spec in specs:
+        matches = set(re.findall(spec.pattern, text, spec.flags))
+        old_results[spec.name] = {m for m in matches if spec.validator(m)} if spec.validator else matches
+    old_time = time.perf_counter() - start
+
+    # Same scanner without literal anchors, to show what the anchor gate saves
+    ungated = PatternScanner([spec._replace(anchors=None, anchor_prefix=False) for spec in specs])
+    start = time.perf_counter()
+    ungated_results = ungated.scan(text)
+    ungated_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results = scanner.scan(text)
+    new_time = time.perf_counter() - start
+
+    identical = all(set(new_results[name]) == matches for name, matches in old_results.items())
+    identical = identical and new_results == ungated_results
+
+    print(f"re.findall loop : {old_time:.2f}s ({size_mb / old_time:.1f} MB/s)")
+    print(f"No anchor gate  : {ungated_time:.2f}s ({size_mb / ungated_time:.1f} MB/s)")
+    print(f"PatternScanner  : {new_time:.2f}s ({size_mb / new_time:.1f} MB/s)")
+    print(f"Speedup         : {old_time / new_time:.2f}x")
+    print(f"Identical output: {identical}")
+
+
+def generate_hostile_lines(count: int = 20, max_length: int = 65536, seed: int = 0) -> List[str]:
+    """Random lines built from the characters the stock patterns backtrack on"""
+    import random
+
+    rng = random.Random(seed)
+    alphabet = 'a.-_/:@=!%+1 '
+    pieces = ['a.', 'http://', 'pass=', 'api_key=', '@', '/', '-', '1', '!']
+    lines = []
+    for _ in range(count):
+        length = rng.randint(max_length // 4, max_length)
+        if rng.random() < 0.5:
+            line = ''.join(rng.choices(pieces, k=length // 4))
+        else:
+            line = ''.join(rng.choices(alphabet, k=length))
+        lines.append(line[:length])
+    return lines
+
+
+def benchmark_adversarial(size: int = 20000, fuzz_lines: int = 20):
+    """Time the full rule set on inputs built to make regexes backtrack"""
+    from patterns import PatternLibrary
+
+    scanner = get_scanner(PatternLibrary().get_scan_specs())
+    cases = {
+        'email_dots': 'a.' * (size // 2) + '@' + 'b.' * (size // 2) + '!',
+        'slashes': '/' * size,
+        'url_long': 'http://' + 'a' * size + '!',
+        'pass_many': ('pass=' + '!' * 50) * (size // 55),
+        'minified': '{"a":"/x/y?z=1&w=http://h/p","e":"u@h.io"};' * (size // 44),
+        'digits': '1' * size,
+    }
+    for index, line in enumerate(generate_hostile_lines(fuzz_lines)):
+        cases[f'fuzz_{index:02d}'] = line
+
+    print(f"Guard: lines cut at {MAX_LINE_LENGTH} chars, "
+          f"rule budget {DEFAULT_RULE_BUDGET}s per MB, values clipped at {MAX_MATCH_LENGTH}")
+    worst = 0.0
+    for name, text in cases.items():
+        budget = RuleBudget()
+        start = time.perf_counter()
+        scanner.scan(text, budget)
+        elapsed = time.perf_counter() - start
+        worst = max(worst, elapsed)
+        skipped = f" (over budget: {', '.join(budget.exceeded)})" if budget.exceeded else ""
+        print(f"{name:>12}: {len(text):>6} chars {elapsed:.3f}s{skipped}")
+    print(f"Slowest case    : {worst:.3f}s")
+
+
+def check_long_lines(pads: Iterable[int] = (0, 1000, 2000, 2020, 2040, 3060, 4090, 6000)) -> bool:
+    """Compare scan() and iter_matches() with plain re.finditer on lines long enough to be cut into segments"""
+    from patterns import PatternLibrary
+
+    specs = PatternLibrary().get_scan_specs()
+    scanner = get_scanner(specs)
+    unvalidated = {spec.name for spec in specs if spec.validator is None}
+    hits = "john.doe@example.com https://example.com/a/b 10.0.0.1 4532-1234-5678-9012 /var/log/app.log"
+    ok = True
+    for pad in pads:
+        for filler in ('x', 'a.', '/'):
+            line = (filler * pad)[:pad] + ' ' + hits + ' ' + ('y' * pad) + ' ' + hits
+            text = 'head\n' + line + '\n'
+            expected = {}
+            for spec in specs:
+                values = (match_value(match, re.compile(spec.pattern, spec.flags).groups)
+                          for match in re.finditer(spec.pattern, text, spec.flags))
+                expected[spec.name] = {clip_value(value, MAX_MATCH_LENGTH) for value in values
+                                       if spec.validator is None or spec.validator(value)}
+            found = {name: set(values) for name, values in scanner.scan(text).items()}
+            # Matches longer than MAX_MATCH_LENGTH are clipped, so only their value is compared
+            spans = {(spec.name, match.start(), match.end()) for spec in specs if spec.validator is None
+                     for match in re.finditer(spec.pattern, text, spec.flags)
+                     if match.end() - match.start() <= MAX_MATCH_LENGTH}
+            iterated = {(name, start, end) for name, value, start, end in scanner.iter_matches(text)
+                        if name in unvalidated and len(value) < MAX_MATCH_LENGTH}
+            if found != expected or iterated != spans:
+                print(f"Mismatch at pad {pad} ({filler!r})")
+                ok = False
+    print(f"Long lines match plain regex: {ok}")
+    return ok
+
+
+# Run the benchmark if this file is executed directly
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == 'check':
+        sys.exit(0 if check_long_lines() else 1)
+    elif len(sys.argv) > 1 and sys.argv[1] == 'adversarial':
+        benchmark_adversarial(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+    else:
+        benchmark_scanner(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Batch Scoring - Vectorized risk scores for many documents at once
+Author: Your Name
+Version: 1.0
+"""
+
+import time
+from typing import Dict, List, Any, Iterable, Optional, Sequence
+
+# NumPy is optional - without it the same formulas run as plain Python loops
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Same constants as SuspiciousPatternAnalyzer.calculate_pattern_risk / combine_risk
+DEFAULT_WEIGHT = 5
+CATEGORY_RISK_CAP = 40
+PATTERN_RISK_CAP = 70
+WORD_RISK_CAP = 50
+
+# Rows are scored in slices of this size to bound temporary arrays
+SCORE_CHUNK_ROWS = 1000000
+
+
+class BatchScorer:
+    """Scores a whole matrix of documents with the analyzer's risk formula
+
+    Input is one row per document: the number of unique matches per
+    category (in `categories` order), the risky word count and the total
+    word count. The output equals SuspiciousPatternAnalyzer.combine_risk()
+    row for row. Every float operation runs in the same order, so float64
+    rounding is identical too.
+    """
+
+    def __init__(self, categories: Sequence[str], weights: Dict[str, int]):
+        self.categories = list(categories)
+        self.weights = [weights.get(category, DEFAULT_WEIGHT) for category in self.categories]
+        self.uses_numpy = np is not None
+        if self.uses_numpy:
+            self.weight_vector = np.asarray(self.weights, dtype=np.int64)
+
+    def score(self, counts, risky_words, total_words, chunk_rows: int = SCORE_CHUNK_ROWS):
+        """Final 0-100 risk score per row (a NumPy array, or a list without NumPy)"""
+        if not self.uses_numpy:
+            return self._score_python(counts, risky_words, total_words)
+
+        counts = np.asarray(counts, dtype=np.int64).reshape(-1, len(self.categories))
+        risky_words = np.asarray(risky_words, dtype=np.int64)
+        total_words = np.asarray(total_words, dtype=np.int64)
+
+        scores = np.empty(len(counts), dtype=np.int64)
+        for start in range(0, len(counts), chunk_rows):
+            stop = start + chunk_rows
+            scores[start:stop] = self._score_numpy(counts[start:stop], risky_words[start:stop],
+                                                   total_words[start:stop])
+        return scores
+
+    def pattern_risk(self, counts):
+        """calculate_pattern_risk() per row"""
+        if not self.uses_numpy:
+            return [self._pattern_risk_row(row) for row in counts]
+
+        counts = np.asarray(counts, dtype=np.int64).reshape(-1, len(self.categories))
+        per_category = np.where(counts > 0, np.minimum(counts * self.weight_vector, CATEGORY_RISK_CAP), 0)
+        return np.minimum(per_category.sum(axis=1), PATTERN_RISK_CAP)
+
+    def word_risk(self, risky_words, total_words):
+        """SentimentAnalyzer.risk_from_counts() per row"""
+        if not self.uses_numpy:
+            return [self._word_risk_row(risky, total) for risky, total in zip(risky_words, total_words)]
+
+        risky_words = np.asarray(risky_words, dtype=np.int64)
+        total_words = np.asarray(total_words, dtype=np.int64)
+
+        # Divide only where there are words; empty documents score 0 like the scalar path
+        has_words = total_words > 0
+        ratio = np.divide(risky_words, total_words, out=np.zeros(len(total_words)), where=has_words)
+        risk = np.trunc(ratio * 100 * 2).astype(np.int64)
+        return np.where(has_words, np.minimum(risk, WORD_RISK_CAP), 0)
+
+    def _score_numpy(self, counts, risky_words, total_words):
+        """Vectorized combine_risk() for one slice of rows"""
+        pattern_risk = self.pattern_risk(counts)
+        word_risk = self.word_risk(risky_words, total_words)
+
+        total = np.trunc(pattern_risk * 0.7 + word_risk * 0.3).astype(np.int64)
+
+        # Bonus for several kinds of pattern in the same document
+        types_found = (counts > 0).sum(axis=1)
+        total += np.where(types_found >= 3, 15, np.where(types_found >= 2, 8, 0))
+
+        return np.clip(total, 0, 100)
+
+    def _score_python(self, counts, risky_words, total_words) -> List[int]:
+        """Fallback without NumPy: the scalar formulas in a tight loop"""
+        scores = []
+        pattern_risk_row = self._pattern_risk_row
+        word_risk_row = self._word_risk_row
+
+        for row, risky, total in zip(counts, risky_words, total_words):
+            score = int(pattern_risk_row(row) * 0.7 + word_risk_row(risky, total) * 0.3)
+
+            types_found = sum(1 for count in row if count > 0)
+            if types_found >= 3:
+                score += 15
+            elif types_found >= 2:
+                score += 8
+
+            scores.append(max(0, min(score, 100)))
+        return scores
+
+    def _pattern_risk_row(self, row: Sequence[int]) -> int:
+        risk = 0
+        for count, weight in zip(row, self.weights):
+            if count > 0:
+                risk += min(count * weight, CATEGORY_RISK_CAP)
+        return min(risk, PATTERN_RISK_CAP)
+
+    def _word_risk_row(self, risky: int, total: int) -> int:
+        if total == 0:
+            return 0
+        return min(int((risky / total) * 100 * 2), WORD_RISK_CAP)
+
+
+def count_rows(results: Iterable[Dict[str, Any]], categories: Sequence[str]) -> List[List[int]]:
+    """Category count matrix (unique matches per category) from analyze() results"""
+    return [[len(result.get('patterns', {}).get(category, ())) for category in categories] for result in results]
+
+
+def score_results(entries: Iterable[Dict[str, Any]], analyzer) -> List[int]:
+    """Re-score cached entries ({'result', 'totals'}) with the analyzer's current weights"""
+    entries = list(entries)
+    scorer = BatchScorer(analyzer.CATEGORIES, analyzer.RISK_WEIGHTS)
+    counts = count_rows((entry['result'] for entry in entries), analyzer.CATEGORIES)
+    risky = [entry['totals']['risky'] for entry in entries]
+    total = [entry['totals']['total_words'] for entry in entries]
+    return [int(score) for score in scorer.score(counts, risky, total)]
+
+
+def benchmark_scoring(rows: int = 1000000, seed: int = 11, weights: Optional[Dict[str, int]] = None):
+    """Time the batch scorer against per-document combine_risk() calls and check they agree"""
+    import random
+
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    analyzer = SuspiciousPatternAnalyzer()
+    if weights:
+        analyzer.RISK_WEIGHTS = dict(analyzer.RISK_WEIGHTS, **weights)
+
+    rng = random.Random(seed)
+    categories = analyzer.CATEGORIES
+    counts = [[rng.choice((0, 0, 0, 1, 2, 5, 9)) for _ in categories] for _ in range(rows)]
+    total = [rng.choice((0, rng.randint(1, 5000))) for _ in range(rows)]
+    risky = [rng.randint(0, words) for words in total]
+
+    start = time.perf_counter()
+    expected = []
+    sentiment_analyzer = analyzer.sentiment_analyzer
+    for row, risky_words, total_words in zip(counts, risky, total):
+        patterns = {category: [None] * count for category, count in zip(categories, row)}
+        expected.append(analyzer.combine_risk(patterns, sentiment_analyzer.risk_from_counts(risky_words, total_words)))
+    scalar_time = time.perf_counter() - start
+
+    scorer = BatchScorer(categories, analyzer.RISK_WEIGHTS)
+    if scorer.uses_numpy:
+        # The nightly job keeps its rows as arrays; convert outside the timing
+        counts, risky, total = np.asarray(counts), np.asarray(risky), np.asarray(total)
+
+    start = time.perf_counter()
+    scores = scorer.score(counts, risky, total)
+    batch_time = time.perf_counter() - start
+
+    backend = "numpy" if scorer.uses_numpy else "pure Python (install numpy for the vectorized path)"
+    print(f"Rows: {rows:,}   backend: {backend}")
+    print(f"Scalar combine_risk: {scalar_time:.2f}s")
+    print(f"Batch scorer:        {batch_time:.2f}s ({scalar_time / batch_time:.1f}x)")
+    print(f"Identical scores: {[int(score) for score in scores] == expected}")
+
+
+# Test function for development
+def test_scoring():
+    """Compare batch and scalar scoring, including a weight change"""
+    benchmark_scoring(rows=200000)
+    benchmark_scoring(rows=200000, weights={'emails': 9, 'credit_cards': 33})
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_scoring()
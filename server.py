@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Scan Server - Local HTTP daemon with warm patterns and request batching
+Author: Your Name
+Version: 1.0
+"""
+
+import http.client
+import io
+import json
+import queue
+import threading
+import time
+from bisect import bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from metrics import CONTENT_TYPE, ScanMetrics, start_textfile_writer
+    from reports import REPORT_WRITERS
+    from scanner import RuleBudget
+    from streaming import AnalysisAccumulator
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# The daemon only ever listens on the loopback interface
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# How long the batcher waits for more requests after the first one (seconds)
+BATCH_DELAY = 0.002
+
+# A batch is scanned as soon as it reaches either limit
+MAX_BATCH_DOCUMENTS = 64
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+# Request bodies above this size are refused
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Content types of the ?format= report responses
+REPORT_CONTENT_TYPES = {
+    'text': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'sarif': 'application/sarif+json',
+}
+
+# Documents are joined with the scanner's window separator, which no window-safe pattern can cross
+DOCUMENT_SEPARATOR = "\n\n"
+
+
+def scan_batch(texts: List[str], analyzer: SuspiciousPatternAnalyzer,
+               budget: Optional[RuleBudget] = None) -> List[Dict[str, Any]]:
+    """Analyze several documents with one combined pattern pass
+
+    The documents are joined into one string. Every hit is mapped back to
+    its document by bisecting the document start offsets. Results equal
+    analyzer.analyze(text) for each document. A hit that would cross into
+    the next document (only possible for full-text patterns) sends every
+    document it touches back to a plain analyze() call, since it may have
+    swallowed a hit of the next one. So does every document of a
+    batch in which a rule ran out of time budget, so that each result
+    reports its own rules_over_budget. Pass a RuleBudget to read the
+    per-rule regex time of the combined pass afterwards.
+    """
+    combined = DOCUMENT_SEPARATOR.join(texts)
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(DOCUMENT_SEPARATOR)
+
+    accumulators = [AnalysisAccumulator(analyzer.CATEGORIES, analyzer.new_word_counts()) for _ in texts]
+    spilled = set()
+    budget = budget or RuleBudget()
+
+    for category, value, start, end in analyzer.scanner.iter_matches(combined, budget=budget):
+        index = bisect_right(starts, start) - 1
+        if end > starts[index] + len(texts[index]):
+            spilled.update(range(index, bisect_right(starts, end - 1)))
+            continue
+        accumulators[index].add_matches(category, (value,))
+
+    if budget.exceeded:
+        spilled = set(range(len(texts)))
+
+    results = []
+    for index, (text, accumulator) in enumerate(zip(texts, accumulators)):
+        if index in spilled or not text or not text.strip():
+            results.append(analyzer.analyze(text))
+            continue
+
+        accumulator.has_content = True
+        accumulator.add_words(*analyzer.word_statistics(text))
+        results.append(accumulator.result(analyzer))
+
+    return results
+
+
+class PendingScan:
+    """One queued document and the slot its result is delivered to"""
+
+    __slots__ = ('text', 'done', 'result')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.done = threading.Event()
+        self.result = None
+
+
+class BatchScanner:
+    """Collects concurrent requests into small batches for scan_batch()
+
+    The first queued document starts a short batching window (BATCH_DELAY).
+    Everything that arrives in that window, up to the size limits, is
+    scanned in the same pass. Under light load a request waits at most the
+    window length. Under heavy load the per-request overhead is shared by
+    the whole batch.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None, delay: float = BATCH_DELAY,
+                 max_documents: int = MAX_BATCH_DOCUMENTS, max_bytes: int = MAX_BATCH_BYTES,
+                 metrics: Optional[ScanMetrics] = None):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.delay = delay
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue()
+
+        # Statistics for /health, and the counters behind /metrics
+        self.documents = 0
+        self.batches = 0
+        self.metrics = metrics or ScanMetrics()
+        self.metrics.add_categories(self.analyzer.CATEGORIES)
+        self.metrics.add_gauge('queue_depth', "Documents waiting for the next batch.", self.queue.qsize)
+
+        # Compile the patterns now, not on the first request
+        self.analyzer.scanner
+
+        self.thread = threading.Thread(target=self._run, name="shadowtrace-batcher", daemon=True)
+        self.thread.start()
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """Queue a document and wait for its result"""
+        pending = PendingScan(text)
+        self.queue.put(pending)
+        pending.done.wait()
+        return pending.result
+
+    def scan_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Queue several documents at once and wait for all results"""
+        pendings = [PendingScan(text) for text in texts]
+        for pending in pendings:
+            self.queue.put(pending)
+        for pending in pendings:
+            pending.done.wait()
+        return [pending.result for pending in pendings]
+
+    def _run(self):
+        """Batcher thread: gather a batch, scan it, hand out the results"""
+        while True:
+            batch = [self.queue.get()]
+            batch_bytes = len(batch[0].text)
+            deadline = time.monotonic() + self.delay
+
+            while len(batch) < self.max_documents and batch_bytes < self.max_bytes:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                batch_bytes += len(pending.text)
+
+            budget = RuleBudget()
+            start = time.perf_counter()
+            try:
+                results = scan_batch([pending.text for pending in batch], self.analyzer, budget)
+            except Exception as e:
+                print(f"Error during batch scan: {str(e)}")
+                results = [{'error': str(e)}] * len(batch)
+                self.metrics.observe_error('batch')
+            self._observe(batch, results, budget, time.perf_counter() - start)
+
+            self.documents += len(batch)
+            self.batches += 1
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
+
+    def _observe(self, batch: List[PendingScan], results: List[Dict[str, Any]], budget: RuleBudget, seconds: float):
+        """Feed one finished batch into the metrics"""
+        metrics = self.metrics
+        metrics.observe_results([len(pending.text) for pending in batch], results)
+        metrics.observe_rules(budget.spent)
+        metrics.observe_batch(len(batch), seconds)
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    """HTTP endpoints:
+
+    POST /scan     body is raw UTF-8 text, or JSON {"text": "..."} / {"texts": [...]}
+                   ?format=text|json|jsonl|csv|sarif answers with a report instead
+                   (sources "text" or "texts[i]"); add &findings=1 for one record per hit
+    GET  /health   liveness plus batching statistics
+    GET  /metrics  Prometheus text exposition (documents, bytes, hits, latencies, queue depth)
+    """
+
+    # Keep-alive connections avoid a TCP handshake per request
+    protocol_version = "HTTP/1.1"
+    server_version = "ShadowTrace/1.0"
+
+    # Headers and body are written separately; without TCP_NODELAY every
+    # response waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            data = self.server.batcher.metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        if self.path != "/health":
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        batcher = self.server.batcher
+        self._send_json(200, {
+            'status': 'ok',
+            'documents': batcher.documents,
+            'batches': batcher.batches,
+            'average_batch_size': round(batcher.documents / batcher.batches, 2) if batcher.batches else 0.0
+        })
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/scan":
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        options = parse_qs(url.query)
+        report_format = options.get('format', [None])[0]
+        if report_format is not None and report_format not in REPORT_WRITERS:
+            self._send_json(400, {'error': f"unknown format '{report_format}' "
+                                           f"(choose from {', '.join(REPORT_WRITERS)})"})
+            return
+        findings = options.get('findings', ['0'])[0].lower() in ('1', 'true', 'yes')
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {'error': f'body larger than {MAX_BODY_BYTES} bytes'})
+            return
+
+        body = self.rfile.read(length).decode('utf-8', errors='ignore')
+        batcher = self.server.batcher
+
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            try:
+                data = json.loads(body)
+            except ValueError as e:
+                self._send_json(400, {'error': f'invalid JSON: {str(e)}'})
+                return
+
+            if isinstance(data, dict) and isinstance(data.get('texts'), list):
+                texts = [str(text) for text in data['texts']]
+                if report_format is not None:
+                    self._send_report(report_format, findings, texts, [f"texts[{i}]" for i in range(len(texts))])
+                    return
+                self._send_json(200, {'results': batcher.scan_many(texts)})
+                return
+            if isinstance(data, dict) and 'text' in data:
+                body = str(data['text'])
+            else:
+                self._send_json(400, {'error': 'expected {"text": ...} or {"texts": [...]}'})
+                return
+
+        if report_format is not None:
+            self._send_report(report_format, findings, [body], ["text"])
+            return
+        self._send_json(200, batcher.scan(body))
+
+    def _send_report(self, report_format: str, findings: bool, texts: List[str], sources: List[str]):
+        """Answer with the documents (or every hit) written by a report writer"""
+        batcher = self.server.batcher
+        output = io.StringIO()
+        writer = REPORT_WRITERS[report_format](output, batcher.analyzer, findings)
+        if findings:
+            for source, text in zip(sources, texts):
+                writer.write_text_findings(source, text)
+        else:
+            for source, result in zip(sources, batcher.scan_many(texts)):
+                writer.write_document(source, result)
+        writer.close()
+
+        data = output.getvalue().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', REPORT_CONTENT_TYPES[report_format])
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # One line per request would cost more than a small scan
+        pass
+
+
+class ScanServer(ThreadingHTTPServer):
+    """Threaded HTTP server sharing one warm BatchScanner between all connections"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 analyzer: Optional[SuspiciousPatternAnalyzer] = None, metrics: Optional[ScanMetrics] = None):
+        super().__init__((host, port), ScanRequestHandler)
+        self.batcher = BatchScanner(analyzer, metrics=metrics)
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, metrics_file: Optional[str] = None):
+    """Run the scan daemon until Ctrl+C (optionally also keeping a node-exporter textfile up to date)"""
+    server = ScanServer(host, port)
+    metrics = server.batcher.metrics
+    if metrics_file:
+        start_textfile_writer(metrics, metrics_file)
+
+    print(f"ShadowTrace daemon listening on http://{host}:{server.server_address[1]}/scan")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if metrics_file:
+            metrics.write_textfile(metrics_file)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def load_test(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, clients: int = 16,
+              requests_per_client: int = 200, text: Optional[str] = None) -> Dict[str, Any]:
+    """Hammer a running daemon with concurrent keep-alive clients and report requests per second"""
+    body = (text or "Contact admin@example.com from 10.0.0.7, card 4532-1234-5678-9012\n").encode('utf-8')
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection(host, port)
+        local = []
+        try:
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                connection.request("POST", "/scan", body, {'Content-Type': 'text/plain'})
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failures.append(response.status)
+                local.append(time.perf_counter() - start)
+        except OSError as e:
+            failures.append(str(e))
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'failures': len(failures),
+        'clients': clients,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 99) * 1000, 2)
+    }
+
+
+# Test function for development
+def test_server():
+    """Start a daemon on a free port, check its answers and load-test it"""
+    analyzer = SuspiciousPatternAnalyzer()
+    server = ScanServer(port=0, analyzer=analyzer)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        texts = [
+            "Hey! Mail john.doe@example.com or call (555) 123-4567.",
+            "Card 4532-1234-5678-9012, wallet 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa",
+            "   ",
+            "Visit https://example.com/login from 192.168.1.20 - great support!"
+        ]
+        batched = scan_batch(texts, analyzer)
+
+        connection = http.client.HTTPConnection(DEFAULT_HOST, port)
+        connection.request("POST", "/scan", json.dumps({'texts': texts}), {'Content-Type': 'application/json'})
+        served = json.loads(connection.getresponse().read())['results']
+        connection.close()
+
+        expected = [analyzer.analyze(text) for text in texts]
+        print("Scan Server Test Results:")
+        print("=========================")
+        print(f"Batched pass identical to analyze(): {batched == expected}")
+
+        # A full-text match running into the next document must not hide that document's hits
+        spanning = ['login password=', 'pass=abcdefgh123 here', 'api_key=', 'plain text']
+        identical = scan_batch(spanning, analyzer) == [analyzer.analyze(text) for text in spanning]
+        print(f"Spanning hits identical to analyze(): {identical}")
+        print(f"Served risk scores: {[result['risk_score'] for result in served]}")
+
+        connection = http.client.HTTPConnection(DEFAULT_HOST, port)
+        connection.request("POST", "/scan?format=sarif&findings=1", texts[1], {'Content-Type': 'text/plain'})
+        sarif = json.loads(connection.getresponse().read())
+        connection.close()
+        print(f"SARIF findings: {[result['message']['text'] for result in sarif['runs'][0]['results']]}")
+
+        report = load_test(port=port, clients=16, requests_per_client=100)
+        print(f"Load test: {report['requests_per_second']} req/s, p50 {report['p50_ms']} ms, "
+              f"p99 {report['p99_ms']} ms, failures {report['failures']}")
+        print(f"Average batch size: {server.batcher.documents / max(server.batcher.batches, 1):.1f}")
+
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_server()
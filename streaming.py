@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Streaming Scanner - Chunked analysis of huge inputs with flat memory use
+Author: Your Name
+Version: 1.0
+"""
+
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from profiling import ScanProfile
+    from scanner import RuleBudget, match_value
+    from topk import HeavyHitters
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# Default read size and boundary overlap (in characters)
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_OVERLAP = 64 * 1024
+
+
+class AnalysisAccumulator:
+    """Running totals for one document that can be built piece by piece and merged
+
+    Holds only what analyze() needs to produce its result: unique matches per
+    category (in first-seen order), the word frequency counter and the
+    sentiment/risk word counts, plus the rules that ran out of time budget.
+    Word counts are a Counter, or a bounded HeavyHitters summary in
+    approximate mode (pass analyzer.new_word_counts()).
+    Everything is plain data so it can be pickled between worker processes.
+    With profiling on it also carries the document's ScanProfile, which
+    result() hands to the analyzer's profiler exactly once.
+    """
+
+    def __init__(self, categories: Iterable[str], word_counts: Optional[Counter] = None):
+        self.patterns = {category: {} for category in categories}
+        self.word_counts = Counter() if word_counts is None else word_counts
+        self.positive_count = 0
+        self.negative_count = 0
+        self.risky_count = 0
+        self.total_words = 0
+        self.has_content = False
+        self.chars_scanned = 0
+        self.rules_over_budget = []
+        self.profile = None
+
+    def add_matches(self, category: str, matches: Iterable[Any]):
+        """Record matches for a category (duplicates are ignored)"""
+        seen = self.patterns.setdefault(category, {})
+        for match in matches:
+            seen[match] = None
+
+    def add_over_budget(self, categories: Iterable[str]):
+        """Record rules that were switched off because they exceeded their time budget"""
+        for category in categories:
+            if category not in self.rules_over_budget:
+                self.rules_over_budget.append(category)
+
+    def add_words(self, word_counts: Counter, positive: int, negative: int, risky: int, total: int):
+        """Add word statistics for a piece of text"""
+        self.word_counts.update(word_counts)
+        self.positive_count += positive
+        self.negative_count += negative
+        self.risky_count += risky
+        self.total_words += total
+
+    def merge(self, other: 'AnalysisAccumulator'):
+        """Fold another accumulator (e.g. a later chunk) into this one"""
+        for category, matches in other.patterns.items():
+            self.add_matches(category, matches)
+        self.add_words(other.word_counts, other.positive_count, other.negative_count,
+                       other.risky_count, other.total_words)
+        self.has_content = self.has_content or other.has_content
+        self.chars_scanned += other.chars_scanned
+        self.add_over_budget(other.rules_over_budget)
+        if other.profile is not None:
+            if self.profile is None:
+                self.profile = ScanProfile()
+            self.profile.merge(other.profile)
+
+    def word_totals(self) -> Dict[str, Any]:
+        """Compact counters that, with a result dict, are enough to merge this document later"""
+        return {
+            'positive': self.positive_count,
+            'negative': self.negative_count,
+            'risky': self.risky_count,
+            'total_words': self.total_words,
+            'chars': self.chars_scanned,
+            'has_content': self.has_content
+        }
+
+    def merge_result(self, result: Dict[str, Any], totals: Dict[str, Any]):
+        """Fold in a finished (e.g. cached) document
+
+        Matches and word totals merge exactly; word frequency only has the
+        document's top words to offer, so corpus top words become approximate.
+        """
+        for category, matches in result.get('patterns', {}).items():
+            self.add_matches(category, matches)
+        self.add_words(Counter(dict(result.get('frequency', []))), totals['positive'],
+                       totals['negative'], totals['risky'], totals['total_words'])
+        self.has_content = self.has_content or totals['has_content']
+        self.chars_scanned += totals['chars']
+        self.add_over_budget(result.get('rules_over_budget', ()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly snapshot (see from_dict)"""
+        data = {
+            'patterns': {category: list(matches) for category, matches in self.patterns.items()},
+            'word_counts': dict(self.word_counts.items()),
+            'totals': self.word_totals(),
+            'rules_over_budget': list(self.rules_over_budget)
+        }
+        if isinstance(self.word_counts, HeavyHitters):
+            summary = self.word_counts
+            data['word_summary'] = {'capacity': summary.capacity, 'total': summary.total, 'error': summary.error}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AnalysisAccumulator':
+        """Rebuild an accumulator from to_dict() output (JSON lists become tuples again)"""
+        summary = data.get('word_summary')
+        word_counts = HeavyHitters.from_dict(dict(summary, counts={})) if summary else None
+        accumulator = cls(data['patterns'], word_counts)
+        for category, matches in data['patterns'].items():
+            accumulator.add_matches(category, (tuple(match) if isinstance(match, list) else match for match in matches))
+
+        totals = data['totals']
+        accumulator.add_words(Counter(data['word_counts']), totals['positive'], totals['negative'],
+                              totals['risky'], totals['total_words'])
+        if summary:
+            # The saved counts already include the summary's total and error
+            accumulator.word_counts.total = summary['total']
+            accumulator.word_counts.error = summary['error']
+        accumulator.has_content = totals['has_content']
+        accumulator.chars_scanned = totals['chars']
+        accumulator.add_over_budget(data.get('rules_over_budget', ()))
+        return accumulator
+
+    def result(self, analyzer: SuspiciousPatternAnalyzer) -> Dict[str, Any]:
+        """Build the same result dict SuspiciousPatternAnalyzer.analyze() returns"""
+        if not self.has_content:
+            return {
+                'patterns': {},
+                'frequency': [],
+                'sentiment': 'Neutral',
+                'risk_score': 0
+            }
+
+        profile = self.profile if analyzer.profiler is not None else None
+        if profile is not None:
+            profile.skip()
+
+        sentiment_analyzer = analyzer.sentiment_analyzer
+        patterns = {category: list(matches) for category, matches in self.patterns.items()}
+        word_risk = sentiment_analyzer.risk_from_counts(self.risky_count, self.total_words)
+
+        result = {
+            'patterns': patterns,
+            'frequency': self.word_counts.most_common(20),
+            'sentiment': sentiment_analyzer.sentiment_from_counts(self.positive_count, self.negative_count),
+            'risk_score': analyzer.combine_risk(patterns, word_risk)
+        }
+        if isinstance(self.word_counts, HeavyHitters):
+            result['frequency_error'] = self.word_counts.error
+        if self.rules_over_budget:
+            result['rules_over_budget'] = list(self.rules_over_budget)
+
+        # The profile is recorded once; later merges (e.g. into a corpus) don't count it again
+        if profile is not None:
+            profile.mark('risk')
+            profile.set_matches(patterns)
+            result['profile'] = analyzer.profiler.record(profile)
+            self.profile = None
+        return result
+
+
+class ChunkedScanner:
+    """Feeds text through the analyzer one chunk at a time
+
+    Only a small tail of the input is kept between chunks. Each kind of work
+    ("lane") remembers the absolute offset it has finished up to:
+
+    - the prefilter windows (and the window-safe patterns that run on them)
+    - every pattern that scans the full text
+    - the word statistics, which are always cut on a whitespace character
+
+    A window or match that reaches into the last `overlap` characters of the
+    buffer might still grow, so it is left for the next chunk. That way hits
+    spanning a chunk boundary are found exactly once, as long as no single
+    token is longer than `overlap` characters.
+
+    An unfinished window longer than the scanner's max_line_length is cut
+    into segments as it grows, exactly as a whole-text scan would cut it,
+    and a run without whitespace is split for the word statistics after
+    `overlap` characters. Only a single full-text match can keep more than
+    about `overlap` characters buffered. Fed chunks are collected in a list
+    and joined once the pending text is as long as the buffer (and at least
+    `overlap`), so even then the work stays linear in the input size.
+    """
+
+    def __init__(self, analyzer: Optional[SuspiciousPatternAnalyzer] = None, overlap: int = DEFAULT_OVERLAP,
+                 accumulator: Optional[AnalysisAccumulator] = None):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.scanner = self.analyzer.scanner
+        self.overlap = overlap
+        self.accumulator = accumulator or AnalysisAccumulator((spec.name for spec in self.scanner.specs),
+                                                              self.analyzer.new_word_counts())
+        self.budget = RuleBudget()
+
+        # Opt-in profiling: stage times are added to the accumulator's profile
+        self.profile = None
+        if self.analyzer.profiler is not None:
+            self.profile = self.analyzer.profiler.start()
+            self.accumulator.profile = self.profile
+
+        self.buffer = ''
+        self.pending = []          # chunks fed since the last scan
+        self.pending_size = 0
+        self.base = 0              # absolute offset of buffer[0]
+        self.window_resume = 0     # absolute offset where the window lane continues
+        self.window_open = None    # (start, cut) of a hostile window being cut into segments
+        self.text_resume = 0       # absolute offset where the word lane continues
+        self.full_resume = {
+            index: 0 for index, triggers in enumerate(self.scanner.spec_triggers) if triggers is None
+        }
+
+    def feed(self, chunk: str):
+        """Add the next piece of the input"""
+        if not chunk:
+            return
+
+        if not self.accumulator.has_content and not chunk.isspace():
+            self.accumulator.has_content = True
+
+        self.accumulator.chars_scanned += len(chunk)
+        self.budget.add_input(len(chunk))
+        if self.profile is not None:
+            self.profile.size += len(chunk)
+        self.pending.append(chunk)
+        self.pending_size += len(chunk)
+        if self.pending_size >= max(self.overlap, len(self.buffer)):
+            self._process(final=False)
+
+    def flush(self):
+        """Commit everything buffered so far without ending the stream
+
+        Follow mode calls this when the input goes idle so hits at the very
+        end are reported now instead of after the next write. Flush only
+        after a newline: a match that later input continues past the flush
+        point would otherwise be reported in two parts.
+        """
+        self._process(final=True)
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush everything that is still buffered and return the analysis result"""
+        self._process(final=True)
+        if self.profile is not None:
+            self.profile.add_rules(self.budget)
+        return self.accumulator.result(self.analyzer)
+
+    def _process(self, final: bool):
+        """Scan as much of the buffer as can be decided without seeing more input"""
+        if self.pending:
+            self.buffer = ''.join([self.buffer] + self.pending)
+            self.pending = []
+            self.pending_size = 0
+
+        buffer = self.buffer
+        base = self.base
+        end = len(buffer)
+        limit = end if final else end - self.overlap
+
+        if limit <= 0:
+            return
+
+        profile = self.profile
+        if profile is not None:
+            profile.skip()
+
+        window_resume = self._scan_windows(buffer, self.window_resume - base, limit, final)
+        self.window_resume = base + window_resume
+        resumes = [window_resume]
+
+        lowered = self.scanner.lowered(buffer) if self.full_resume else None
+        for index in self.full_resume:
+            resume = self._scan_full(index, buffer, self.full_resume[index] - base, limit, final, lowered)
+            self.full_resume[index] = base + resume
+            resumes.append(resume)
+        if profile is not None:
+            profile.mark('find_patterns')
+
+        text_resume = self._count_words(buffer, self.text_resume - base, limit, final)
+        self.text_resume = base + text_resume
+        resumes.append(text_resume)
+        if profile is not None:
+            profile.mark('word_statistics')
+
+        self.accumulator.add_over_budget(self.budget.exceeded)
+
+        # Keep one character of context before the earliest unfinished lane
+        # so that \b and look-behinds see the same text as a whole-file scan
+        cut = max(min(resumes) - 1, 0)
+        if cut:
+            self.buffer = buffer[cut:]
+            self.base = base + cut
+
+    def _scan_windows(self, buffer: str, position: int, limit: int, final: bool) -> int:
+        """Scan complete prefilter windows; return where the window lane resumes"""
+        scanner = self.scanner
+        window_pattern = scanner.window_pattern
+        if window_pattern is None:
+            return limit
+
+        base = self.base
+        windows = []
+        segments = []       # hostile window pieces before the windows
+        open_segments = []  # pieces of a window that is still growing, after them
+        resume = max(position, limit)
+
+        if self.window_open is not None:
+            # Carry on cutting the hostile window from the last cut
+            start, cut = self.window_open
+            low = max(start, cut - scanner.max_match_length) - base
+            end = scanner.window_tail_pattern.match(buffer, cut - base).end()
+            if final or end < limit:
+                segments.extend(scanner.segments(buffer[low:end], base + low, cut - base - low))
+                self.window_open = None
+                position = end
+            else:
+                resume = self._open_segments(buffer, start, cut, end, open_segments)
+                position = None
+
+        if position is not None:
+            for match in window_pattern.finditer(buffer, position):
+                if not final and match.end() >= limit:
+                    # The window may continue into the next chunk
+                    resume = match.start()
+                    if match.end() - resume > scanner.max_line_length:
+                        resume = self._open_segments(buffer, base + resume, base + resume, match.end(),
+                                                     open_segments)
+                    break
+                windows.append((match.group(0), match.start()))
+
+        batches = [(segment, [start], [0], owned) for segment, start, owned in segments]
+        batches.extend(scanner.window_batches(windows))
+        batches.extend((segment, [start], [0], owned) for segment, start, owned in open_segments)
+        for reduced, _, _, owned in batches:
+            for category, matches in scanner.scan_reduced(reduced, budget=self.budget, owned=owned).items():
+                self.accumulator.add_matches(category, matches)
+
+        return resume
+
+    def _open_segments(self, buffer: str, start: int, cut: int, end: int, segments: List) -> int:
+        """Cut what is known of an unfinished hostile window (absolute start and cut, relative end)
+
+        Returns where the window lane resumes: the context the next segment needs.
+        """
+        scanner = self.scanner
+        low = max(start, cut - scanner.max_match_length) - self.base
+        for segment, segment_start, owned in scanner.segments(buffer[low:end], self.base + low,
+                                                              cut - self.base - low, final=False):
+            segments.append((segment, segment_start, owned))
+            cut = segment_start + owned[1]
+        self.window_open = (start, cut)
+        return max(start, cut - scanner.max_match_length) - self.base
+
+    def _scan_full(self, index: int, buffer: str, position: int, limit: int, final: bool, lowered=None) -> int:
+        """Scan one full-text pattern (gated by its anchors); return where it resumes"""
+        spec, compiled = self.scanner.compiled[index]
+        matches = []
+        resume = max(position, limit)
+
+        for match in self.scanner.iter_full_matches(index, buffer, position, lowered=lowered, budget=self.budget):
+            if not final and match.end() >= limit:
+                resume = match.start()
+                break
+            matches.append(match_value(match, compiled.groups))
+
+        self.accumulator.add_matches(spec.name, self.scanner.finish_values(index, matches))
+        return resume
+
+    def _count_words(self, buffer: str, position: int, limit: int, final: bool) -> int:
+        """Update word statistics up to the last whitespace; return where counting resumes"""
+        if final:
+            cut = len(buffer)
+        else:
+            cut = max(buffer.rfind(' ', position), buffer.rfind('\n', position))
+            if cut <= position:
+                # No whitespace for overlap characters: split the run there
+                if limit - position <= self.overlap:
+                    return position
+                cut = limit
+
+        text = buffer[position:cut]
+        if text:
+            self.accumulator.add_words(*self.analyzer.word_statistics(text))
+
+        return cut
+
+
+def iter_file_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterable[str]:
+    """Yield decoded text chunks of a file without loading it all"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def scan_chunks(chunks: Iterable[str], analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+                overlap: int = DEFAULT_OVERLAP) -> Dict[str, Any]:
+    """Analyze an iterable of text chunks as if it were one long string"""
+    chunked_scanner = ChunkedScanner(analyzer, overlap)
+    for chunk in chunks:
+        chunked_scanner.feed(chunk)
+    return chunked_scanner.finish()
+
+
+def scan_file(path: str, analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_OVERLAP) -> Dict[str, Any]:
+    """Analyze a file of any size in fixed-size chunks"""
+    return scan_chunks(iter_file_chunks(path, chunk_size), analyzer, overlap)
+
+
+# Test function for development
+def test_streaming():
+    """Check that chunked scanning matches a whole-text analyze() call"""
+    analyzer = SuspiciousPatternAnalyzer()
+
+    test_text = """
+    Hey there! My email is john.doe@example.com and my phone is (555) 123-4567.
+    My credit card number is 4532-1234-5678-9012. Please transfer money to my
+    Bitcoin address: 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+    You can visit https://example.com for more info.
+    """ * 20
+
+    expected = analyzer.analyze(test_text)
+
+    # Tiny chunks and overlap force lots of matches across chunk boundaries
+    chunks = [test_text[i:i + 37] for i in range(0, len(test_text), 37)]
+    result = scan_chunks(chunks, analyzer, overlap=64)
+
+    same_patterns = all(
+        set(result['patterns'][name]) == set(matches) for name, matches in expected['patterns'].items()
+    )
+
+    print("Streaming Test Results:")
+    print("=======================")
+    print(f"Patterns identical: {same_patterns}")
+    print(f"Frequency identical: {result['frequency'] == expected['frequency']}")
+    print(f"Sentiment: {result['sentiment']} (expected {expected['sentiment']})")
+    print(f"Risk Score: {result['risk_score']}% (expected {expected['risk_score']}%)")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_streaming()
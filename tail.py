@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Log Tailer - Follow growing log files and flag new hits as they are written
+Author: Your Name
+Version: 1.0
+"""
+
+import codecs
+import json
+import os
+import time
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+# Import our analysis modules
+try:
+    from analyzer import SuspiciousPatternAnalyzer
+    from streaming import AnalysisAccumulator, ChunkedScanner
+except ImportError:
+    print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+    import sys
+    sys.exit(1)
+
+
+# How often files are checked for new data (seconds)
+DEFAULT_POLL_INTERVAL = 0.25
+
+# Largest read per file per poll, so one busy log cannot starve the others
+READ_SIZE = 4 * 1024 * 1024
+
+# Offsets are written to the state file at most this often (seconds)
+SAVE_INTERVAL = 5.0
+
+# Callback signature: on_finding(path, category, value, is_new)
+FindingCallback = Callable[[str, str, Any, bool], None]
+
+
+class NotifyingAccumulator(AnalysisAccumulator):
+    """Accumulator that reports every match it receives to a callback"""
+
+    def __init__(self, categories: Iterable[str], path: str, on_finding: Optional[FindingCallback] = None,
+                 word_counts=None):
+        super().__init__(categories, word_counts)
+        self.path = path
+        self.on_finding = on_finding
+
+    def add_matches(self, category: str, matches: Iterable[Any]):
+        """Record matches and tell the callback which ones were never seen before"""
+        if self.on_finding is None:
+            super().add_matches(category, matches)
+            return
+
+        seen = self.patterns.setdefault(category, {})
+        for match in matches:
+            is_new = match not in seen
+            seen[match] = None
+            self.on_finding(self.path, category, match, is_new)
+
+
+class TailedFile:
+    """One followed file: its open handle, byte offset and running analysis
+
+    Only whole lines are fed to the scanner and it is flushed after each
+    read, so every byte before committed_offset() has been scanned. A
+    trailing partial line waits for its newline (or for READ_SIZE bytes).
+    """
+
+    def __init__(self, path: str, analyzer: SuspiciousPatternAnalyzer, accumulator: NotifyingAccumulator):
+        self.path = path
+        self.analyzer = analyzer
+        self.accumulator = accumulator
+        self.handle = None
+        self.device = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b''         # read bytes after the last newline, not fed yet
+        self.unflushed = 0         # fed bytes the scanner may still be holding
+        self.at_line_end = True    # whether the fed text ends with a newline
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self.scanner = ChunkedScanner(analyzer, accumulator=accumulator)
+
+    def open(self, offset: int = 0, device: Optional[int] = None, inode: Optional[int] = None) -> bool:
+        """Open the file, resuming at offset if it is still the same file (same inode)"""
+        try:
+            handle = open(self.path, 'rb')
+        except OSError:
+            return False
+
+        stat = os.fstat(handle.fileno())
+        same_file = (device, inode) == (stat.st_dev, stat.st_ino)
+
+        # A rotated or truncated file starts again from the top
+        if not same_file or offset > stat.st_size:
+            offset = 0
+
+        handle.seek(offset)
+        self.handle = handle
+        self.device = stat.st_dev
+        self.inode = stat.st_ino
+        self.offset = offset
+        self.partial = b''
+        self.unflushed = 0
+        return True
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def read_new(self) -> bool:
+        """Scan whatever was appended since the last call; returns True if data was read"""
+        if self.handle is None and not self.open():
+            return False
+
+        got_data = False
+        while True:
+            data = self.handle.read(READ_SIZE)
+            if not data:
+                break
+            got_data = True
+            self.offset += len(data)
+            self._feed_lines(data)
+            if len(data) < READ_SIZE:
+                break
+
+        # Idle at a line end: report hits now instead of waiting for more input
+        if self.unflushed and self.at_line_end:
+            self._flush()
+
+        self._check_rotation()
+        return got_data
+
+    def _feed_lines(self, data: bytes):
+        """Feed the complete lines of data (after any held partial line) to the scanner"""
+        data = self.partial + data
+        cut = data.rfind(b'\n') + 1
+        if not cut and len(data) >= READ_SIZE:
+            cut = len(data)  # a line this long is scanned in pieces rather than held
+        self.partial = data[cut:]
+        if cut:
+            self.scanner.feed(self.decoder.decode(data[:cut]))
+            self.unflushed += cut
+            self.at_line_end = data[cut - 1:cut] == b'\n'
+
+    def _flush(self):
+        self.scanner.flush()
+        self.unflushed = 0
+
+    def _check_rotation(self):
+        """Switch to the new file after log rotation or copy-truncate"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return  # rotated away and not recreated yet - keep draining the old handle
+
+        rotated = (stat.st_dev, stat.st_ino) != (self.device, self.inode)
+        truncated = not rotated and stat.st_size < self.offset
+        if not (rotated or truncated):
+            return
+
+        # Finish the old file, then keep the running totals for the new one
+        if self.partial:
+            self.scanner.feed(self.decoder.decode(self.partial, final=True))
+            self.partial = b''
+        self._flush()
+        self.close()
+        self.decoder.reset()
+        self.scanner = ChunkedScanner(self.analyzer, accumulator=self.accumulator)
+        self.open()
+
+    def committed_offset(self) -> int:
+        """Byte offset that is safe to resume from: everything before it has been scanned"""
+        return self.offset - len(self.partial) - self.unflushed
+
+
+class LogTailer:
+    """Follows append-only logs, scanning only the bytes written since last time
+
+    Offsets (plus device/inode to detect rotation) and the running totals are
+    persisted to a JSON state file, so a restart picks up exactly where the
+    previous run stopped without re-reading history.
+    """
+
+    def __init__(self, paths: List[str], state_path: Optional[str] = None,
+                 analyzer: Optional[SuspiciousPatternAnalyzer] = None,
+                 on_finding: Optional[FindingCallback] = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, start_at_end: bool = False):
+        self.analyzer = analyzer or SuspiciousPatternAnalyzer()
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.last_save = 0.0
+
+        state = self.load_state()
+        self.files = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            saved = state.get(path, {})
+
+            accumulator = NotifyingAccumulator(self.analyzer.CATEGORIES, path,
+                                               word_counts=self.analyzer.new_word_counts())
+            if 'accumulator' in saved:
+                accumulator.merge(AnalysisAccumulator.from_dict(saved['accumulator']))
+            accumulator.on_finding = on_finding
+
+            tailed = TailedFile(path, self.analyzer, accumulator)
+            opened = tailed.open(saved.get('offset', 0), saved.get('device'), saved.get('inode'))
+
+            # Files seen for the first time can skip their existing history
+            if opened and start_at_end and not saved:
+                tailed.offset = tailed.handle.seek(0, os.SEEK_END)
+            self.files[path] = tailed
+
+    def load_state(self) -> Dict[str, Any]:
+        """Read saved offsets and totals (empty if there is no state file yet)"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable state file: {str(e)}")
+            return {}
+
+    def save_state(self):
+        """Write offsets and totals atomically (temp file + rename)"""
+        if not self.state_path:
+            return
+
+        state = {
+            path: {
+                'device': tailed.device,
+                'inode': tailed.inode,
+                'offset': tailed.committed_offset(),
+                'accumulator': tailed.accumulator.to_dict()
+            }
+            for path, tailed in self.files.items()
+        }
+
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(state, file)
+        os.replace(temp_path, self.state_path)
+        self.last_save = time.monotonic()
+
+    def poll_once(self) -> bool:
+        """Check every file once; returns True if any new data was scanned"""
+        activity = False
+        for tailed in self.files.values():
+            if tailed.read_new():
+                activity = True
+
+        if time.monotonic() - self.last_save >= SAVE_INTERVAL:
+            self.save_state()
+        return activity
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        """Current analysis result (patterns, frequency, sentiment, risk) per file"""
+        return {path: tailed.accumulator.result(self.analyzer) for path, tailed in self.files.items()}
+
+    def follow(self, duration: Optional[float] = None):
+        """Poll until interrupted (or for `duration` seconds), then save state"""
+        deadline = None if duration is None else time.monotonic() + duration
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                # Busy logs are re-read immediately; idle ones wait one poll interval
+                if not self.poll_once():
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Report what is still buffered, save state and close all file handles"""
+        for tailed in self.files.values():
+            if tailed.unflushed:
+                tailed._flush()
+        self.save_state()
+        for tailed in self.files.values():
+            tailed.close()
+
+
+# Test function for development
+def test_tail():
+    """Append to a log, rotate it and check that every hit is flagged once"""
+    import shutil
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix='shadowtrace_tail_')
+    log_path = os.path.join(directory, "app.log")
+    state_path = os.path.join(directory, "state.json")
+    flagged = []
+
+    def on_finding(path, category, value, is_new):
+        flagged.append((category, value))
+
+    try:
+        with open(log_path, 'w') as file:
+            file.write("boot ok\n")
+
+        tailer = LogTailer([log_path], state_path, on_finding=on_finding)
+        tailer.poll_once()
+
+        with open(log_path, 'a') as file:
+            file.write("login from 10.0.0.7 by admin@example.com\n")
+        start = time.monotonic()
+        tailer.poll_once()
+        print(f"Flagged after append: {flagged} ({(time.monotonic() - start) * 1000:.1f} ms)")
+
+        # Rotate: move the old log away and start a new one
+        os.rename(log_path, log_path + ".1")
+        with open(log_path, 'w') as file:
+            file.write("card 4532-1234-5678-9012\n")
+        tailer.poll_once()
+        tailer.poll_once()
+        tailer.close()
+
+        # A restart resumes from the saved offset - nothing is flagged twice
+        flagged.clear()
+        tailer = LogTailer([log_path], state_path, on_finding=on_finding)
+        tailer.poll_once()
+        print(f"Flagged after restart: {flagged}")
+        print(f"Running risk score: {tailer.results()[os.path.abspath(log_path)]['risk_score']}%")
+        tailer.close()
+
+        # Lines still buffered at shutdown are scanned now or re-read after the restart
+        with open(log_path, 'a') as file:
+            file.writelines(f"user{n}@example.com logged in\n" for n in range(100))
+            file.write("partial line from user100@exa")
+        tailer = LogTailer([log_path], state_path)
+        tailer.poll_once()
+        tailer.close()
+        with open(log_path, 'a') as file:
+            file.write("mple.com\n")
+        tailer = LogTailer([log_path], state_path)
+        tailer.poll_once()
+        emails = [email for email in tailer.results()[os.path.abspath(log_path)]['patterns']['emails']
+                  if email.startswith('user')]
+        print(f"Emails after restart mid-line: {len(emails)} (expected 101)")
+        tailer.close()
+
+    finally:
+        shutil.rmtree(directory)
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    test_tail()
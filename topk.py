@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+ShadowTrace - Digital Footprint & Suspicious Pattern Finder
+Approximate Top-K - Bounded-memory heavy hitters for word frequency
+Author: Your Name
+Version: 1.0
+"""
+
+import heapq
+import os
+from collections import Counter
+from collections.abc import Mapping
+from typing import Dict, List, Tuple, Any, Callable, Iterator, Optional
+
+
+# Words kept by the summary unless a capacity is given
+DEFAULT_CAPACITY = 10000
+
+# Set to a capacity (e.g. 10000) to use the approximate summary everywhere, worker processes included
+TOP_K_ENV = "SHADOWTRACE_TOP_K"
+
+
+class HeavyHitters(Mapping):
+    """Misra-Gries summary of word counts (the mergeable form of Space-Saving)
+
+    At most `capacity` words are kept. Whenever an update pushes the table
+    past that, the (capacity+1)-th largest count is subtracted from every
+    word and the words that drop to zero are forgotten. The amount removed
+    so far is tracked in `error`, which gives these guarantees for a
+    stream of `total` words:
+
+    - a reported count is never above the true count, and at most `error`
+      below it
+    - error <= (total - sum of kept counts) / (capacity + 1) <= total / (capacity + 1)
+    - every word that occurs more than total / (capacity + 1) times is kept
+
+    Until more than `capacity` distinct words have been seen nothing is
+    subtracted and the counts are exact (error == 0). Two summaries merge
+    by adding counts, totals and errors and reducing once, with the same
+    bounds, so chunks and worker processes can be summarized separately.
+
+    Updates take per-block Counters, so memory stays at the capacity plus
+    the distinct words of one block, however long the input is. It is a
+    drop-in for the Counter in the word-frequency code paths (update,
+    most_common, items).
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts = Counter()
+        self.total = 0
+        self.error = 0
+
+    def update(self, other: Any = None):
+        """Add a block of word counts (a mapping or another summary)"""
+        if not other:
+            return
+        if isinstance(other, HeavyHitters):
+            self.counts.update(other.counts)
+            self.total += other.total
+            self.error += other.error
+        else:
+            if not isinstance(other, Mapping):
+                other = Counter(other)
+            self.counts.update(other)
+            self.total += sum(other.values())
+
+        if len(self.counts) > self.capacity:
+            self._reduce()
+
+    def _reduce(self):
+        """Subtract the (capacity+1)-th largest count from all words and drop the ones that reach zero"""
+        threshold = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.counts = Counter({word: count - threshold for word, count in self.counts.items() if count > threshold})
+        self.error += threshold
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Any, int]]:
+        """Largest (lower-bound) counts first, like Counter.most_common"""
+        return self.counts.most_common(n)
+
+    def bounds(self, word: Any) -> Tuple[int, int]:
+        """(lowest, highest) possible true count of a word"""
+        count = self.counts.get(word, 0)
+        return count, count + self.error
+
+    def map_words(self, function: Callable[[Any], Any]) -> 'HeavyHitters':
+        """Copy with every word passed through `function` (e.g. bytes.decode); colliding words are added up"""
+        mapped = HeavyHitters(self.capacity)
+        for word, count in self.counts.items():
+            mapped.counts[function(word)] += count
+        mapped.total = self.total
+        mapped.error = self.error
+        return mapped
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form (see from_dict)"""
+        return {'capacity': self.capacity, 'total': self.total, 'error': self.error, 'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'HeavyHitters':
+        """Rebuild a summary from to_dict() output"""
+        summary = cls(data['capacity'])
+        summary.counts = Counter(data['counts'])
+        summary.total = data['total']
+        summary.error = data['error']
+        return summary
+
+    # Missing words count as 0 (like Counter), so membership must not go through __getitem__
+    def __getitem__(self, word: Any) -> int:
+        return self.counts[word]
+
+    def __contains__(self, word: Any) -> bool:
+        return word in self.counts
+
+    def get(self, word: Any, default: Any = None) -> Any:
+        return self.counts.get(word, default)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.counts)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, HeavyHitters):
+            return (self.counts, self.total, self.error, self.capacity) == \
+                   (other.counts, other.total, other.error, other.capacity)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HeavyHitters(capacity={self.capacity}, words={len(self.counts)}, total={self.total}, error={self.error})"
+
+
+def capacity_from_env() -> Optional[int]:
+    """Summary capacity from SHADOWTRACE_TOP_K, or None for exact counting"""
+    value = os.environ.get(TOP_K_ENV, "").strip()
+    if not value:
+        return None
+    try:
+        capacity = int(value)
+    except ValueError:
+        print(f"Error: {TOP_K_ENV} must be a whole number, got '{value}' - using exact word counts")
+        return None
+    return capacity if capacity > 0 else None
+
+
+def generate_id_log(size_bytes: int, seed: int = 3) -> str:
+    """Log lines full of unique request ids and hashes - the worst case for exact word counting"""
+    import random
+
+    rng = random.Random(seed)
+    words = "request served user login failed connection closed cache miss retry worker".split()
+    lines = []
+    size = 0
+    while size < size_bytes:
+        line = "req-%012x sha %032x %s trace %016x" % (
+            rng.getrandbits(48), rng.getrandbits(128), ' '.join(rng.choices(words, k=6)), rng.getrandbits(64))
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+
+def benchmark_topk(size_mb: int = 32, capacity: int = DEFAULT_CAPACITY):
+    """Compare exact and approximate word counting on a high-cardinality log"""
+    import time
+    import tracemalloc
+
+    try:
+        from analyzer import SuspiciousPatternAnalyzer
+    except ImportError:
+        print("Error: analyzer.py not found. Make sure all files are in the same directory.")
+        return
+
+    text = generate_id_log(size_mb * 1024 * 1024)
+    exact_analyzer = SuspiciousPatternAnalyzer()
+    approx_analyzer = SuspiciousPatternAnalyzer(top_k=capacity)
+
+    runs = {}
+    for name, analyzer in (('exact', exact_analyzer), ('approximate', approx_analyzer)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        counts = analyzer.count_word_frequency(text)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        runs[name] = (counts, elapsed, peak)
+
+    exact, approx = runs['exact'][0], runs['approximate'][0]
+    # Exact mode pads its top 20 with arbitrary count-1 ids; compare the words that really repeat
+    exact_top = [word for word, count in exact.most_common(20) if count > approx.error + 1]
+    approx_top = [word for word, _ in approx.most_common(len(exact_top))]
+    worst = max(exact[word] - approx[word] for word in exact_top)
+    heavy = all(word in approx for word, count in exact.items() if count > approx.total / (capacity + 1))
+
+    print(f"{size_mb} MB of id-heavy logs, {sum(exact.values()):,} words, {len(exact):,} distinct")
+    for name, (counts, elapsed, peak) in runs.items():
+        print(f"  {name:<12} {elapsed:6.2f}s  peak {peak / 1024 / 1024:7.1f} MB  {len(counts):>9,} words kept")
+    print(f"Same top words ({len(exact_top)} that repeat): {sorted(exact_top) == sorted(approx_top)}")
+    print(f"Every word above total/(k+1) kept: {heavy}")
+    print(f"Largest undercount: {worst} (guaranteed <= error {approx.error}, "
+          f"bound total/(k+1) = {approx.total // (capacity + 1)})")
+
+
+# Test function for development
+def test_topk():
+    """Check the error bounds and that split-and-merge gives a valid summary"""
+    import random
+
+    rng = random.Random(1)
+    words = [f"w{rng.paretovariate(1.2):.0f}" for _ in range(200000)] + [f"id{n}" for n in range(50000)]
+    rng.shuffle(words)
+    exact = Counter(words)
+
+    summary = HeavyHitters(200)
+    halves = [HeavyHitters(200), HeavyHitters(200)]
+    for index in range(0, len(words), 10000):
+        block = Counter(words[index:index + 10000])
+        summary.update(block)
+        halves[(index // 10000) % 2].update(block)
+    merged = halves[0]
+    merged.update(halves[1])
+
+    for name, candidate in (('streamed', summary), ('merged', merged)):
+        within = all(candidate[word] <= count <= candidate[word] + candidate.error for word, count in exact.items())
+        heavy = all(word in candidate for word, count in exact.items() if count > candidate.total / 201)
+        print(f"{name}: {len(candidate)} words kept, error {candidate.error} "
+              f"(bound {candidate.total / 201:.0f}), bounds hold: {within}, heavy hitters kept: {heavy}")
+    print(f"Top 5 exact : {exact.most_common(5)}")
+    print(f"Top 5 merged: {merged.most_common(5)}")
+
+
+# Run test if this file is executed directly
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        benchmark_topk(int(sys.argv[1]))
+    else:
+        test_topk()
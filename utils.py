@@ -109,13 +109,18 @@ class Colors:
 
 def clear_screen():
     """Clear the terminal screen - works on Windows, Mac, and Linux"""
+    # Nothing to clear when output goes to a pipe or file
+    if not sys.stdout.isatty():
+        return
+
     try:
         # Windows
         if os.name == 'nt':
             os.system('cls')
-        # Mac and Linux
+        # Mac and Linux - ANSI "clear screen + cursor home", no subprocess needed
         else:
-            os.system('clear')
+            sys.stdout.write('\033[2J\033[H')
+            sys.stdout.flush()
     except:
         # If clearing fails, print empty lines
         print('\n' * 50)